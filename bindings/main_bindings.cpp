@@ -1,32 +1,246 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/numpy.h>
 #include <pybind11/stl.h>
+#include <cstring>
+#include <string>
 
 #include "../engine/include/engine.h" 
 #include "../engine/include/defs.h"
+#include "../engine/include/log.h"
+#include "../engine/include/trace.h"
+#include "../engine/include/rack.h"
 
 namespace py = pybind11;
 
 // This function sends numpy array to python
-// This is zero-copy way, because we work with numpy/sounddevice directly
-void render_to_buffer(SynthEngine& engine, py::array_t<float> output_array) {
-    py::buffer_info buf = output_array.request();
-
-    if (buf.ndim != 2) {
+// This is zero-copy way, because we work with numpy/sounddevice directly. Engine or Rack.
+// float32, int16 or int32, (frames x channels) with any channel count: C order is interleaved,
+// a Fortran order array (or the .T of a channels x frames one) is planar. planar=True takes
+// the array as (channels x frames)
+template <class Host>
+void render_to_buffer(Host& engine, py::array output_array, bool planar) {
+    if (output_array.ndim() != 2) {
         throw std::runtime_error("Output buffer must be 2D (frames x channels)");
     }
-    if (buf.shape[1] != 2) {
-        throw std::runtime_error("Output buffer must be stereo (2 channels)");
+    if (!output_array.writeable()) {
+        throw std::runtime_error("Output buffer is read-only");
+    }
+
+    AudioOutput out;
+    py::dtype dtype = output_array.dtype();
+    if (dtype.is(py::dtype::of<float>())) out.format = SAMPLE_FLOAT32;
+    else if (dtype.is(py::dtype::of<int16_t>())) out.format = SAMPLE_INT16;
+    else if (dtype.is(py::dtype::of<int32_t>())) out.format = SAMPLE_INT32;
+    else throw std::runtime_error("Output buffer must be float32, int16 or int32");
+
+    int frame_axis = planar ? 1 : 0;
+    ssize_t item = output_array.itemsize();
+    ssize_t num_frames = output_array.shape(frame_axis);
+    ssize_t channels = output_array.shape(1 - frame_axis);
+    ssize_t frame_step = output_array.strides(frame_axis) / item;
+    ssize_t channel_step = output_array.strides(1 - frame_axis) / item;
+    if (channels < 1) throw std::runtime_error("Output buffer needs at least one channel");
+
+    out.data = output_array.mutable_data();
+    out.channels = (int)channels;
+    if (num_frames <= 1) frame_step = channels;         // Strides of a single frame say nothing
+
+    if (frame_step == channels && (channel_step == 1 || channels == 1)) {
+        out.planar = false;
+    } else if (frame_step == 1 && channel_step >= num_frames) {
+        out.planar = true;
+        out.channel_stride = (size_t)channel_step;
+    } else {
+        throw std::runtime_error("Output buffer must be contiguous, interleaved or planar");
+    }
+
+    // Any length (engine splits it into sub-blocks), long offline renders don't hold the GIL
+    py::gil_scoped_release release;
+    engine.render_output(out, (int)num_frames);
+}
+
+// Returns all spectrum frames produced since the last call as (frames x bins) array
+py::array_t<float> get_spectrum_frames(SynthEngine& engine) {
+    SpectrumAnalyzer& analyzer = engine.get_analyzer();
+
+    int num_bins = analyzer.get_num_bins();
+    int pending = analyzer.pending_frames();
+
+    py::array_t<float> result({pending, num_bins});
+    int n = analyzer.fetch_frames(result.mutable_data(), pending, num_bins);
+    if (n != pending) result.resize({n, num_bins});
+
+    return result;
+}
+
+// Trigger-synced oscilloscope samples as 1D float32 array
+py::array_t<float> get_scope(SynthEngine& engine, int num_points) {
+    num_points = std::max(2, std::min(MAX_SCOPE_POINTS, num_points));
+
+    py::array_t<float> result(num_points);
+    engine.get_scope_data(result.mutable_data(), num_points);
+    return result;
+}
+
+// All queued engine log messages as [(level, text)], oldest first
+py::list drain_log() {
+    py::list result;
+    LogMessage msg;
+    while (engine_log_queue().pop(msg)) {
+        // Truncation may split a UTF-8 sequence, so decode leniently
+        py::str text = py::reinterpret_steal<py::str>(PyUnicode_DecodeUTF8(msg.text, std::strlen(msg.text), "replace"));
+        result.append(py::make_tuple(msg.level, text));
+    }
+    return result;
+}
+
+// (snapshot params, events) of the current / last recording
+py::tuple get_recording(const SynthEngine& engine) {
+    const AutomationRecorder& rec = engine.get_recorder();
+
+    py::array_t<float> snapshot(PARAM_COUNT);
+    std::memcpy(snapshot.mutable_data(), rec.snapshot(), PARAM_COUNT * sizeof(float));
+
+    size_t n = rec.size();
+    py::array_t<AutomationEvent> events(n);
+    if (n) std::memcpy(events.mutable_data(), rec.data(), n * sizeof(AutomationEvent));
+
+    return py::make_tuple(snapshot, events);
+}
+
+// Offline replay into a new (frames x 2) array of dtype (float32, int16 or int32)
+py::array render_automation(SynthEngine& engine, py::array_t<float, py::array::c_style | py::array::forcecast> snapshot,
+                            py::array_t<AutomationEvent, py::array::c_style> events, int num_frames, int block_size,
+                            py::object dtype) {
+    if (snapshot.ndim() != 1 || snapshot.shape(0) != PARAM_COUNT) {
+        throw py::value_error("Snapshot must be a 1D array of PARAM_COUNT values");
     }
+    if (events.ndim() != 1) throw py::value_error("Events must be a 1D array");
+    if (num_frames < 0) throw py::value_error("num_frames must be >= 0");
 
-    float* ptr = static_cast<float*>(buf.ptr);
-    int num_frames = (int)buf.shape[0];
+    const AutomationEvent* ev = events.data();
+    size_t n = (size_t)events.shape(0);
+    for (size_t i = 1; i < n; ++i) {
+        if (ev[i].sample < ev[i - 1].sample) throw py::value_error("Events must be sorted by sample");
+    }
+
+    AudioOutput out;
+    py::dtype dt = py::dtype::from_args(dtype);
+    if (dt.is(py::dtype::of<float>())) out.format = SAMPLE_FLOAT32;
+    else if (dt.is(py::dtype::of<int16_t>())) out.format = SAMPLE_INT16;
+    else if (dt.is(py::dtype::of<int32_t>())) out.format = SAMPLE_INT32;
+    else throw py::value_error("dtype must be float32, int16 or int32");
+
+    py::array result(dt, std::vector<ssize_t>{num_frames, 2});
+    out.data = result.mutable_data();
+    const float* snap = snapshot.data();
+    {
+        py::gil_scoped_release release;
+        engine.render_automation(snap, ev, n, out, num_frames, block_size);
+    }
+    return result;
+}
+
+// Meter snapshot as dict (levels in dB, METER_FLOOR_DB when silent)
+py::dict get_meters(const SynthEngine& engine) {
+    MeterValues v = engine.get_meters();
 
-    engine.render_interleaved(ptr, num_frames);
+    py::dict d;
+    d["peak"] = py::make_tuple(v.peak_l, v.peak_r);
+    d["rms"] = py::make_tuple(v.rms_l, v.rms_r);
+    d["true_peak"] = v.true_peak;
+    d["true_peak_max"] = v.true_peak_max;
+    d["momentary"] = v.momentary;
+    d["short_term"] = v.short_term;
+    d["integrated"] = v.integrated;
+    d["limiter_hits"] = v.limiter_hits;
+    d["blocks"] = v.blocks;
+    return d;
+}
+
+// One cycle (any length) from a WAV path or a 1D array of samples
+int load_single_cycle(SynthEngine& engine, const std::string& name, py::object source) {
+    if (py::isinstance<py::str>(source) || py::hasattr(source, "__fspath__")) {
+        std::string path = py::module_::import("os").attr("fspath")(source).cast<std::string>();
+        py::gil_scoped_release release;
+        return engine.load_single_cycle_file(name, path);
+    }
+
+    auto samples = py::array_t<float, py::array::c_style | py::array::forcecast>::ensure(source);
+    if (!samples || samples.ndim() != 1) throw py::value_error("Expected a WAV path or 1D array of samples");
+    py::gil_scoped_release release;
+    return engine.load_single_cycle(name, samples.data(), (int)samples.shape(0));
+}
+
+// Table cache state (sizes in MB)
+py::dict get_table_cache(const SynthEngine& engine) {
+    const WavetableManager& tables = engine.get_tables();
+
+    py::dict d;
+    d["budget_mb"] = tables.budget() / 1048576.0;
+    d["resident_mb"] = tables.resident_bytes() / 1048576.0;
+    d["tables"] = tables.table_count();
+    d["resident"] = tables.resident_count();
+    return d;
+}
+
+// Accepts {Params|int|name: value} dict or array of PARAM_COUNT values (NaN = keep current)
+void set_params(SynthEngine& engine, py::object values, float crossfade_ms) {
+    float staged[PARAM_COUNT];
+    bool mask[PARAM_COUNT];
+    for (int i = 0; i < PARAM_COUNT; ++i) {
+        staged[i] = 0.0f;
+        mask[i] = false;
+    }
+
+    if (py::isinstance<py::dict>(values)) {
+        py::object params_enum = py::module_::import("ssynth_cpp").attr("Params");
+        for (auto item : values.cast<py::dict>()) {
+            int id;
+            if (py::isinstance<py::str>(item.first)) {
+                py::dict members = params_enum.attr("__members__");
+                py::str key = item.first.attr("upper")();
+                if (!members.contains(key)) throw py::key_error("Unknown parameter: " + key.cast<std::string>());
+                id = members[key].cast<int>();
+            } else {
+                id = item.first.cast<int>();
+            }
+            if (id < 0 || id >= PARAM_COUNT) throw py::value_error("Parameter id out of range: " + std::to_string(id));
+
+            float v = item.second.cast<float>();
+            if (!is_finite_value(v)) throw py::value_error("Parameter value must be finite");
+            staged[id] = v;
+            mask[id] = true;
+        }
+    } else {
+        auto arr = py::array_t<float, py::array::c_style | py::array::forcecast>::ensure(values);
+        if (!arr || arr.ndim() != 1 || arr.shape(0) != PARAM_COUNT) {
+            throw py::value_error("Expected dict or 1D array of PARAM_COUNT values");
+        }
+        const float* data = arr.data();
+        for (int i = 0; i < PARAM_COUNT; ++i) {
+            // NaN means "unchanged", infinities are rejected (bit checks, -ffast-math safe)
+            if (!is_finite_value(data[i])) {
+                uint32_t bits;
+                std::memcpy(&bits, &data[i], sizeof(bits));
+                if ((bits & 0x007FFFFFu) == 0) throw py::value_error("Parameter value must be finite");
+                continue;
+            }
+            staged[i] = data[i];
+            mask[i] = true;
+        }
+    }
+
+    if (!engine.set_params(staged, mask, crossfade_ms)) {
+        throw py::value_error("Invalid crossfade time");
+    }
 }
 
 PYBIND11_MODULE(ssynth_cpp, m) {
     m.doc() = "SSynth Core Engine";
+    m.attr("METER_FLOOR_DB") = METER_FLOOR_DB;
+
+    PYBIND11_NUMPY_DTYPE(AutomationEvent, sample, type, reserved, id, value);
 
     py::enum_<ParamID>(m, "Params")
         // Master
@@ -67,22 +281,182 @@ PYBIND11_MODULE(ssynth_cpp, m) {
         .value("FILT_DECAY", FILT_DECAY)
         .value("FILT_SUSTAIN", FILT_SUSTAIN)
         .value("FILT_RELEASE", FILT_RELEASE)
+
+        // Unison
+        .value("OSC1_UNISON", OSC1_UNISON)
+        .value("OSC1_UNI_DETUNE", OSC1_UNI_DETUNE)
+        .value("OSC1_UNI_SPREAD", OSC1_UNI_SPREAD)
+        .value("OSC2_UNISON", OSC2_UNISON)
+        .value("OSC2_UNI_DETUNE", OSC2_UNI_DETUNE)
+        .value("OSC2_UNI_SPREAD", OSC2_UNI_SPREAD)
+        .value("OSC3_UNISON", OSC3_UNISON)
+        .value("OSC3_UNI_DETUNE", OSC3_UNI_DETUNE)
+        .value("OSC3_UNI_SPREAD", OSC3_UNI_SPREAD)
+
+        // Interpolation
+        .value("OSC1_INTERP", OSC1_INTERP)
+        .value("OSC2_INTERP", OSC2_INTERP)
+        .value("OSC3_INTERP", OSC3_INTERP)
+
+        // Wavetable position
+        .value("OSC1_POS", OSC1_POS)
+        .value("OSC2_POS", OSC2_POS)
+        .value("OSC3_POS", OSC3_POS)
+
+        // Pitch
+        .value("GLIDE_TIME", GLIDE_TIME)
+        .value("GLIDE_MODE", GLIDE_MODE)
+        .value("PITCH_BEND", PITCH_BEND)
+        .value("BEND_RANGE", BEND_RANGE)
         
         .export_values();
 
+    py::enum_<InterpMode>(m, "Interp")
+        .value("LINEAR", INTERP_LINEAR)
+        .value("CUBIC", INTERP_CUBIC)
+        .value("OPTIMAL", INTERP_OPTIMAL);
+
+    py::enum_<GlideMode>(m, "Glide")
+        .value("OFF", GLIDE_OFF)
+        .value("LEGATO", GLIDE_LEGATO)
+        .value("ALWAYS", GLIDE_ALWAYS);
+
+    py::enum_<LogLevel>(m, "LogLevel")
+        .value("DEBUG", LOG_DEBUG)
+        .value("INFO", LOG_INFO)
+        .value("WARNING", LOG_WARNING)
+        .value("ERROR", LOG_ERROR);
+
+    m.def("drain_log", &drain_log, "Pop all queued engine log messages as [(level, text)]");
+    m.def("log_dropped", []() { return engine_log_queue().dropped(); }, "Messages lost because the log queue was full");
+
+    // Python side of the stage trace (frontend/utils/profiler.py), same clock as the engine stages
+    m.def("trace_now", &trace_now_ns, "Trace clock in ns");
+    m.def("trace_recording", []() { return tracer().is_recording(); });
+    m.def("trace_record", [](const std::string& name, uint64_t start_ns, uint64_t end_ns) {
+            if (tracer().is_recording()) tracer().record(tracer().intern(name), start_ns, end_ns);
+        }, py::arg("name"), py::arg("start_ns"), py::arg("end_ns"), "Add a Python stage to the running capture");
+    m.def("trace_thread_name", [](const std::string& name) { tracer().name_thread(tracer().intern(name)); },
+          "Label of the calling thread in the trace");
+
+    py::enum_<WindowType>(m, "Window")
+        .value("HANN", WINDOW_HANN)
+        .value("HAMMING", WINDOW_HAMMING)
+        .value("BLACKMAN", WINDOW_BLACKMAN)
+        .value("RECT", WINDOW_RECT);
+
     // SynthEngine class export
     py::class_<SynthEngine>(m, "Engine")
-        .def(py::init<int>(), py::arg("sample_rate") = 44100)
+        .def(py::init<int, int>(), py::arg("sample_rate") = 44100, py::arg("output_rate") = 0,
+             "Renders at sample_rate; process() delivers output_rate (resampled) when it's given and differs")
+        .def_property_readonly("sample_rate", &SynthEngine::get_sample_rate)
+        .def_property_readonly("output_rate", &SynthEngine::get_output_rate)
+        .def_property_readonly("resampler_latency", &SynthEngine::output_latency, "Frames at sample_rate, 0 without resampling")
         
         .def("load_wavetable", &SynthEngine::load_wavetable, "Load .wvt file, returns ID")
+        .def("load_single_cycle", &load_single_cycle, py::arg("name"), py::arg("source"),
+             "Band-limited table from one cycle (WAV path or array of any length), returns ID")
+        .def("set_table_budget", [](SynthEngine& engine, double megabytes) {
+                if (!is_finite_value((float)megabytes) || megabytes < 0.0) throw py::value_error("Budget must be >= 0 MB");
+                engine.set_table_budget((size_t)(megabytes * 1048576.0));
+            }, py::arg("megabytes"), py::call_guard<py::gil_scoped_release>(),
+            "Memory for resident tables, least recently used ones beyond it are evicted")
+        .def("get_table_cache", &get_table_cache, "Budget, resident memory and table counts")
+        .def("prepare_tables", [](SynthEngine& engine, std::vector<int> table_ids) {
+                py::gil_scoped_release release;
+                engine.prepare_tables(table_ids.data(), (int)table_ids.size());
+            }, py::arg("table_ids"),
+            "Control thread: reloads evicted tables before set_param selects them (set_param never loads)")
         
         .def("note_on", &SynthEngine::note_on)
         .def("note_off", &SynthEngine::note_off)
         
         .def("set_param", &SynthEngine::set_param)
         .def("get_param", &SynthEngine::get_param)
+        .def("set_interpolation", [](SynthEngine& engine, InterpMode mode) { engine.set_interpolation((int)mode); },
+             py::arg("mode"), "Same interpolation (Interp) for all oscillators")
+        .def("set_smoothing", &SynthEngine::set_smoothing, py::arg("param"), py::arg("ms"),
+             "Glide time constant of a continuous param (0 = steps), False if it is not smoothed")
+        .def("set_params", &set_params, py::arg("values"), py::arg("crossfade_ms") = 0.0f,
+            "Atomically apply many parameters at the next block boundary")
+        .def("get_params", [](SynthEngine& engine) {
+                py::array_t<float> result(PARAM_COUNT);
+                float* ptr = result.mutable_data();
+                for (int i = 0; i < PARAM_COUNT; ++i) ptr[i] = engine.get_param(i);
+                return result;
+            }, "All parameters as array indexed by Params")
+
+        .def("process", &render_to_buffer<SynthEngine>, py::arg("output"), py::arg("planar") = false,
+             "Render into a numpy array: float32 / int16 (dithered) / int32, any channel count, interleaved or planar")
+
+        .def("get_spectrum", &SynthEngine::get_spectrum_data,
+            "Get newest FFT magnitudes (0..1) for visualization. Computed on demand when the analyzer is stopped",
+            py::call_guard<py::gil_scoped_release>())
+        .def("get_spectrum_frames", &get_spectrum_frames, "Get all new spectrum frames as (frames x bins) array")
+
+        .def("get_scope", &get_scope, py::arg("num_points") = 1024, "Get latest samples aligned to a rising zero crossing")
+        .def("get_meters", &get_meters,
+             "Peak/RMS/true peak (dB), loudness (LUFS) and limiter hits. Floor values until enable_meters(True)")
+        .def("enable_meters", &SynthEngine::enable_meters, py::arg("on") = true,
+             "Compute meters in the render loop (off by default, enabling restarts them)")
+        .def_property_readonly("meters_enabled", &SynthEngine::meters_enabled)
+        .def("start_recording", &SynthEngine::start_recording, py::arg("capacity") = 1 << 20,
+             "Record note/param events with sample timestamps (capacity = max events)")
+        .def("stop_recording", &SynthEngine::stop_recording)
+        .def_property_readonly("is_recording", [](const SynthEngine& engine) { return engine.get_recorder().is_recording(); })
+        .def_property_readonly("recording_dropped", [](const SynthEngine& engine) { return engine.get_recorder().dropped(); })
+        .def("get_recording", &get_recording, "(snapshot params, events) of the last recording")
+        .def("render_automation", &render_automation, py::arg("snapshot"), py::arg("events"), py::arg("num_frames"),
+             py::arg("block_size") = 512, py::arg("dtype") = py::dtype::of<float>(),
+             "Replay a recording offline, returns (frames x 2) array of dtype (float32, int16 or int32)")
+        .def("reset_meters", &SynthEngine::reset_meters, "Restart integrated loudness, true peak max and limiter hits")
+
+        .def("start_trace", &SynthEngine::start_trace, py::arg("capacity") = DEFAULT_TRACE_CAPACITY,
+             py::call_guard<py::gil_scoped_release>(), "Capture profiling stages (capacity = events per thread)")
+        .def("stop_trace", &SynthEngine::stop_trace)
+        .def("dump_trace", &SynthEngine::dump_trace, py::arg("path"), py::call_guard<py::gil_scoped_release>(),
+             "Write the capture as Chrome trace-event JSON (chrome://tracing, Perfetto)")
+        .def_property_readonly("trace_dropped", [](SynthEngine&) { return tracer().dropped(); })
+
+        .def("open_tap", &SynthEngine::open_tap, py::arg("name") = SHM_TAP_DEFAULT_NAME,
+             py::arg("capacity") = SHM_TAP_DEFAULT_CAPACITY, py::call_guard<py::gil_scoped_release>(),
+             "Publish output and scope signal to shared memory (capacity = frames, power of 2)")
+        .def("close_tap", &SynthEngine::close_tap, py::call_guard<py::gil_scoped_release>())
+
+        .def("configure_analyzer", [](SynthEngine& engine, int fft_size, WindowType window, float overlap) {
+                return engine.configure_analyzer(fft_size, (int)window, overlap);
+            },
+            py::arg("fft_size") = DEFAULT_FFT_SIZE, py::arg("window") = WINDOW_HANN, py::arg("overlap") = 0.75f,
+            py::call_guard<py::gil_scoped_release>(),
+            "Set FFT size (power of 2), window and frame overlap (0..0.95)")
+        .def("start_analyzer", &SynthEngine::start_analyzer, py::call_guard<py::gil_scoped_release>())
+        .def("stop_analyzer", &SynthEngine::stop_analyzer, py::call_guard<py::gil_scoped_release>())
+        .def_property_readonly("fft_size", [](SynthEngine& engine) { return engine.get_analyzer().get_fft_size(); })
+        .def_property_readonly("hop_size", [](SynthEngine& engine) { return engine.get_analyzer().get_hop_size(); })
+        .def_property_readonly("dropped_frames", [](SynthEngine& engine) { return engine.get_analyzer().get_dropped_frames(); })
+        .def_property_readonly("active_voices", &SynthEngine::active_voice_count, "Voices still sounding (0 = engine is idle)")
+
+        .def_static("set_fft_wisdom_file", &SpectrumAnalyzer::set_wisdom_file, "FFTW wisdom cache, makes measured plans fast on next start");
+
+    py::class_<Rack>(m, "Rack")
+        .def(py::init<int, int>(), py::arg("sample_rate") = 44100, py::arg("threads") = 0)
+        .def_readonly_static("OMNI", &Rack::OMNI)
+
+        .def("add", &Rack::add_engine, py::return_value_policy::reference_internal,
+             "New instance, returns its Engine (load tables and set params on it as usual)")
+        .def("engine", [](Rack& rack, int index) -> SynthEngine& {
+                if (index < 0 || index >= rack.size()) throw py::index_error("No engine at this index");
+                return rack.engine(index);
+            }, py::return_value_policy::reference_internal)
+        .def("__len__", &Rack::size)
+        .def_property_readonly("threads", &Rack::threads)
 
-        .def("process", &render_to_buffer, "Render audio into provided numpy array")
+        .def("set_route", &Rack::set_route, py::arg("index"), py::arg("channel") = (int)Rack::OMNI,
+             py::arg("key_lo") = 0, py::arg("key_hi") = 127, "Instance plays this channel (OMNI = all) and key range")
+        .def("set_gain", &Rack::set_gain, py::arg("index"), py::arg("gain"))
+        .def("note_on", &Rack::note_on, py::arg("channel"), py::arg("note"), py::arg("velocity"))
+        .def("note_off", &Rack::note_off, py::arg("channel"), py::arg("note"))
 
-        .def("get_spectrum", &SynthEngine::get_spectrum_data, "Get FFT magnitudes for visualization");
+        .def("process", &render_to_buffer<Rack>, py::arg("output"), py::arg("planar") = false,
+             "Render all instances in parallel and mix into a numpy array (formats and layouts as Engine.process)");
 }
\ No newline at end of file
@@ -0,0 +1,85 @@
+import struct
+import wave
+from pathlib import Path
+import numpy as np
+
+from control.presets import PARAM_COUNT, pad_array
+
+# Recorded performances: parameter snapshot + timestamped events (Engine.start_recording),
+# stored as a small binary file next to the preset and replayed offline with Engine.render_automation
+
+NOTE_ON = 0
+NOTE_OFF = 1
+PARAM = 2
+
+# Same layout as AutomationEvent in engine/include/automation.h
+EVENT_DTYPE = np.dtype([("sample", "<u8"), ("type", "u1"), ("reserved", "u1"), ("id", "<i2"), ("value", "<f4")])
+
+MAGIC = b"SSAU"
+VERSION = 1
+HEADER = struct.Struct("<4sIIIQ")     # magic, version, sample_rate, param_count, num_events
+SUFFIX = ".automation"
+
+class Recording:
+    def __init__(self, snapshot, events, sample_rate):
+        self.snapshot = pad_array(snapshot)
+        # Events from several threads can interleave slightly, replay needs them in order
+        events = np.asarray(events).astype(EVENT_DTYPE)
+        self.events = events[np.argsort(events["sample"], kind="stable")]
+        self.sample_rate = sample_rate
+
+    @classmethod
+    def from_engine(cls, engine, sample_rate):
+        snapshot, events = engine.get_recording()
+        return cls(snapshot, events, sample_rate)
+
+    def __len__(self):
+        return len(self.events)
+
+    @property
+    def length(self):
+        # Samples up to the last event
+        return int(self.events["sample"][-1]) if len(self.events) else 0
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.sample_rate, PARAM_COUNT, len(self.events)))
+            f.write(self.snapshot.astype("<f4").tobytes())
+            f.write(self.events.tobytes())
+
+    @classmethod
+    def load(cls, path):
+        data = Path(path).read_bytes()
+        magic, version, sample_rate, param_count, num_events = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not an automation file (v{VERSION})")
+
+        offset = HEADER.size
+        snapshot = np.frombuffer(data, dtype="<f4", count=param_count, offset=offset)
+        offset += param_count * 4
+        events = np.frombuffer(data, dtype=EVENT_DTYPE, count=num_events, offset=offset)
+        return cls(snapshot, events, sample_rate)
+
+    def render(self, engine, tail=1.0, block_size=512, dtype=np.float32):
+        """
+        Offline replay (much faster than realtime) -> (frames x 2) of dtype (float32, int16, int32).
+        tail: seconds rendered after the last event (release tails)
+        """
+        num_frames = self.length + int(tail * self.sample_rate)
+        return engine.render_automation(self.snapshot, self.events, num_frames, block_size, dtype)
+
+def automation_path(preset_path):
+    # user/pad.json -> user/pad.automation
+    return Path(preset_path).with_suffix(SUFFIX)
+
+def write_wav(path, pcm, sample_rate):
+    # 16-bit stereo: pcm is the engine's int16 render (Recording.render(dtype="<i2")), the same
+    # dithered conversion FileSink writes
+    pcm = np.asarray(pcm)
+    if pcm.dtype != np.dtype("<i2"):
+        raise TypeError(f"write_wav takes the engine's int16 render, got {pcm.dtype}")
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
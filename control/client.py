@@ -0,0 +1,51 @@
+import socket
+
+from control.osc import encode_message, encode_bundle, decode_packet
+
+# Small blocking client for the headless host (scripts, tests, render farm jobs)
+
+class ControlClient:
+    def __init__(self, host="127.0.0.1", port=9000, timeout=1.0):
+        self.addr = (host, port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.settimeout(timeout)
+
+    def send(self, address, *args):
+        self.sock.sendto(encode_message(address, *args), self.addr)
+
+    def send_bundle(self, messages):
+        # messages: list of (address, args...) tuples, applied as one batch
+        self.sock.sendto(encode_bundle([encode_message(*m) for m in messages]), self.addr)
+
+    def note_on(self, note, velocity=1.0): self.send("/note_on", int(note), float(velocity))
+    def note_off(self, note): self.send("/note_off", int(note))
+    def set_param(self, param, value): self.send("/param", param, float(value))
+    def load_preset(self, path): self.send("/preset", str(path))      # Inside the host's --presets-dir
+
+    def request(self, address, *args):
+        self.send(address, *args)
+        data, _ = self.sock.recvfrom(65536)
+        return decode_packet(data)[0]
+
+    def ping(self):
+        return self.request("/ping")
+
+    def stats(self):
+        _, (applied, max_latency_ms, errors) = self.request("/stats")
+        return {"applied": applied, "max_latency_ms": max_latency_ms, "errors": errors}
+
+    def meters(self):
+        _, values = self.request("/meters")
+        keys = ("peak_l", "peak_r", "rms_l", "rms_r", "true_peak_max",
+                "momentary", "short_term", "integrated", "limiter_hits")
+        return dict(zip(keys, values))
+
+    def reset_meters(self): self.send("/meters_reset")
+
+    def record_start(self, capacity=None):
+        self.send("/record_start", *([int(capacity)] if capacity else []))
+
+    def record_stop(self, path): self.send("/record_stop", str(path))      # Inside --recordings-dir
+
+    def close(self):
+        self.sock.close()
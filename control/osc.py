@@ -0,0 +1,108 @@
+import struct
+
+# Minimal OSC 1.0 codec (messages and bundles), enough for local control.
+# Supported argument tags: i, f, d, h, s, b, T, F, N
+
+BUNDLE_TAG = b"#bundle\0"
+
+def _pad4(n):
+    return (n + 3) & ~3
+
+def _read_string(data, pos):
+    end = data.index(b"\0", pos)
+    return data[pos:end].decode("utf-8"), _pad4(end + 1)
+
+# struct.error on a truncated packet becomes ValueError, like every other malformed input
+def _unpack(fmt, data, pos):
+    try:
+        return struct.unpack_from(fmt, data, pos)[0]
+    except struct.error as e:
+        raise ValueError(f"Truncated OSC packet: {e}") from None
+
+def _write_string(s):
+    raw = s.encode("utf-8") + b"\0"
+    return raw + b"\0" * (_pad4(len(raw)) - len(raw))
+
+def decode_message(data):
+    """
+    Decodes a single OSC message
+    Returns (address, [args])
+    """
+    address, pos = _read_string(data, 0)
+    if pos >= len(data):
+        return address, []
+
+    tags, pos = _read_string(data, pos)
+    if not tags.startswith(","):
+        raise ValueError(f"Bad OSC type tags: {tags!r}")
+
+    args = []
+    for tag in tags[1:]:
+        if tag == "i":
+            args.append(_unpack(">i", data, pos)); pos += 4
+        elif tag == "f":
+            args.append(_unpack(">f", data, pos)); pos += 4
+        elif tag == "d":
+            args.append(_unpack(">d", data, pos)); pos += 8
+        elif tag == "h":
+            args.append(_unpack(">q", data, pos)); pos += 8
+        elif tag == "s":
+            s, pos = _read_string(data, pos)
+            args.append(s)
+        elif tag == "b":
+            size = _unpack(">i", data, pos); pos += 4
+            if size < 0 or pos + size > len(data):
+                raise ValueError(f"Truncated OSC blob ({size} bytes)")
+            args.append(bytes(data[pos:pos + size])); pos += _pad4(size)
+        elif tag == "T": args.append(True)
+        elif tag == "F": args.append(False)
+        elif tag == "N": args.append(None)
+        else:
+            raise ValueError(f"Unsupported OSC type tag: {tag!r}")
+    return address, args
+
+def decode_packet(data):
+    """
+    Decodes OSC packet (message or nested bundles)
+    Returns flat list of (address, [args]) in packet order
+    """
+    if not data.startswith(BUNDLE_TAG):
+        return [decode_message(data)]
+
+    messages = []
+    pos = len(BUNDLE_TAG) + 8   # skip time tag, commands are applied on the next block
+    while pos + 4 <= len(data):
+        size = _unpack(">i", data, pos)
+        pos += 4
+        if size < 0 or pos + size > len(data):
+            raise ValueError(f"Truncated OSC bundle element ({size} bytes)")
+        messages.extend(decode_packet(data[pos:pos + size]))
+        pos += size
+    return messages
+
+def encode_message(address, *args):
+    tags = ","
+    payload = b""
+    for a in args:
+        if a is True: tags += "T"
+        elif a is False: tags += "F"
+        elif a is None: tags += "N"
+        elif isinstance(a, int):
+            tags += "i"; payload += struct.pack(">i", a)
+        elif isinstance(a, float):
+            tags += "f"; payload += struct.pack(">f", a)
+        elif isinstance(a, str):
+            tags += "s"; payload += _write_string(a)
+        elif isinstance(a, (bytes, bytearray)):
+            tags += "b"
+            payload += struct.pack(">i", len(a)) + bytes(a) + b"\0" * (_pad4(len(a)) - len(a))
+        else:
+            raise TypeError(f"Can't encode {type(a).__name__} as OSC argument")
+    return _write_string(address) + _write_string(tags) + payload
+
+def encode_bundle(messages):
+    """messages: list of already encoded OSC messages"""
+    out = BUNDLE_TAG + struct.pack(">Q", 1)     # 1 == "immediately"
+    for m in messages:
+        out += struct.pack(">i", len(m)) + m
+    return out
@@ -0,0 +1,208 @@
+import json
+import sqlite3
+from pathlib import Path
+import numpy as np
+import ssynth_cpp
+
+from control.presets import (PARAM_COUNT, WAVEFORMS, load_preset, preset_to_array,
+                             array_to_preset, array_to_engine, pad_array)
+
+# Preset bank: single SQLite file with packed parameter arrays (float32 x PARAM_COUNT, NaN = unset),
+# indexed by name / tag / waveform, plus offline rendered thumbnail spectra.
+# Reads go through SQLite memory mapping, so any page of results is a few index lookups
+
+SCHEMA_VERSION = 1
+THUMBNAIL_BANDS = 64
+MMAP_SIZE = 256 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS presets (
+    id        INTEGER PRIMARY KEY,
+    name      TEXT NOT NULL UNIQUE COLLATE NOCASE,
+    waveform  TEXT,
+    tags      TEXT NOT NULL DEFAULT '',
+    params    BLOB NOT NULL,
+    thumbnail BLOB
+);
+CREATE TABLE IF NOT EXISTS preset_tags (
+    tag       TEXT NOT NULL COLLATE NOCASE,
+    preset_id INTEGER NOT NULL REFERENCES presets(id) ON DELETE CASCADE,
+    PRIMARY KEY (tag, preset_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_presets_waveform ON presets(waveform, name);
+"""
+
+class PresetBank:
+    def __init__(self, path, readonly=False):
+        self.path = str(path)
+        if readonly:
+            self.db = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        else:
+            self.db = sqlite3.connect(self.path)
+            self.db.execute("PRAGMA journal_mode = WAL")
+            self.db.executescript(SCHEMA)
+            self._check_meta()
+
+        self.db.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        self.db.execute("PRAGMA foreign_keys = ON")
+
+    def _check_meta(self):
+        rows = dict(self.db.execute("SELECT key, value FROM meta"))
+        if not rows:
+            self.db.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ("version", str(SCHEMA_VERSION)),
+                ("param_count", str(PARAM_COUNT)),
+                ("waveforms", json.dumps(WAVEFORMS)),
+            ])
+            self.db.commit()
+        elif int(rows["param_count"]) > PARAM_COUNT:
+            raise ValueError(f"Bank has {rows['param_count']} params, engine has {PARAM_COUNT}")
+        elif int(rows["param_count"]) < PARAM_COUNT:
+            # New params are only appended, old rows are padded with NaN on read
+            self.db.execute("UPDATE meta SET value = ? WHERE key = 'param_count'", (str(PARAM_COUNT),))
+            self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+    # Writing
+
+    def add(self, name, params, tags=(), thumbnail=None, replace=True):
+        params = np.asarray(params, dtype=np.float32)
+        if params.shape != (PARAM_COUNT,):
+            raise ValueError(f"Expected {PARAM_COUNT} parameters, got {params.shape}")
+
+        tags = sorted({t.strip().lower() for t in tags if t.strip()})
+        wave_idx = params[int(ssynth_cpp.Params.OSC1_TYPE)]
+        waveform = WAVEFORMS[int(wave_idx)] if not np.isnan(wave_idx) and 0 <= int(wave_idx) < len(WAVEFORMS) else None
+        thumb = None if thumbnail is None else np.asarray(thumbnail, dtype=np.uint8).tobytes()
+
+        upsert = (" ON CONFLICT(name) DO UPDATE SET waveform = excluded.waveform, tags = excluded.tags, "
+                  "params = excluded.params, thumbnail = excluded.thumbnail") if replace else ""
+        self.db.execute(
+            f"INSERT INTO presets (name, waveform, tags, params, thumbnail) VALUES (?, ?, ?, ?, ?){upsert}",
+            (name, waveform, ",".join(tags), params.tobytes(), thumb))
+        preset_id = self.db.execute("SELECT id FROM presets WHERE name = ?", (name,)).fetchone()[0]
+        self.db.execute("DELETE FROM preset_tags WHERE preset_id = ?", (preset_id,))
+        self.db.executemany("INSERT INTO preset_tags VALUES (?, ?)", [(t, preset_id) for t in tags])
+        return preset_id
+
+    def set_thumbnail(self, preset_id, thumbnail):
+        self.db.execute("UPDATE presets SET thumbnail = ? WHERE id = ?",
+                        (np.asarray(thumbnail, dtype=np.uint8).tobytes(), preset_id))
+
+    def commit(self):
+        self.db.commit()
+
+    # JSON import / export (user/*.json schema)
+
+    def import_json(self, paths, tags=()):
+        count = 0
+        with self.db:
+            for path in paths:
+                path = Path(path)
+                files = sorted(path.glob("*.json")) if path.is_dir() else [path]
+                for f in files:
+                    state = load_preset(f)
+                    preset_tags = list(tags) + list(state.get("tags", []))
+                    self.add(f.stem, preset_to_array(state), preset_tags)
+                    count += 1
+        return count
+
+    def export_json(self, out_dir):
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        count = 0
+        for name, tags, blob in self.db.execute("SELECT name, tags, params FROM presets ORDER BY name"):
+            state = array_to_preset(pad_array(np.frombuffer(blob, dtype=np.float32)))
+            if tags: state["tags"] = tags.split(",")
+            with open(out_dir / f"{name}.json", "w") as f:
+                json.dump(state, f, indent=4)
+            count += 1
+        return count
+
+    # Reading
+
+    def _where(self, text, tag, waveform):
+        clauses, args = [], []
+        if text:
+            clauses.append("p.name LIKE ?")
+            args.append(f"%{text}%")
+        if tag:
+            clauses.append("p.id IN (SELECT preset_id FROM preset_tags WHERE tag = ?)")
+            args.append(tag.lower())
+        if waveform:
+            clauses.append("p.waveform = ?")
+            args.append(waveform)
+        where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+        return where, args
+
+    def count(self, text=None, tag=None, waveform=None):
+        where, args = self._where(text, tag, waveform)
+        return self.db.execute(f"SELECT COUNT(*) FROM presets p {where}", args).fetchone()[0]
+
+    def search(self, text=None, tag=None, waveform=None, offset=0, limit=50):
+        """
+        One page of results ordered by name
+        Returns list of dicts: id, name, waveform, tags
+        """
+        where, args = self._where(text, tag, waveform)
+        rows = self.db.execute(
+            f"SELECT p.id, p.name, p.waveform, p.tags FROM presets p {where} "
+            f"ORDER BY p.name LIMIT ? OFFSET ?", args + [limit, offset])
+        return [{"id": r[0], "name": r[1], "waveform": r[2], "tags": r[3].split(",") if r[3] else []}
+                for r in rows]
+
+    def get_params(self, preset_id):
+        row = self.db.execute("SELECT params FROM presets WHERE id = ?", (preset_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"No preset with id {preset_id}")
+        return pad_array(np.frombuffer(row[0], dtype=np.float32))
+
+    def get_engine_params(self, preset_id, wavetable_ids):
+        # Ready for Engine.set_params
+        return array_to_engine(self.get_params(preset_id), wavetable_ids)
+
+    def get_thumbnail(self, preset_id):
+        row = self.db.execute("SELECT thumbnail FROM presets WHERE id = ?", (preset_id,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.uint8)
+
+    def ids_without_thumbnail(self):
+        return [r[0] for r in self.db.execute("SELECT id FROM presets WHERE thumbnail IS NULL")]
+
+def render_thumbnail(engine_factory, params, wavetable_ids, note=60, seconds=0.25,
+                     sample_rate=44100, bands=THUMBNAIL_BANDS):
+    """
+    Offline spectrum thumbnail: renders a note with the preset and reduces
+    its average spectrum to `bands` log-spaced bands (uint8, 0..255 over -100..0 dB)
+    """
+    engine = engine_factory()
+    engine.set_params(array_to_engine(params, wavetable_ids))
+
+    block = np.zeros((512, 2), dtype=np.float32)
+    engine.process(block)   # swap is applied on block boundary
+    engine.note_on(note, 1.0)
+
+    num_blocks = max(1, int(seconds * sample_rate) // 512)
+    audio = np.empty(num_blocks * 512, dtype=np.float32)
+    for i in range(num_blocks):
+        engine.process(block)
+        audio[i * 512:(i + 1) * 512] = block[:, 0]
+
+    fft_size = 2048
+    frames = audio[:len(audio) // fft_size * fft_size].reshape(-1, fft_size)
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(fft_size), axis=1)).mean(axis=0) * (4.0 / fft_size)
+
+    edges = np.geomspace(1, len(spectrum) - 1, bands + 1).astype(int)
+    levels = np.array([spectrum[a:max(a + 1, b)].max() for a, b in zip(edges[:-1], edges[1:])])
+    db = 20.0 * np.log10(levels + 1e-9)
+    return (np.clip((db + 100.0) / 100.0, 0.0, 1.0) * 255).astype(np.uint8)
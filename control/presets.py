@@ -0,0 +1,152 @@
+import json
+import numpy as np
+import ssynth_cpp
+
+# Preset JSON (user/*.json) <-> engine parameters, shared by GUI and headless host
+
+# Preset key -> ParamID suffix, per oscillator ("wave_index" maps to OSCn_TYPE)
+OSC_PARAM_KEYS = {
+    "wave_index": "TYPE",
+    "mix": "MIX",
+    "pitch": "PITCH",
+    "detune": "DETUNE",
+    "unison": "UNISON",
+    "unison_detune": "UNI_DETUNE",
+    "spread": "UNI_SPREAD",
+    "interpolation": "INTERP",
+    "position": "POS",
+}
+INT_KEYS = ("wave_index", "unison", "interpolation")
+
+# Same order as ssynth_cpp.Interp (GUI selector shows them)
+INTERPOLATIONS = ["Linear", "Cubic", "Optimal"]
+
+OSC_KEYS = {
+    osc: {key: f"{osc.upper()}_{suffix}" for key, suffix in OSC_PARAM_KEYS.items()}
+    for osc in ("osc1", "osc2", "osc3")
+}
+
+ADSR_KEYS = {
+    "attack": "AMP_ATTACK",
+    "decay": "AMP_DECAY",
+    "sustain": "AMP_SUSTAIN",
+    "release": "AMP_RELEASE",
+}
+
+# Portamento and bend range (PITCH_BEND itself is played, not saved)
+PITCH_KEYS = {
+    "glide_time": "GLIDE_TIME",
+    "glide_mode": "GLIDE_MODE",
+    "bend_range": "BEND_RANGE",
+}
+
+# Engine values at startup, restored by presets saved before the "pitch" section existed
+PITCH_DEFAULTS = {
+    "glide_time": 0.0,
+    "glide_mode": int(ssynth_cpp.Glide.OFF),
+    "bend_range": 2.0,
+}
+
+PARAM_COUNT = len(ssynth_cpp.Params.__members__)
+TYPE_PARAMS = ("OSC1_TYPE", "OSC2_TYPE", "OSC3_TYPE")
+TYPE_PARAM_IDS = frozenset(int(ssynth_cpp.Params.__members__[name]) for name in TYPE_PARAMS)
+
+# Same order as main.py loads tables (and GUI waveform selector shows them)
+WAVEFORMS = ["Sine", "Saw", "Square", "Triangle"]
+
+def load_preset(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+def preset_to_params(state, wavetable_ids):
+    """
+    Converts preset state into a list of (ParamID, value)
+    wavetable_ids: table ids in the same order as GUI waveform selector
+    """
+    P = ssynth_cpp.Params.__members__
+    params = []
+    for osc, keys in OSC_KEYS.items():
+        osc_state = state.get(osc)
+        if not osc_state: continue
+
+        for key, name in keys.items():
+            if key not in osc_state: continue
+            if key == "wave_index":
+                idx = int(osc_state[key])
+                if 0 <= idx < len(wavetable_ids):
+                    params.append((P[name], float(wavetable_ids[idx])))
+            else:
+                params.append((P[name], float(osc_state[key])))
+
+    adsr = state.get("adsr") or {}
+    for key, name in ADSR_KEYS.items():
+        if key in adsr:
+            params.append((ssynth_cpp.Params.__members__[name], float(adsr[key])))
+
+    pitch = state.get("pitch") or {}
+    for key, name in PITCH_KEYS.items():
+        if key in pitch:
+            params.append((ssynth_cpp.Params.__members__[name], float(pitch[key])))
+
+    return params
+
+def param_id(name_or_id):
+    # "OSC1_MIX", "osc1_mix" or plain int
+    if isinstance(name_or_id, str):
+        member = ssynth_cpp.Params.__members__.get(name_or_id.upper())
+        if member is None:
+            raise KeyError(f"Unknown parameter: {name_or_id}")
+        return member
+    return ssynth_cpp.Params(int(name_or_id))
+
+# Packed form: float32 array indexed by ParamID, NaN = not set.
+# OSCn_TYPE slots keep the waveform index (not engine table id), so arrays don't depend on load order
+
+def preset_to_array(state):
+    arr = np.full(PARAM_COUNT, np.nan, dtype=np.float32)
+    for p, v in preset_to_params(state, list(range(len(WAVEFORMS)))):
+        arr[int(p)] = v
+    return arr
+
+def pad_array(arr):
+    # Arrays saved before new params were appended: missing tail stays NaN (= not set)
+    arr = np.asarray(arr, dtype=np.float32)
+    if len(arr) >= PARAM_COUNT:
+        return arr[:PARAM_COUNT]
+    out = np.full(PARAM_COUNT, np.nan, dtype=np.float32)
+    out[:len(arr)] = arr
+    return out
+
+def array_to_preset(arr):
+    P = ssynth_cpp.Params.__members__
+    state = {}
+    for osc, keys in OSC_KEYS.items():
+        osc_state = {}
+        for key, name in keys.items():
+            v = arr[int(P[name])]
+            if not np.isnan(v):
+                osc_state[key] = int(v) if key in INT_KEYS else round(float(v), 6)
+        if osc_state: state[osc] = osc_state
+
+    adsr = {}
+    for key, name in ADSR_KEYS.items():
+        v = arr[int(P[name])]
+        if not np.isnan(v): adsr[key] = round(float(v), 6)
+    if adsr: state["adsr"] = adsr
+
+    pitch = {}
+    for key, name in PITCH_KEYS.items():
+        v = arr[int(P[name])]
+        if not np.isnan(v): pitch[key] = int(v) if key == "glide_mode" else round(float(v), 6)
+    if pitch: state["pitch"] = pitch
+    return state
+
+def array_to_engine(arr, wavetable_ids):
+    # Waveform indices -> table ids, ready for Engine.set_params
+    out = np.array(arr, dtype=np.float32, copy=True)
+    for name in TYPE_PARAMS:
+        i = int(ssynth_cpp.Params.__members__[name])
+        if np.isnan(out[i]): continue
+        idx = int(out[i])
+        out[i] = float(wavetable_ids[idx]) if 0 <= idx < len(wavetable_ids) else np.nan
+    return out
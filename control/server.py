@@ -0,0 +1,176 @@
+import asyncio
+import collections
+import os
+import socket
+import time
+
+from control.osc import decode_packet, encode_message
+from control.presets import load_preset, preset_to_params, param_id, TYPE_PARAM_IDS
+from control.automation import Recording
+from frontend.utils.logger import Log
+
+RECV_BUFFER_SIZE = 4 * 1024 * 1024
+RECORD_CAPACITY = 1 << 20       # events (16 MB)
+
+# Decoded command kinds
+NOTE_ON = 0
+NOTE_OFF = 1
+PARAM = 2
+
+class CommandQueue:
+    """
+    Commands decoded by the network thread, applied by the render thread at block start.
+    deque append/popleft are atomic, so neither side takes a lock
+    """
+    def __init__(self):
+        self._queue = collections.deque()
+        self.applied = 0
+        self.max_latency = 0.0      # seconds between receive and apply
+
+    def push(self, batch):
+        if batch:
+            self._queue.append((time.perf_counter(), batch))
+
+    def apply(self, engine):
+        if not self._queue:
+            return
+
+        now = time.perf_counter()
+        while self._queue:
+            received, batch = self._queue.popleft()
+            for kind, a, b in batch:
+                if kind == NOTE_ON: engine.note_on(a, b)
+                elif kind == NOTE_OFF: engine.note_off(a)
+                else: engine.set_param(a, b)
+            self.applied += len(batch)
+            self.max_latency = max(self.max_latency, now - received)
+
+class ControlServer(asyncio.DatagramProtocol):
+    """
+    OSC over UDP:
+        /note_on  i:note [f:velocity]
+        /note_off i:note
+        /param    s|i:param f:value
+        /preset   s:path (JSON preset, relative to presets_dir)
+        /ping     [...]          -> /pong [...]
+        /stats                   -> /stats i:applied f:max_latency_ms i:errors
+        /meters                  -> /meters f:peak_l f:peak_r f:rms_l f:rms_r f:true_peak_max
+                                            f:momentary f:short_term f:integrated i:limiter_hits
+        /meters_reset
+        /record_start [i:capacity]
+        /record_stop  s:path     (saves the recording under recordings_dir, see control.automation)
+    Bundles are applied as one batch. Paths from the network never leave their directory,
+    a command whose directory is None is refused
+    """
+    def __init__(self, queue, wavetable_ids, engine=None, sample_rate=44100,
+                 presets_dir=None, recordings_dir=None):
+        self.queue = queue
+        self.sample_rate = sample_rate
+        self.wavetable_ids = wavetable_ids
+        self.engine = engine        # Meters (lock-free on the engine side) and table preparation
+        if engine is not None:
+            engine.enable_meters(True)
+        self.presets_dir = presets_dir
+        self.recordings_dir = recordings_dir
+        self.transport = None
+        self.errors = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        try:
+            messages = decode_packet(data)
+        except (ValueError, IndexError) as e:
+            self.errors += 1
+            Log.warn(f"Bad OSC packet from {addr}: {e}")
+            return
+
+        batch = []
+        for address, args in messages:
+            try:
+                self.handle(address, args, addr, batch)
+            except (KeyError, ValueError, TypeError, IndexError, OSError) as e:
+                self.errors += 1
+                Log.warn(f"Bad command {address} {args}: {e}")
+
+        self.queue.push(batch)
+
+    @staticmethod
+    def resolve(directory, name):
+        # Path of name inside directory, ValueError for anything that escapes it
+        if directory is None:
+            raise ValueError("No directory configured for this command")
+        root = os.path.realpath(directory)
+        path = os.path.realpath(os.path.join(root, str(name)))
+        if os.path.commonpath([root, path]) != root:
+            raise ValueError(f"Path outside {directory}: {name}")
+        return path
+
+    def prepare_tables(self, params):
+        # Network thread: evicted tables are rebuilt here, the render thread only switches ids
+        if self.engine is None:
+            return
+        ids = [int(v) for p, v in params if int(p) in TYPE_PARAM_IDS]
+        if ids:
+            self.engine.prepare_tables(ids)
+
+    def handle(self, address, args, addr, batch):
+        if address == "/note_on":
+            velocity = float(args[1]) if len(args) > 1 else 1.0
+            batch.append((NOTE_ON, int(args[0]), velocity))
+        elif address == "/note_off":
+            batch.append((NOTE_OFF, int(args[0]), 0.0))
+        elif address == "/param":
+            p, v = param_id(args[0]), float(args[1])
+            self.prepare_tables([(p, v)])
+            batch.append((PARAM, p, v))
+        elif address == "/preset":
+            # JSON parsing happens here, render thread only gets ready values
+            state = load_preset(self.resolve(self.presets_dir, args[0]))
+            params = preset_to_params(state, self.wavetable_ids)
+            self.prepare_tables(params)
+            batch.extend((PARAM, p, v) for p, v in params)
+        elif address == "/ping":
+            self.transport.sendto(encode_message("/pong", *args), addr)
+        elif address == "/stats":
+            self.transport.sendto(encode_message("/stats", self.queue.applied,
+                                                 self.queue.max_latency * 1000.0, self.errors), addr)
+        elif address == "/meters" and self.engine is not None:
+            m = self.engine.get_meters()
+            self.transport.sendto(encode_message("/meters", *m["peak"], *m["rms"], m["true_peak_max"],
+                                                 m["momentary"], m["short_term"], m["integrated"],
+                                                 min(m["limiter_hits"], 2**31 - 1)), addr)
+        elif address == "/meters_reset" and self.engine is not None:
+            self.engine.reset_meters()
+        elif address == "/record_start" and self.engine is not None:
+            self.engine.start_recording(int(args[0]) if args else RECORD_CAPACITY)
+        elif address == "/record_stop" and self.engine is not None:
+            path = self.resolve(self.recordings_dir, args[0])
+            self.engine.stop_recording()
+            recording = Recording.from_engine(self.engine, self.sample_rate)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            recording.save(path)
+            Log.ok(f"Saved {len(recording)} automation events to {path}")
+        else:
+            raise KeyError(f"Unknown address {address}")
+
+async def serve(queue, wavetable_ids, host="127.0.0.1", port=9000, stop_event=None, engine=None, sample_rate=44100,
+                presets_dir=None, recordings_dir=None):
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.create_datagram_endpoint(
+        lambda: ControlServer(queue, wavetable_ids, engine, sample_rate, presets_dir, recordings_dir),
+        local_addr=(host, port))
+
+    # Bursts of thousands of messages must not overflow the default socket buffer
+    sock = transport.get_extra_info("socket")
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECV_BUFFER_SIZE)
+    Log.ok(f"OSC control listening on udp://{host}:{port}")
+
+    try:
+        if stop_event is None:
+            stop_event = asyncio.Event()
+        await stop_event.wait()
+    finally:
+        transport.close()
+    return protocol
@@ -0,0 +1,122 @@
+import struct
+from multiprocessing import shared_memory, resource_tracker
+import numpy as np
+
+# Reader of the engine's shared memory tap (Engine.open_tap). The engine publishes the master output
+# (interleaved stereo) and the visualization signal (mono, what the scope and analyzer see) into two
+# rings with monotonic write cursors. Any number of local processes can attach, the engine never
+# waits for them: a reader that falls more than a ring behind skips ahead and counts the lost frames.
+# A write lands up to max_block frames past the cursor before the cursor moves, so only the newest
+# capacity - max_block published frames are treated as readable
+
+DEFAULT_NAME = "ssynth_tap"
+
+# Same layout as ShmTapHeader in engine/include/shm_tap.h
+MAGIC = b"SSYNTAP\0"
+VERSION = 2
+HEADER = struct.Struct("<8sIIIIQQI")    # magic, version, sample_rate, capacity, out_channels, out_offset, vis_offset, max_block
+OUT_WRITE_OFFSET = 64
+VIS_WRITE_OFFSET = 128
+
+def attach(name):
+    # The segment belongs to the engine, the reader must not unlink it when it exits
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+class TapStream:
+    """One ring of the tap. `ring` is a zero-copy view of the whole shared buffer"""
+    def __init__(self, buf, ring_offset, cursor_offset, capacity, channels, max_block):
+        shape = (capacity, channels) if channels > 1 else (capacity,)
+        self.ring = np.ndarray(shape, dtype="<f4", buffer=buf, offset=ring_offset)
+        self._cursor = np.ndarray((), dtype="<u8", buffer=buf, offset=cursor_offset)
+        self.capacity = capacity
+        self.window = capacity - max_block    # Published frames the next write can't reach
+        self.position = self.written      # Next frame to read, starts at "now"
+        self.lost = 0                     # Frames overwritten before they were read
+
+    @property
+    def written(self):
+        return int(self._cursor)
+
+    def available(self):
+        return min(self.written - self.position, self.window)
+
+    def read(self, max_frames=None, copy=True):
+        """
+        New frames since the last read, oldest first.
+        copy=False returns a view into the ring when the range doesn't wrap; it stays valid
+        until the engine laps the ring (window frames later)
+        """
+        written = self.written
+        if written - self.position > self.window:
+            self.lost += written - self.window - self.position
+            self.position = written - self.window
+
+        start = self.position
+        count = written - start
+        if max_frames is not None:
+            count = min(count, max_frames)
+
+        first = start % self.capacity
+        if not copy and first + count <= self.capacity:
+            self.position += count
+            return self.ring[first:first + count]
+
+        end = first + count
+        if end <= self.capacity:
+            data = self.ring[first:end].copy()
+        else:
+            data = np.concatenate((self.ring[first:], self.ring[:end - self.capacity]))
+
+        # Engine may have lapped the start while we copied: drop the torn head
+        overwritten = self.written - self.window - start
+        if overwritten > 0:
+            overwritten = min(overwritten, count)
+            self.lost += overwritten
+            data = data[overwritten:]
+        self.position = start + count
+        return data
+
+    def latest(self, num_frames):
+        """Newest num_frames (copy), independent of the read position. Fewer if the engine
+        lapped the oldest of them while they were copied"""
+        num_frames = min(num_frames, self.window)
+        end = self.written
+        idx = np.arange(end - num_frames, end) % self.capacity
+        data = self.ring[idx]
+        overwritten = self.written - self.window - (end - num_frames)
+        if overwritten > 0:
+            data = data[min(overwritten, num_frames):]
+        return data
+
+class TapReader:
+    def __init__(self, name=DEFAULT_NAME):
+        self.shm = attach(name)
+        buf = self.shm.buf
+
+        magic, version, sample_rate, capacity, channels, out_offset, vis_offset, max_block = HEADER.unpack_from(buf)
+        if magic != MAGIC or version != VERSION or max_block >= capacity:
+            self.shm.close()
+            raise ValueError(f"'{name}' is not a version {VERSION} ssynth tap")
+
+        self.name = name
+        self.sample_rate = sample_rate
+        self.capacity = capacity
+        self.max_block = max_block
+        self.output = TapStream(buf, out_offset, OUT_WRITE_OFFSET, capacity, channels, max_block)
+        self.visual = TapStream(buf, vis_offset, VIS_WRITE_OFFSET, capacity, 1, max_block)
+
+    def close(self):
+        # Views into the segment must be gone before it can be unmapped
+        self.output = self.visual = None
+        self.shm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
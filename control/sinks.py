@@ -0,0 +1,135 @@
+import threading
+import time
+import wave
+import numpy as np
+
+from frontend.utils.logger import Log
+
+# Audio outputs for the headless host.
+# Every sink applies queued control commands at the start of each block, on its render thread.
+# The engine writes float32, int16 (dithered) or int32 blocks directly, no conversion copy here
+
+class RenderSink:
+    def __init__(self, engine, queue, sample_rate=44100, block_size=512):
+        self.engine = engine
+        self.queue = queue
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.frames_rendered = 0
+
+    def render_block(self, out):
+        self.queue.apply(self.engine)
+        self.engine.process(out)
+        self.frames_rendered += out.shape[0]
+
+    def start(self): raise NotImplementedError
+    def stop(self): raise NotImplementedError
+
+class ThreadedSink(RenderSink):
+    """
+    Renders blocks in its own thread.
+    realtime=True paces blocks to wall clock, otherwise renders as fast as possible
+    """
+    dtype = np.float32
+
+    def __init__(self, engine, queue, sample_rate=44100, block_size=512, realtime=True, duration=None):
+        super().__init__(engine, queue, sample_rate, block_size)
+        self.realtime = realtime
+        self.max_frames = int(duration * sample_rate) if duration else None
+        self.finished = threading.Event()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def write(self, block):
+        pass
+
+    def close(self):
+        pass
+
+    def _loop(self):
+        block = np.zeros((self.block_size, 2), dtype=self.dtype)
+        block_time = self.block_size / self.sample_rate
+        deadline = time.perf_counter()
+
+        try:
+            while self._running:
+                if self.max_frames is not None and self.frames_rendered >= self.max_frames:
+                    break
+
+                self.render_block(block)
+                self.write(block)
+
+                if self.realtime:
+                    deadline += block_time
+                    delay = deadline - time.perf_counter()
+                    if delay > 0: time.sleep(delay)
+                    else: deadline = time.perf_counter()    # fell behind, don't try to catch up
+        finally:
+            self.close()
+            self.finished.set()
+
+class NullSink(ThreadedSink):
+    # Discards audio (tests, control-only benchmarks)
+    pass
+
+class FileSink(ThreadedSink):
+    # 16-bit stereo WAV
+    dtype = np.dtype("<i2")
+
+    def __init__(self, engine, queue, path, **kwargs):
+        super().__init__(engine, queue, **kwargs)
+        self.file = wave.open(str(path), "wb")
+        self.file.setnchannels(2)
+        self.file.setsampwidth(2)
+        self.file.setframerate(self.sample_rate)
+
+    def write(self, block):
+        self.file.writeframes(block.tobytes())
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+class DeviceSink(RenderSink):
+    # Audio device through sounddevice, dtype "float32", "int16" or "int32" (the device's native one)
+    def __init__(self, engine, queue, sample_rate=44100, block_size=512, dtype="float32"):
+        super().__init__(engine, queue, sample_rate, block_size)
+        self.dtype = dtype
+        self.stream = None
+        self.finished = threading.Event()
+
+    def start(self):
+        import sounddevice as sd
+
+        def audio_callback(outdata, frames, time, status):
+            if status:
+                Log.warn(f"Audio status: {status}")
+            self.render_block(outdata)
+
+        self.stream = sd.OutputStream(
+            channels=2,
+            samplerate=self.sample_rate,
+            blocksize=self.block_size,
+            dtype=self.dtype,
+            callback=audio_callback
+        )
+        self.stream.start()
+
+    def stop(self):
+        if self.stream:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+        self.finished.set()
@@ -0,0 +1,99 @@
+#pragma once
+#include <vector>
+#include <string>
+#include <thread>
+#include <mutex>
+#include <atomic>
+#include <cstdint>
+#include <fftw3.h>
+
+#include "defs.h"
+#include "utils.h"
+
+// FFTW planner is not thread-safe, every plan creation and destruction goes through this lock
+std::mutex& fftw_planner_mutex();
+
+// Window functions for spectrum analysis
+enum WindowType {
+    WINDOW_HANN,
+    WINDOW_HAMMING,
+    WINDOW_BLACKMAN,
+    WINDOW_RECT,
+
+    WINDOW_COUNT
+};
+
+// Background worker: consumes the RingBuffer at a fixed hop (overlapped frames)
+// and queues normalized magnitude frames (0..1) for the GUI
+class SpectrumAnalyzer {
+public:
+    SpectrumAnalyzer(RingBuffer& ring, int sample_rate);
+    ~SpectrumAnalyzer();
+
+    // Worker thread control
+    void start();
+    void stop();
+    bool is_running() const { return running_.load(); }
+
+    // Runtime configuration
+    // fft_size must be a power of 2 in [MIN_FFT_SIZE, MAX_FFT_SIZE], overlap in [0, 0.95]
+    bool configure(int fft_size, int window, float overlap);
+
+    int get_fft_size();
+    int get_hop_size();
+    int get_num_bins();
+    int pending_frames();
+    uint64_t get_dropped_frames() const { return dropped_frames_.load(); }
+
+    // Copies up to max_frames queued frames (oldest first) into dest (frames x bins)
+    // Returns number of copied frames, 0 if num_bins doesn't match current config
+    int fetch_frames(float* dest, int max_frames, int num_bins);
+
+    // Newest frame only (for single-shot consumers).
+    // Computed on demand from the ring when the worker is stopped
+    std::vector<float> latest_frame();
+
+    // FFTW wisdom file: loaded once, updated every time a new plan gets measured
+    static void set_wisdom_file(const std::string& path);
+
+private:
+    RingBuffer& ring_;
+    int sample_rate_;
+
+    // Config
+    int fft_size_ = DEFAULT_FFT_SIZE;
+    int hop_size_ = DEFAULT_FFT_SIZE / 4;
+    int window_type_ = WINDOW_HANN;
+    float norm_factor_ = 1.0f;
+    std::vector<float> window_;
+    std::vector<float> magnitudes_;     // Worker scratch
+
+    // FFTW
+    float* fft_in_ = nullptr;
+    fftwf_complex* fft_out_ = nullptr;
+    fftwf_plan fft_plan_ = nullptr;
+    std::mutex config_mutex_;
+
+    // Read cursor in RingBuffer (absolute sample position)
+    uint64_t next_start_ = 0;
+
+    // Frames queue (preallocated ring of MAX_QUEUED_FRAMES x bins)
+    std::vector<float> frames_;
+    std::vector<float> latest_;
+    int num_bins_ = DEFAULT_FFT_SIZE / 2 + 1;
+    int queue_head_ = 0;
+    int queue_count_ = 0;
+    std::mutex queue_mutex_;
+    std::atomic<uint64_t> dropped_frames_{0};
+
+    std::thread worker_;
+    std::atomic<bool> running_{false};
+
+    // Helpers
+    void build_window();
+    void rebuild_plan();
+    void analyze_frame();
+    bool transform(uint64_t start, float* dest);
+    void push_frame(const float* frame);
+    void worker_loop();
+};
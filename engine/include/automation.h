@@ -0,0 +1,98 @@
+#pragma once
+#include <memory>
+#include <atomic>
+#include <thread>
+#include <cstdint>
+
+#include "defs.h"
+
+// Performance capture: every note/param change with the sample position it takes effect at.
+// 16 bytes per event, same layout as the numpy dtype used on the Python side
+enum AutomationEventType : uint8_t {
+    EVENT_NOTE_ON,
+    EVENT_NOTE_OFF,
+    EVENT_PARAM
+};
+
+struct AutomationEvent {
+    uint64_t sample;    // Relative to recording start
+    uint8_t type;
+    uint8_t reserved;
+    int16_t id;         // Note number or ParamID
+    float value;        // Velocity or parameter value
+};
+static_assert(sizeof(AutomationEvent) == 16, "AutomationEvent must stay 16 bytes (file format)");
+
+class AutomationRecorder {
+public:
+    // Control thread. Allocates the whole buffer up front, once no writer is left inside record()
+    void start(size_t capacity, uint64_t start_sample, const float* params) {
+        recording_.store(false);
+        while (in_flight_.load() > 0) std::this_thread::yield();
+
+        if (capacity != capacity_) {
+            events_.reset(capacity ? new AutomationEvent[capacity] : nullptr);
+            written_.reset(capacity ? new std::atomic<uint8_t>[capacity] : nullptr);
+            capacity_ = capacity;
+        }
+        for (size_t i = 0; i < capacity_; ++i) written_[i].store(0, std::memory_order_relaxed);
+        claimed_.store(0, std::memory_order_relaxed);
+        committed_.store(0, std::memory_order_relaxed);
+        dropped_.store(0, std::memory_order_relaxed);
+        start_sample_ = start_sample;
+        for (int i = 0; i < PARAM_COUNT; ++i) snapshot_[i] = params[i];
+        recording_.store(true);
+    }
+
+    void stop() { recording_.store(false); }
+    bool is_recording() const { return recording_.load(); }
+
+    // Any thread (including audio), no allocation or locks. in_flight_ / recording_ are sequentially
+    // consistent like Tracer's: start() clears the flag, then waits for every writer that saw it set
+    void record(uint8_t type, int id, float value, uint64_t sample) {
+        in_flight_.fetch_add(1);
+        if (recording_.load()) {
+            size_t idx = claimed_.fetch_add(1, std::memory_order_relaxed);
+            if (idx < capacity_) {
+                AutomationEvent& e = events_[idx];
+                e.sample = sample - start_sample_;
+                e.type = type;
+                e.reserved = 0;
+                e.id = (int16_t)id;
+                e.value = value;
+                written_[idx].store(1);
+                commit();
+            } else {
+                dropped_.fetch_add(1, std::memory_order_relaxed);
+            }
+        }
+        in_flight_.fetch_sub(1);
+    }
+
+    // Events that are fully written (a claimed slot still being filled ends the range)
+    size_t size() const { return committed_.load(std::memory_order_acquire); }
+    uint64_t dropped() const { return dropped_.load(std::memory_order_relaxed); }
+    const AutomationEvent* data() const { return events_.get(); }
+    const float* snapshot() const { return snapshot_; }
+
+private:
+    std::unique_ptr<AutomationEvent[]> events_;
+    std::unique_ptr<std::atomic<uint8_t>[]> written_;     // Per slot, set once the event is complete
+    size_t capacity_ = 0;
+    std::atomic<size_t> claimed_{0};
+    std::atomic<size_t> committed_{0};          // Every slot below is written
+    std::atomic<uint64_t> dropped_{0};
+    std::atomic<bool> recording_{false};
+    std::atomic<int> in_flight_{0};             // Writers past the recording check
+    uint64_t start_sample_ = 0;
+    float snapshot_[PARAM_COUNT] = {};     // Parameters when recording started
+
+    // Moves committed_ over the written prefix. Writers finishing out of order don't wait for each
+    // other: whichever finishes last carries the count past both slots
+    void commit() {
+        size_t c = committed_.load();
+        while (c < capacity_ && written_[c].load()) {
+            if (committed_.compare_exchange_weak(c, c + 1)) ++c;
+        }
+    }
+};
@@ -2,8 +2,63 @@
 
 // Global parameters
 static const int MAX_VOICES = 16;
+static const int MAX_UNISON = 16;
+
+// Any block size is rendered as sub-blocks of at most this many frames
+static const int MAX_BLOCK_FRAMES = 1024;
+
+// Time constant of continuous parameter smoothing (mix, pitch, unison, master volume)
+static const float DEFAULT_SMOOTHING_MS = 10.0f;
+
+// Wavetable MIP levels are stored with wrapped guard samples around the cycle,
+// enough for 4-point interpolation (i-1 .. i+2) without masking
+static const int TABLE_GUARD_FRONT = 1;
+static const int TABLE_GUARD_BACK = 3;
+
+// Multi-frame tables keep one blended copy of their levels per morph slot (oscillator)
+static const int MORPH_SLOTS = 3;
+
+// Table cache: ids are stable up to MAX_TABLES, least recently used tables beyond the memory
+// budget are evicted and rebuilt when selected again. Single cycles are resampled to this size
+static const int MAX_TABLES = 4096;
+static const int DEFAULT_TABLE_BUDGET_MB = 256;
+static const int SINGLE_CYCLE_SIZE = 2048;
+static const int SINGLE_CYCLE_MIPS = 12;     // Same chain as tools/wavemanager.py
+
+// Oscillator interpolation (OSCn_INTERP)
+enum InterpMode {
+    INTERP_LINEAR,      // 2-point, cheapest
+    INTERP_CUBIC,       // 4-point Hermite
+    INTERP_OPTIMAL,     // 4-point optimal polynomial, lowest noise floor
+    INTERP_COUNT
+};
+
+// Portamento (GLIDE_MODE): legato glides only into notes played while another one is held,
+// always glides from the last note played
+enum GlideMode {
+    GLIDE_OFF,
+    GLIDE_LEGATO,
+    GLIDE_ALWAYS,
+    GLIDE_MODE_COUNT
+};
+static const float DEFAULT_BEND_RANGE = 2.0f;       // Semitones at full PITCH_BEND
+static const float MAX_BEND_RANGE = 48.0f;
+
+// Releasing voice whose block peak is below this (-100 dB) is retired
+static const float SILENCE_THRESHOLD = 1e-5f;
 static const int VISUALIZATION_BUFFER_SIZE = 44100;
-static const int FFT_SIZE = 2048;
+
+// Spectrum analyzer (FFT size is configurable at runtime)
+static const int DEFAULT_FFT_SIZE = 2048;
+static const int MIN_FFT_SIZE = 256;
+static const int MAX_FFT_SIZE = 16384;
+static const int MAX_QUEUED_FRAMES = 256;
+
+// Oscilloscope
+static const int MAX_SCOPE_POINTS = 4096;
+
+// Meters report this instead of -inf dB
+static const float METER_FLOOR_DB = -120.0f;
 
 // ID for all of the knobs which are available in python 
 enum ParamID {
@@ -45,6 +100,33 @@ enum ParamID {
     FILT_DECAY,
     FILT_SUSTAIN,
     FILT_RELEASE,
+
+    // Unison (appended so older ids and saved presets keep their meaning)
+    OSC1_UNISON,        // Number of unison voices (1..MAX_UNISON)
+    OSC1_UNI_DETUNE,    // Spread of detune in cents (0..100)
+    OSC1_UNI_SPREAD,    // Stereo spread (0..1)
+    OSC2_UNISON,
+    OSC2_UNI_DETUNE,
+    OSC2_UNI_SPREAD,
+    OSC3_UNISON,
+    OSC3_UNI_DETUNE,
+    OSC3_UNI_SPREAD,
+
+    // Interpolation of each oscillator (InterpMode)
+    OSC1_INTERP,
+    OSC2_INTERP,
+    OSC3_INTERP,
+
+    // Wavetable position of each oscillator (0..1), morphs through multi-frame tables
+    OSC1_POS,
+    OSC2_POS,
+    OSC3_POS,
+
+    // Pitch
+    GLIDE_TIME,     // Portamento time constant, seconds (0 = off)
+    GLIDE_MODE,     // GlideMode
+    PITCH_BEND,     // -1..1
+    BEND_RANGE,     // Semitones at full bend (0..MAX_BEND_RANGE)
     
     // Service value
     PARAM_COUNT
@@ -3,43 +3,103 @@
 #include <memory>
 #include <string> 
 #include <mutex>
-#include <fftw3.h>
+#include <atomic>
 
 #include "defs.h"
-#include "voice.h"
+#include "voice_bank.h"
 #include "utils.h"
 #include "wavetable.h"
+#include "analyzer.h"
+#include "meter.h"
+#include "automation.h"
+#include "smoother.h"
+#include "trace.h"
+#include "shm_tap.h"
+#include "resampler.h"
+#include "output.h"
 
 class SynthEngine {
 private: 
     int sample_rate;
     WavetableManager wt_manager;
-    std::vector<std::unique_ptr<Voice>> voices;
+    ScratchArena arena;                     // All render scratch, allocated once
+    VoiceBank voices;                       // Must be declared after wt_manager and arena
 
     float params[PARAM_COUNT];
+    SmoothedParam master_vol;               // params[MASTER_VOL] is its target
     RingBuffer ring_buffer;
+    SpectrumAnalyzer analyzer;              // Must be declared after ring_buffer
+    LoudnessMeter meter;
+    std::atomic<bool> metering{false};      // Meters cost ~10 us per block, off until a host reads them
 
-    float* fft_in;
-    fftwf_complex* fft_out;
-    fftwf_plan fft_plan;
-    std::vector<float> spectrum_cache;      // Return to python
-    std::mutex fft_mutex;
+    // Sub-block output (MAX_BLOCK_FRAMES each, from the arena)
+    float* buf_l;
+    float* buf_r;
 
-    // Helpers
-    void initFFT();
-    void initVoices();
+    std::vector<float> scope_scratch;       // GUI thread only
 
-    std::vector<float> buf_l;
-    std::vector<float> buf_r;
+    std::unique_ptr<Resampler> resampler;   // Only when the output rate differs
+
+    // Shared memory tap, swapped by the control thread. tap_users counts audio thread accesses,
+    // so close_tap() can wait before unmapping
+    std::unique_ptr<ShmTap> tap_owner;
+    std::atomic<ShmTap*> tap{nullptr};
+    std::atomic<int> tap_users{0};
+    std::mutex tap_mutex;
+
+    bool last_block_silent = false;         // Set by render_block() when no voice was active
+    uint32_t dither_pos = 0;                // Output frames written, numbers the dither noise
+
+    // Samples rendered so far, timestamps for automation recording
+    std::atomic<uint64_t> sample_clock{0};
+    AutomationRecorder recorder;
+
+    // Bulk parameter swap: control thread stages, audio thread applies at block start
+    enum SwapState { SWAP_IDLE, SWAP_FADE_OUT, SWAP_FADE_IN };
+
+    float staged_params[PARAM_COUNT];
+    bool staged_mask[PARAM_COUNT];
+    int staged_fade_samples = 0;
+    std::atomic<bool> params_pending{false};
+    std::mutex staging_mutex;               // Audio thread only uses try_lock
+
+    SwapState swap_state = SWAP_IDLE;
+    int swap_fade_len = 0;
+    int swap_fade_pos = 0;
+
+    // One sub-block (num_frames <= MAX_BLOCK_FRAMES) into left / right, and into frames offset ..
+    // of out (if it has data) within the same master pass
+    void render_block(float* left, float* right, int num_frames, const AudioOutput& out, size_t offset);
+
+    // Any number of frames through the sub-block buffers into out, from frame offset on
+    void render_frames(const AudioOutput& out, size_t offset, int num_frames, bool visualize);
+
+    void publish_tap(bool silent, int num_frames);
+    void trim_tables(const int* extra_keep, int count);
+    void apply_param(int param_id, float value, bool smooth);
+    bool apply_staged_params();
+    void begin_block_swap();
+    void apply_swap_gain(float* left, float* right, int num_frames);
 
 public:
-    SynthEngine(int sample_rate);
+    // Renders at sample_rate; output_rate > 0 (and different) resamples render_interleaved output
+    SynthEngine(int sample_rate, int output_rate = 0);
     ~SynthEngine();
 
     // Control API 
 
     // Loading of resources
     int load_wavetable(const std::string& name, const std::string& path);
+    int load_single_cycle(const std::string& name, const float* samples, int length);
+    int load_single_cycle_file(const std::string& name, const std::string& wav_path);
+
+    // Table cache: least recently used tables beyond the budget are evicted (selected ones never)
+    // and rebuilt by prepare_tables, which a control thread calls before an OSCn_TYPE change is
+    // applied. set_param never loads (it may run on the audio thread): an id that isn't resident
+    // renders silence. set_params and render_automation prepare their tables themselves
+    void prepare_tables(const int* table_ids, int count);
+    void set_table_budget(size_t bytes);
+    const WavetableManager& get_tables() const { return wt_manager; }
 
     // Notes control (MIDI in future?)
     void note_on(int note_number, float velocity);
@@ -48,9 +108,58 @@ public:
     // Parameters
     void set_param(int param_id, float value);
     float get_param(int param_id);
+    void set_interpolation(int mode);       // OSCn_INTERP of all oscillators
+
+    // Continuous params (master volume, osc mix / pitch / detune / unison detune / spread) glide
+    // to new values with this time constant, 0 steps. False if param_id has no smoothing
+    bool set_smoothing(int param_id, float ms);
+
+    // Validates and publishes a whole parameter set atomically at the next block boundary.
+    // mask[i] == false keeps current value. crossfade_ms > 0 dips the output around the swap
+    bool set_params(const float* values, const bool* mask, float crossfade_ms = 0.0f);
 
-    // Heart 
+    // Heart. Any block size, split internally into sub-blocks of MAX_BLOCK_FRAMES
     void render(float* left, float* right, int num_frames);
     void render_interleaved(float* interleaved, int num_frames);    // for python
+    void render_output(const AudioOutput& out, int num_frames);     // Device format and layout
+    int active_voice_count() const;
+    int get_sample_rate() const { return sample_rate; }
+    int get_output_rate() const { return resampler ? resampler->out_rate() : sample_rate; }
+    int output_latency() const { return resampler ? resampler->latency() : 0; }     // Engine rate frames
+
+    // Visualisation (spectrum analyzer runs in its own thread)
+    bool configure_analyzer(int fft_size, int window, float overlap);
+    void start_analyzer();
+    void stop_analyzer();
+    SpectrumAnalyzer& get_analyzer() { return analyzer; }
     std::vector<float> get_spectrum_data();
+    int get_scope_data(float* dest, int num_points);
+
+    // Automation: records note/param events with sample timestamps (allocation-free after start)
+    void start_recording(size_t capacity);
+    void stop_recording() { recorder.stop(); }
+    const AutomationRecorder& get_recorder() const { return recorder; }
+
+    // Deterministic offline replay: resets voices, applies snapshot params, then renders
+    // num_frames into out (any format, int16 gets the same dither as a realtime render), splitting
+    // blocks at event positions. Events must be sorted
+    void render_automation(const float* snapshot, const AutomationEvent* events, size_t num_events,
+                           const AudioOutput& out, int num_frames, int block_size);
+
+    // Stage profiling of all TRACE_SCOPE sites (trace.h), exported as Chrome trace-event JSON
+    void start_trace(size_t capacity_per_thread) { tracer().start(capacity_per_thread); }
+    void stop_trace() { tracer().stop(); }
+    bool dump_trace(const std::string& path) { return tracer().dump(path); }
+
+    // Publishes master output and the visualization signal to a shared memory ring that local
+    // processes read (control/shm_tap.py). Replaces an open tap. False if it can't be created
+    bool open_tap(const std::string& name, int capacity);
+    void close_tap();
+
+    // Metering (computed in render while enabled, lock-free readout from any thread).
+    // Enabling restarts all meters, so readings never mix in audio from before the pause
+    void enable_meters(bool on);
+    bool meters_enabled() const { return metering.load(std::memory_order_relaxed); }
+    MeterValues get_meters() const { return meter.get(); }
+    void reset_meters() { meter.reset(); }
 };
\ No newline at end of file
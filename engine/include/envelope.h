@@ -1,19 +1,22 @@
 #pragma once
 #include <algorithm>
+#include "defs.h"
 
-class Envelope {
+// ADSR envelopes of all voices, structure-of-arrays: every voice plays the same patch,
+// so the rates are shared and only state / level / sustain counter are kept per voice
+class EnvelopeBank {
 public:
     enum State { IDLE, ATTACK, DECAY, SUSTAIN, RELEASE };
 
-    Envelope(int sample_rate) : sample_rate(sample_rate) {
-        reset();
+    EnvelopeBank(int sample_rate) : sample_rate(sample_rate) {
+        for (int v = 0; v < MAX_VOICES; ++v) reset(v);
     }
 
-    void reset() {
-        state = IDLE;
-        current_level = 0.0f;
-        release_start_level = 0.0f;
-        sustain_counter = 0;
+    void reset(int v) {
+        state[v] = IDLE;
+        current_level[v] = 0.0f;
+        release_start_level[v] = 0.0f;
+        sustain_counter[v] = 0;
     }
 
     // sustain_time < 0 means infinite sustain (while the key is pressed)
@@ -21,97 +24,117 @@ public:
         attack = std::max(0.001f, attack);
         decay = std::max(0.001f, decay);
         release = std::max(0.001f, release);
-        sustain = std::max(0.0f, std::min(1.0f, sustain));
+        this->sustain = std::max(0.0f, std::min(1.0f, sustain));
 
         // Preprocessing so we can sum instead of fractioning in every sample
         attack_rate = 1.0f / (attack * sample_rate);
-        decay_rate = (1.0f - sustain) / (decay * sample_rate);
+        decay_rate = (1.0f - this->sustain) / (decay * sample_rate);
         release_rate = 1.0f / (release * sample_rate);
-        
+
         use_auto_release = (sustain_time > 0.0f);
         if (use_auto_release) {
             sustain_max_samples = (int)(sustain_time * sample_rate);
         }
     }
 
-    // note_on
-    void gate(bool on) {
+    // note_on / note_off of voice v
+    void gate(int v, bool on) {
         if (on) {
-            state = ATTACK;
-            current_level = 0.0f; // Reset to 0 (hard restart) or keep current if retriggering
-            sustain_counter = 0;
+            state[v] = ATTACK;
+            current_level[v] = 0.0f; // Reset to 0 (hard restart) or keep current if retriggering
+            sustain_counter[v] = 0;
         } else {
-            // note_off
-            if (state != IDLE) {
-                state = RELEASE;
-                release_start_level = current_level; // Memorize the falling level
+            if (state[v] != IDLE) {
+                state[v] = RELEASE;
+                release_start_level[v] = current_level[v]; // Memorize the falling level
             }
         }
     }
 
     // True if curve still works (simultaneously with voice)
-    bool isActive() const {
-        return state != IDLE;
+    bool isActive(int v) const {
+        return state[v] != IDLE;
+    }
+
+    // Key still down: attack, decay or sustain
+    bool isHeld(int v) const {
+        return state[v] != IDLE && state[v] != RELEASE;
+    }
+
+    // Only fading out from here: release, or sustain at zero level
+    bool isReleasing(int v) const {
+        return state[v] == RELEASE || (state[v] == SUSTAIN && sustain <= 0.0f);
     }
 
-    // Main logic for every sample
-    float process() {
-        switch (state) {
-            case IDLE:
-                current_level = 0.0f;
-                break;
-
-            case ATTACK:
-                current_level += attack_rate;
-                if (current_level >= 1.0f) {
-                    current_level = 1.0f;
-                    state = DECAY;
-                }
-                break;
-
-            case DECAY:
-                current_level -= decay_rate;
-                if (current_level <= sustain) {
-                    current_level = sustain;
-                    state = SUSTAIN;
-                    sustain_counter = 0;
-                }
-                break;
-
-            case SUSTAIN:
-                current_level = sustain;
-                if (use_auto_release) {
-                    sustain_counter++;
-                    if (sustain_counter >= sustain_max_samples) {
-                        gate(false); // Trigger release
+    // Writes num_frames envelope values of voice v to out[i * stride]
+    void process(int v, float* out, int stride, int num_frames) {
+        State s = state[v];
+        float level = current_level[v];
+        int counter = sustain_counter[v];
+
+        for (int i = 0; i < num_frames; ++i) {
+            switch (s) {
+                case IDLE:
+                    level = 0.0f;
+                    break;
+
+                case ATTACK:
+                    level += attack_rate;
+                    if (level >= 1.0f) {
+                        level = 1.0f;
+                        s = DECAY;
+                    }
+                    break;
+
+                case DECAY:
+                    level -= decay_rate;
+                    if (level <= sustain) {
+                        level = sustain;
+                        s = SUSTAIN;
+                        counter = 0;
                     }
-                }
-                break;
-
-            case RELEASE:
-                // We don't just fall down, but rather proportionally to the starting release level
-                // But to make the decay go from the current point to 0 over the Release time
-                // We use a fixed release_rate, calculated from 1.0 to 0
-                current_level -= release_rate;
-                if (current_level <= 0.0f) {
-                    current_level = 0.0f;
-                    state = IDLE;
-                }
-                break;
+                    break;
+
+                case SUSTAIN:
+                    level = sustain;
+                    if (use_auto_release) {
+                        counter++;
+                        if (counter >= sustain_max_samples) {
+                            s = RELEASE; // Trigger release
+                            release_start_level[v] = level;
+                        }
+                    }
+                    break;
+
+                case RELEASE:
+                    // Fixed release_rate, calculated from 1.0 to 0
+                    level -= release_rate;
+                    if (level <= 0.0f) {
+                        level = 0.0f;
+                        s = IDLE;
+                    }
+                    break;
+            }
+            out[(size_t)i * stride] = level;
         }
-        return current_level;
+
+        state[v] = s;
+        current_level[v] = level;
+        sustain_counter[v] = counter;
     }
 
 private:
     int sample_rate;
-    State state = IDLE;
-    
-    float current_level = 0.0f;
-    float release_start_level = 0.0f;
+
+    // Per voice
+    State state[MAX_VOICES];
+    float current_level[MAX_VOICES];
+    float release_start_level[MAX_VOICES];
+    int sustain_counter[MAX_VOICES];
 
     // Parameters
     float sustain = 0.7f;
-    
+
     // Rates (increment for 1 sample)
     float attack_rate = 0.0f;
     float decay_rate = 0.0f;
@@ -119,6 +142,5 @@ private:
 
     // Sustain timer
     bool use_auto_release = false;
-    int sustain_counter = 0;
     int sustain_max_samples = 0;
-};
\ No newline at end of file
+};
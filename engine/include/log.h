@@ -0,0 +1,50 @@
+#pragma once
+#include <atomic>
+#include <cstddef>
+#include <cstdint>
+
+// Engine log: fixed-size lock-free queue, producers never block or allocate.
+// Python drains it from a background thread (ssynth_cpp.drain_log)
+
+enum LogLevel {
+    LOG_DEBUG,
+    LOG_INFO,
+    LOG_WARNING,
+    LOG_ERROR
+};
+
+static const int LOG_QUEUE_SIZE = 256;      // Must be a power of 2
+static const int LOG_MESSAGE_SIZE = 160;
+
+struct LogMessage {
+    int level;
+    char text[LOG_MESSAGE_SIZE];
+};
+
+// Bounded multi-producer / multi-consumer queue (sequence number per slot)
+class LogQueue {
+public:
+    LogQueue();
+
+    // False if the queue is full (message is dropped and counted)
+    bool push(int level, const char* text);
+    bool pop(LogMessage& out);
+
+    uint64_t dropped() const { return dropped_.load(std::memory_order_relaxed); }
+
+private:
+    struct Slot {
+        std::atomic<size_t> seq;
+        LogMessage msg;
+    };
+
+    Slot slots_[LOG_QUEUE_SIZE];
+    alignas(64) std::atomic<size_t> enqueue_pos_{0};
+    alignas(64) std::atomic<size_t> dequeue_pos_{0};
+    std::atomic<uint64_t> dropped_{0};
+};
+
+LogQueue& engine_log_queue();
+
+// printf-style, safe to call from the audio thread
+void engine_log(int level, const char* fmt, ...);
@@ -0,0 +1,81 @@
+#pragma once
+#include <vector>
+#include <atomic>
+#include <cstdint>
+
+#include "defs.h"
+
+// Snapshot of all meters, levels in dB (METER_FLOOR_DB when silent)
+struct MeterValues {
+    float peak_l, peak_r;           // Sample peak of the last block, dBFS
+    float rms_l, rms_r;             // RMS over the last 300 ms, dBFS
+    float true_peak;                // 4x oversampled peak of the last block, dBTP
+    float true_peak_max;            // Highest true peak since reset, dBTP
+    float momentary;                // LUFS, 400 ms
+    float short_term;               // LUFS, 3 s
+    float integrated;               // LUFS, gated (BS.1770), since reset
+    uint64_t limiter_hits;          // Samples clipped by the hard limiter since reset
+    uint64_t blocks;                // Number of metered blocks (changes every update)
+};
+
+// Level / loudness meters fed by the audio thread after the limiter.
+// Results are published through atomics, so any thread can poll them without locks
+class LoudnessMeter {
+public:
+    LoudnessMeter(int sample_rate);
+
+    // Audio thread
+    void process(const float* left, const float* right, int num_frames, int limiter_hits);
+    void process_silence(int num_frames);
+
+    // Any thread
+    MeterValues get() const;
+    void reset() { reset_requested_.store(true, std::memory_order_release); }
+
+private:
+    int sample_rate_;
+
+    // K-weighting: high shelf + RLB high-pass, per channel (Direct Form II transposed)
+    struct Biquad {
+        double b0, b1, b2, a1, a2;
+    };
+    Biquad shelf_, highpass_;
+    double state_[2][4] = {};       // [channel][shelf z1, z2, highpass z1, z2]
+
+    // True peak: 4-phase polyphase interpolator, history kept in front of the block
+    std::vector<float> tp_coeffs_;  // TP_PHASES x TP_TAPS
+    std::vector<float> tp_buf_[2];  // TP_TAPS - 1 history + chunk
+
+    // 100 ms sub-blocks: K-weighted (loudness) and plain (RMS) energy sums
+    int sub_block_len_;
+    int sub_block_pos_ = 0;
+    double sub_k_sum_ = 0.0;
+    double sub_sq_sum_[2] = {0.0, 0.0};
+    std::vector<double> k_history_;         // Mean square per sub-block, SHORT_TERM_BLOCKS ring
+    std::vector<double> sq_history_[2];
+    int history_pos_ = 0;
+    int history_count_ = 0;
+
+    // Integrated loudness: histogram of gating block loudness (0.1 LU bins over -70..+5 LUFS),
+    // so memory stays constant for endless sessions
+    std::vector<uint64_t> hist_count_;
+    std::vector<double> hist_energy_;
+
+    float true_peak_max_ = 0.0f;
+    uint64_t limiter_hits_ = 0;
+    uint64_t blocks_ = 0;
+
+    // Published values
+    std::atomic<float> peak_l_, peak_r_, rms_l_, rms_r_;
+    std::atomic<float> true_peak_, true_peak_max_db_;
+    std::atomic<float> momentary_, short_term_, integrated_;
+    std::atomic<uint64_t> limiter_hits_pub_{0};
+    std::atomic<uint64_t> blocks_pub_{0};
+    std::atomic<bool> reset_requested_{false};
+
+    void design_filters();
+    void clear();
+    float true_peak_chunk(int ch, const float* x, int n);
+    void close_sub_block();
+    float compute_integrated() const;
+};
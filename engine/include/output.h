@@ -0,0 +1,47 @@
+#pragma once
+#include <cstddef>
+#include <cstdint>
+
+// Device side of the render: float32, int16 or int32 samples, interleaved (frames x channels)
+// or planar (channels x frames, channel rows channel_stride samples apart), any channel count.
+// Channel 0 gets left and channel 1 right, a mono output their average, further channels silence
+enum SampleFormat {
+    SAMPLE_FLOAT32,
+    SAMPLE_INT16,       // TPDF dithered
+    SAMPLE_INT32,
+    SAMPLE_FORMAT_COUNT
+};
+
+struct AudioOutput {
+    void* data = nullptr;
+    int format = SAMPLE_FLOAT32;
+    int channels = 2;
+    bool planar = false;
+    size_t channel_stride = 0;      // Planar only, >= frames
+
+    static AudioOutput interleaved_stereo(float* data) {
+        AudioOutput out;
+        out.data = data;
+        return out;
+    }
+    static AudioOutput planar_stereo(float* left, float* right) {      // Two rows of one buffer
+        AudioOutput out;
+        out.data = left;
+        out.planar = true;
+        out.channel_stride = (size_t)(right - left);
+        return out;
+    }
+};
+
+bool valid_output(const AudioOutput& out);
+
+// One pass over a stereo block: gain ramp (gain + gain_inc * i), hard limit at +-1 when limit is
+// set, conversion (and dither) and store into frames offset .. offset + num_frames of out.
+// left / right are updated in place with the float result (meters, scope), an output without
+// data only gets that. dither_pos numbers the frames for the dither noise. Returns how many
+// samples were limited
+int write_output(const AudioOutput& out, size_t offset, float* left, float* right, int num_frames,
+                 float gain, float gain_inc, bool limit, uint32_t dither_pos);
+
+// Digital silence in frames offset .. offset + num_frames
+void clear_output(const AudioOutput& out, size_t offset, int num_frames);
@@ -0,0 +1,55 @@
+#pragma once
+#include <atomic>
+#include <memory>
+#include <mutex>
+#include <vector>
+
+#include "engine.h"
+
+// Multi-timbral host: owns several SynthEngine instances (each with its own tables and params),
+// routes notes to them by channel and key range, renders them in parallel (OpenMP) and mixes
+// the results into one output. Layers and splits from one audio callback
+class Rack {
+public:
+    static constexpr int OMNI = -1;         // Route channel that accepts every channel
+
+    Rack(int sample_rate, int num_threads = 0);     // 0 = one per hardware thread
+
+    // Control thread. Engine references stay valid for the rack's lifetime
+    SynthEngine& add_engine();
+    SynthEngine& engine(int index) { return *slots[index]->engine; }
+    int size() const { return (int)slots.size(); }
+    int threads() const { return num_threads; }
+
+    // Instance plays notes of `channel` (OMNI = all) within [key_lo, key_hi]
+    bool set_route(int index, int channel, int key_lo, int key_hi);
+    bool set_gain(int index, float gain);
+
+    void note_on(int channel, int note, float velocity);
+    void note_off(int channel, int note);   // Ignores key ranges, so a route change never hangs notes
+
+    // Audio thread. Any block size, instances render in parallel per sub-block
+    void render_interleaved(float* interleaved, int num_frames);
+    void render_output(const AudioOutput& out, int num_frames);     // Device format and layout
+
+private:
+    struct Slot {
+        std::unique_ptr<SynthEngine> engine;
+        std::vector<float> out;             // Sub-block, left then right
+        int channel = OMNI;
+        int key_lo = 0;
+        int key_hi = 127;
+        std::atomic<float> gain{1.0f};
+    };
+
+    int sample_rate;
+    int num_threads;
+    std::vector<std::unique_ptr<Slot>> slots;
+    std::vector<Slot*> active;              // Same order, what the render loop walks
+    std::mutex slots_mutex;                 // Audio thread only uses try_lock
+
+    std::vector<float> mix;                 // Mixed sub-block, left then right
+    uint32_t dither_pos = 0;
+
+    bool routes(const Slot& slot, int channel) const;
+};
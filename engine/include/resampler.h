@@ -0,0 +1,42 @@
+#pragma once
+#include <cstdint>
+#include <vector>
+
+// Streaming polyphase resampler for stereo (interleaved in, planar out): Kaiser-windowed sinc with RESAMPLER_PHASES
+// coefficient sets, linearly interpolated between neighbours, so any rate pair works with a
+// fixed table. Positions are exact (integer input index + remainder in output-rate units),
+// nothing drifts over long streams. Pull model: input_needed(n) says how many input frames
+// the next n output frames need, the caller renders them into input(), then process()
+
+static const int RESAMPLER_PHASES = 256;
+static const int RESAMPLER_ZERO_CROSSINGS = 16;     // Per side, at the lower of the two rates
+static const double RESAMPLER_KAISER_BETA = 9.0;   // ~90 dB stopband
+static const double RESAMPLER_PASSBAND = 0.92;      // Cutoff, fraction of the lower Nyquist
+
+class Resampler {
+public:
+    // max_output: most output frames per process() call (sizes the input buffer)
+    Resampler(int in_rate, int out_rate, int max_output);
+
+    int input_needed(int out_frames) const;
+    float* input(int in_frames);                    // Space for in_frames interleaved frames
+    void process(float* left, float* right, int out_frames);
+    void reset();
+
+    int latency() const { return taps_ / 2; }       // Input frames
+    int in_rate() const { return in_rate_; }
+    int out_rate() const { return out_rate_; }
+
+private:
+    int in_rate_;
+    int out_rate_;
+    int taps_;
+
+    // (RESAMPLER_PHASES + 1) x taps, phase p delays the kernel by p / RESAMPLER_PHASES input frames
+    std::vector<float> coeffs_;
+    std::vector<float> kernel_;     // Interpolated set of the current output frame
+
+    std::vector<float> buffer_;     // Interleaved input, starting with the kernel history
+    int length_ = 0;                // Frames in buffer_
+    int64_t remainder_ = 0;         // Position of the next output past buffer_[0], in 1 / out_rate
+};
@@ -0,0 +1,59 @@
+#pragma once
+#include <atomic>
+#include <cstdint>
+#include <memory>
+#include <string>
+
+// Shared memory output tap: the audio thread publishes the master output (interleaved stereo)
+// and the visualization signal (mono, same as RingBuffer) into a POSIX shm segment, so local
+// recorder / analysis processes read them zero-copy (control/shm_tap.py). Each stream is a
+// power-of-2 ring with a monotonic write cursor in frames; readers detect overruns from it.
+// A write lands up to max_block frames past the cursor before the cursor is published, so only
+// the newest capacity - max_block published frames are safe to read.
+// The layout is fixed and little-endian, shared with the Python reader
+
+static const char SHM_TAP_MAGIC[8] = {'S', 'S', 'Y', 'N', 'T', 'A', 'P', '\0'};
+static const uint32_t SHM_TAP_VERSION = 2;
+static const char* const SHM_TAP_DEFAULT_NAME = "ssynth_tap";
+static const int SHM_TAP_DEFAULT_CAPACITY = 1 << 16;    // Frames per ring (~1.5 s at 44.1 kHz)
+
+struct ShmTapHeader {
+    char magic[8];
+    uint32_t version;
+    uint32_t sample_rate;
+    uint32_t capacity;                          // Frames, power of 2
+    uint32_t out_channels;                      // 2, interleaved
+    uint64_t out_offset;                        // Bytes from the segment start
+    uint64_t vis_offset;
+    uint32_t max_block;                         // Frames a write may run ahead of the published cursor
+    uint8_t reserved[20];
+
+    alignas(64) std::atomic<uint64_t> out_write;    // Frames written so far
+    alignas(64) std::atomic<uint64_t> vis_write;
+};
+
+class ShmTap {
+public:
+    // nullptr if the segment can't be created (unsupported platform, permissions)
+    static std::unique_ptr<ShmTap> create(const std::string& name, int capacity, int sample_rate);
+    ~ShmTap();
+
+    // Audio thread: one copy into the ring (two at the wrap), then the cursor is published.
+    // The output is interleaved on the way in
+    void write_output(const float* left, const float* right, int num_frames);
+    void write_visual(const float* mono, int num_frames);
+    void write_silence(int num_frames);
+
+    const std::string& name() const { return name_; }
+
+private:
+    ShmTap() = default;
+
+    std::string name_;
+    void* base_ = nullptr;
+    size_t size_ = 0;
+    ShmTapHeader* header_ = nullptr;
+    float* out_ = nullptr;
+    float* vis_ = nullptr;
+    uint64_t mask_ = 0;
+};
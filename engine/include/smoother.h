@@ -0,0 +1,35 @@
+#pragma once
+#include <cmath>
+#include <algorithm>
+
+#include "defs.h"
+
+// One-pole smoothing of a continuous control. The control thread sets the target, the audio
+// thread advances the value once per block; inside the block the value moves linearly from the
+// block start to the block end, so a knob drag becomes a continuous curve instead of steps
+struct SmoothedParam {
+    float value = 0.0f;                                 // At the current render position
+    float target = 0.0f;
+    float time = DEFAULT_SMOOTHING_MS * 0.001f;         // Time constant, seconds (0: steps)
+
+    void snap(float v) {
+        value = v;
+        target = v;
+    }
+
+    bool moving() const { return value != target; }
+
+    // Value after num_frames more samples
+    float advance(int num_frames, int sample_rate) {
+        if (value == target) return value;
+        if (time <= 0.0f) return value = target;
+
+        float k = std::exp(-(float)num_frames / (time * (float)sample_rate));
+        float next = target + (value - target) * k;
+
+        // Close enough lands exactly, so the ramp ends and the block goes back to constant values
+        if (std::fabs(next - target) <= 1e-5f * std::max(1.0f, std::fabs(target))) next = target;
+        value = next;
+        return next;
+    }
+};
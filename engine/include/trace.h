@@ -0,0 +1,99 @@
+#pragma once
+#include <atomic>
+#include <cstddef>
+#include <cstdint>
+#include <memory>
+#include <mutex>
+#include <deque>
+#include <string>
+
+// Stage profiling. TRACE_SCOPE("name") times the rest of the enclosing scope and writes a
+// complete event into a preallocated buffer of the calling thread (no locks, no allocation).
+// Nothing is recorded until Tracer::start(); dump() writes Chrome trace-event JSON that opens
+// in chrome://tracing or Perfetto. Configure with -DSSYNTH_TRACE=OFF to compile the hooks out
+
+#ifndef SSYNTH_TRACE
+#define SSYNTH_TRACE 1
+#endif
+
+static const int MAX_TRACE_THREADS = 8;
+static const size_t DEFAULT_TRACE_CAPACITY = 1 << 17;     // Events per thread (24 bytes each)
+
+struct TraceEvent {
+    const char* name;           // String literal or interned name, never freed during a capture
+    uint64_t start_ns;
+    uint64_t dur_ns;
+};
+
+// Steady clock in ns, also used by the Python hook so both sides share one timeline
+uint64_t trace_now_ns();
+
+class Tracer {
+public:
+    // Control thread. Drops the previous capture, preallocates capacity events per thread
+    void start(size_t capacity_per_thread);
+    void stop();
+    bool is_recording() const { return recording_.load(std::memory_order_relaxed); }
+
+    // Any thread, allocation-free. Events beyond the capacity of a thread are counted as dropped
+    void record(const char* name, uint64_t start_ns, uint64_t end_ns);
+
+    // Label of the calling thread in the trace (literal or interned)
+    void name_thread(const char* name);
+
+    // Stable copy of a runtime name (Python events), not for the audio thread
+    const char* intern(const std::string& name);
+
+    // Chrome trace-event JSON of the current / last capture. False if the file can't be written
+    bool dump(const std::string& path);
+
+    uint64_t dropped() const { return dropped_.load(std::memory_order_relaxed); }
+
+private:
+    struct ThreadBuffer {
+        std::unique_ptr<TraceEvent[]> events;
+        std::atomic<size_t> count{0};
+        std::atomic<const char*> name{nullptr};
+    };
+
+    ThreadBuffer* thread_buffer();
+
+    ThreadBuffer buffers_[MAX_TRACE_THREADS];
+    size_t capacity_ = 0;
+    uint64_t origin_ns_ = 0;
+
+    std::atomic<bool> recording_{false};
+    std::atomic<int> in_flight_{0};         // Writers past the recording check
+    std::atomic<int> next_slot_{0};
+    std::atomic<uint32_t> generation_{0};   // Threads claim a new slot in every capture
+    std::atomic<uint64_t> dropped_{0};
+
+    std::mutex control_mutex_;
+    std::deque<std::string> names_;         // Interned names (deque keeps them in place)
+};
+
+Tracer& tracer();
+
+#if SSYNTH_TRACE
+
+struct TraceScope {
+    const char* name;
+    uint64_t start_ns;
+
+    explicit TraceScope(const char* n) : name(n), start_ns(tracer().is_recording() ? trace_now_ns() : 0) {}
+    ~TraceScope() {
+        if (start_ns) tracer().record(name, start_ns, trace_now_ns());
+    }
+};
+
+#define TRACE_CONCAT_(a, b) a##b
+#define TRACE_CONCAT(a, b) TRACE_CONCAT_(a, b)
+#define TRACE_SCOPE(name) TraceScope TRACE_CONCAT(trace_scope_, __LINE__)(name)
+#define TRACE_THREAD(name) do { if (tracer().is_recording()) tracer().name_thread(name); } while (0)
+
+#else
+
+#define TRACE_SCOPE(name) ((void)0)
+#define TRACE_THREAD(name) ((void)0)
+
+#endif
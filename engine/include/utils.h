@@ -1,16 +1,109 @@
 #pragma once
 #include <vector>
+#include <algorithm>
 #include <atomic>
 #include <cmath>
 #include <cstring>
+#include <cstdint>
+#include <stdexcept>
+#include "defs.h"
+
+#if defined(__SSE__) || defined(_M_X64) || defined(_M_IX86_FP)
+#include <xmmintrin.h>
+#endif
+
+// Hot loops built twice, AVX2 and baseline, picked at load time by the CPU (module itself is
+// compiled without -march, so wheels stay portable). GCC on x86-64 Linux only, elsewhere a no-op
+#if defined(__x86_64__) && defined(__GNUC__) && !defined(__clang__) && defined(__linux__)
+#define SIMD_CLONES __attribute__((target_clones("avx2", "default")))
+#else
+#define SIMD_CLONES
+#endif
+
+// isfinite() which survives -ffast-math (compiler may assume no NaN/Inf there)
+inline bool is_finite_value(float x) {
+    uint32_t bits;
+    std::memcpy(&bits, &x, sizeof(bits));
+    return (bits & 0x7F800000u) != 0x7F800000u;
+}
+
+// Sets flush-to-zero / denormals-are-zero for the current thread while in scope, restores on exit.
+// Render thread belongs to the host (sounddevice, headless sink), so the flags are set per block
+class ScopedDenormalFlush {
+public:
+    ScopedDenormalFlush() {
+#if defined(__SSE__) || defined(_M_X64) || defined(_M_IX86_FP)
+        prev_ = _mm_getcsr();
+        _mm_setcsr(prev_ | 0x8040);     // FTZ (bit 15) | DAZ (bit 6)
+#elif defined(__aarch64__)
+        uint64_t fpcr;
+        asm volatile("mrs %0, fpcr" : "=r"(fpcr));
+        prev_ = fpcr;
+        asm volatile("msr fpcr, %0" :: "r"(fpcr | (1ull << 24)));     // FZ
+#endif
+    }
+
+    ~ScopedDenormalFlush() {
+#if defined(__SSE__) || defined(_M_X64) || defined(_M_IX86_FP)
+        _mm_setcsr((unsigned int)prev_);
+#elif defined(__aarch64__)
+        asm volatile("msr fpcr, %0" :: "r"(prev_));
+#endif
+    }
+
+    ScopedDenormalFlush(const ScopedDenormalFlush&) = delete;
+    ScopedDenormalFlush& operator=(const ScopedDenormalFlush&) = delete;
+
+private:
+    uint64_t prev_ = 0;
+};
+
+// One allocation for all render scratch, made at construction. Parts are handed out in order
+// (64-byte aligned) and live as long as the arena, so rendering never touches the allocator
+class ScratchArena {
+public:
+    static const size_t ALIGN_FLOATS = 16;
+
+    // Space a part of `floats` occupies, for sizing the arena up front
+    static size_t footprint(size_t floats) {
+        return (floats + ALIGN_FLOATS - 1) / ALIGN_FLOATS * ALIGN_FLOATS;
+    }
+
+    explicit ScratchArena(size_t floats) : storage_(floats + ALIGN_FLOATS, 0.0f) {
+        uintptr_t addr = reinterpret_cast<uintptr_t>(storage_.data());
+        offset_ = ((64 - addr % 64) % 64) / sizeof(float);
+    }
+
+    // Construction time only
+    float* take(size_t floats) {
+        size_t n = footprint(floats);
+        if (offset_ + n > storage_.size()) throw std::length_error("ScratchArena: out of space");
+        float* part = storage_.data() + offset_;
+        offset_ += n;
+        return part;
+    }
+
+    ScratchArena(const ScratchArena&) = delete;
+    ScratchArena& operator=(const ScratchArena&) = delete;
+
+private:
+    std::vector<float> storage_;
+    size_t offset_ = 0;
+};
 
 class RingBuffer {
 public:
     void resize(size_t size) {
         buffer_.resize(size, 0.0f);
         write_pos_ = 0;
+        total_written_ = 0;
     }
 
+    size_t capacity() const { return buffer_.size(); }
+
+    // Monotonic counter of all samples ever written (used by readers to track position)
+    uint64_t total_written() const { return total_written_.load(std::memory_order_acquire); }
+
     // Called from Audio Thread 
     void write(const float* data, size_t num_frames, int stride = 1) {
         size_t size = buffer_.size();
@@ -33,6 +126,22 @@ public:
         
         if (wrt >= size) wrt = 0; 
         write_pos_.store(wrt, std::memory_order_release);
+        total_written_.store(total_written_.load(std::memory_order_relaxed) + num_frames, std::memory_order_release);
+    }
+
+    // Same as write() with a block of zeros, without a source buffer
+    void write_silence(size_t num_frames) {
+        size_t size = buffer_.size();
+        size_t wrt = write_pos_.load(std::memory_order_relaxed);
+        size_t first = std::min(num_frames, size - wrt);
+
+        std::memset(&buffer_[wrt], 0, first * sizeof(float));
+        std::memset(&buffer_[0], 0, (num_frames - first) * sizeof(float));
+        wrt = (num_frames > first) ? num_frames - first : wrt + first;
+
+        if (wrt >= size) wrt = 0;
+        write_pos_.store(wrt, std::memory_order_release);
+        total_written_.store(total_written_.load(std::memory_order_relaxed) + num_frames, std::memory_order_release);
     }
 
     // Called from GUI
@@ -53,8 +162,33 @@ public:
         return result;
     }
 
+    // Called from reader threads
+    // Copies n samples starting at absolute position `start` (see total_written).
+    // Returns false if that region was not written yet or got overwritten while copying.
+    // The writer fills up to MAX_BLOCK_FRAMES past total_written before publishing it,
+    // so only the newest size - MAX_BLOCK_FRAMES samples are stable
+    bool read_from(uint64_t start, float* dest, size_t n) const {
+        size_t size = buffer_.size();
+        uint64_t total = total_written_.load(std::memory_order_acquire);
+        if (n + MAX_BLOCK_FRAMES > size || start + n > total || total + MAX_BLOCK_FRAMES - start > size) return false;
+
+        size_t start_idx = (size_t)(start % size);
+        size_t space_at_end = size - start_idx;
+
+        if (n <= space_at_end) {
+            std::memcpy(dest, &buffer_[start_idx], n * sizeof(float));
+        } else {
+            std::memcpy(dest, &buffer_[start_idx], space_at_end * sizeof(float));
+            std::memcpy(dest + space_at_end, &buffer_[0], (n - space_at_end) * sizeof(float));
+        }
+
+        // Writer could have lapped us during the copy
+        total = total_written_.load(std::memory_order_acquire);
+        return total + MAX_BLOCK_FRAMES - start <= size;
+    }
 
 private: 
     std::vector<float> buffer_;
     std::atomic<size_t> write_pos_{0};
+    std::atomic<uint64_t> total_written_{0};
 };
\ No newline at end of file
@@ -0,0 +1,125 @@
+#pragma once
+#include <vector>
+#include <cstdint>
+
+#include "defs.h"
+#include "envelope.h"
+#include "smoother.h"
+#include "wavetable.h"
+#include "utils.h"
+
+static const int NUM_OSCS = 3;
+
+// All voices in structure-of-arrays form. Every voice plays the current patch, so oscillator
+// parameters are kept once per slot, and per voice state (note, phases, envelope) lives in
+// arrays indexed by voice. One oscillator slot is rendered for all active voices in a single
+// batched pass instead of three separate table renders per voice
+class VoiceBank {
+public:
+    // Scratch buffers are taken from the arena (scratch_floats() of it)
+    VoiceBank(WavetableManager& wm, ScratchArena& arena, int sample_rate);
+    static size_t scratch_floats();
+
+    // Voice management
+    void note_on(int note, float velocity);
+    void note_off(int note);
+    void retire_all();
+    int active_count() const;
+
+    // Continuous controls (mix, pitch, detune, unison detune / spread, position, pitch bend) glide to
+    // the new value, smooth = false (or no voice sounding) sets it at once
+    void set_param(int param_id, float value, bool smooth = true);
+    bool set_smoothing(int param_id, float ms);     // false if param_id is not smoothed
+    void settle();                                  // All glides jump to their targets
+
+    // Accumulates (+=) all active voices into the stereo bus
+    void render(float* left_out, float* right_out, int num_frames);
+
+private:
+    // Frames per internal chunk, so the frame-major scratch of all voices stays in cache
+    static const int CHUNK_FRAMES = 256;
+
+    // Up to this many sounding voices are rendered one by one instead of batched
+    static const int FEW_LANES = 2;
+
+    WavetableManager& wt_manager;
+    int sample_rate;
+
+    // Oscillator slot parameters (shared by all voices)
+    struct OscParams {
+        int table_id = -1;
+        SmoothedParam mix;
+        SmoothedParam semi;         // Tuning in semitones
+        SmoothedParam detune;
+        int unison = 1;             // Unison voices, detune in cents, stereo spread
+        SmoothedParam uni_detune;
+        SmoothedParam uni_spread;
+        int interp = INTERP_LINEAR;
+        SmoothedParam position;     // Wavetable position (multi-frame tables), stepped per chunk
+    };
+    OscParams osc[NUM_OSCS];
+
+    // Mix of each slot over the current chunk: mix_start + mix_inc * frame
+    float mix_start[NUM_OSCS];
+    float mix_inc[NUM_OSCS];
+
+    float env_attack = 0.01f;
+    float env_decay = 0.2f;
+    float env_sustain = 0.7f;
+    float env_release = 0.5f;
+
+    // Per voice state
+    bool active[MAX_VOICES] = {};
+    int note[MAX_VOICES];
+    float velocity[MAX_VOICES] = {};
+    int table[NUM_OSCS][MAX_VOICES];                // Wave of each slot, latched at note_on
+    double phase[NUM_OSCS][MAX_VOICES] = {};        // 0..1
+    alignas(64) float uni_phases[NUM_OSCS][MAX_VOICES][MAX_UNISON] = {};
+    EnvelopeBank amp_env;
+
+    // Portamento: each voice's pitch (semitones, midi scale) glides to its note with glide_time as
+    // time constant, starting from the pitch of the last note played (see GlideMode)
+    int glide_mode = GLIDE_OFF;
+    float glide_time = 0.0f;
+    SmoothedParam pitch[MAX_VOICES];
+    int last_voice = -1;
+    float last_pitch = -1.0f;           // Where the last note was headed, -1 = none played yet
+
+    // Pitch bend in semitones (PITCH_BEND * BEND_RANGE), shared by all voices
+    float bend_amount = 0.0f;
+    float bend_range = DEFAULT_BEND_RANGE;
+    SmoothedParam bend;
+
+    // Note frequency of every lane (glide included) at the start and the end of the current chunk
+    float freq_from[MAX_VOICES];
+    float freq_to[MAX_VOICES];
+
+    // Slot tuning (semi + detune + bend) at the chunk ends, as frequency ratios
+    float tune_from[NUM_OSCS];
+    float tune_to[NUM_OSCS];
+
+    float gain = 1.0f;
+    float pan = 0.0f;
+
+    // Active voices of the current chunk, in voice order (lane k -> voice lanes[k])
+    int lanes[MAX_VOICES];
+    int num_lanes = 0;
+
+    // Frame-major scratch: [frame * MAX_VOICES + lane]
+    float* mix_buffer;
+    float* env_buffer;
+
+    // Per voice stereo scratch, for unison slots and for the few-lanes path
+    float* uni_left;
+    float* uni_right;
+    float* temp_osc_buffer;
+
+    // Convert midi (note, fractional while gliding) to frequency
+    float mtof(float note);
+
+    void retire(int v);
+    SmoothedParam* smoothed_param(int param_id);
+    void render_chunk(float* left_out, float* right_out, int num_frames);
+    void render_mono(int num_frames, const bool* osc_on);
+    bool render_lane(int k, int num_frames, const bool* slot_on);
+};
@@ -4,6 +4,11 @@
 #include <cmath>
 #include <iostream>
 #include <memory>
+#include <atomic>
+#include <mutex>
+#include <cstdint>
+
+#include "defs.h"
 
 // Struct that keeps all the MIPs for singular wave in one continous array
 struct FlatWavetable {
@@ -11,11 +16,27 @@ struct FlatWavetable {
     // float is 4 bytes => general size is ~96 kB
     std::vector<float> data; 
     
-    // Idxs where every MIP level starts 
+    // Idxs of sample 0 of every MIP level. Each level is padded with
+    // TABLE_GUARD_FRONT / TABLE_GUARD_BACK wrapped samples around it
     std::vector<int> mip_offsets; 
     
     int base_size; 
     int num_mips;
+    int stride;         // base_size + guards
+
+    // Multi-frame (morphing) tables: num_frames waveforms per MIP level, frame-major inside the
+    // level (frame f of level i at mip_offsets[i] + f * stride)
+    int num_frames = 1;
+    int level_size;     // num_frames * stride
+
+    // Per morph slot, one single-frame copy of every level blended at the slot's position.
+    // morph_pos: position each level was last blended at (-1 = never), so a still position is free
+    std::vector<float> morph_data;      // MORPH_SLOTS * num_mips * stride
+    std::vector<int> morph_offsets;     // Levels inside one slot's copy
+    std::vector<float> morph_pos;       // MORPH_SLOTS * num_mips
+
+    // Per morph slot, one level crossfaded from a unison render's MIP pair (see render_unison)
+    std::vector<float> unison_data;     // MORPH_SLOTS * stride
 };
 
 class WavetableManager {
@@ -23,24 +44,118 @@ public:
     WavetableManager(int sample_rate);
     ~WavetableManager();
 
+    // Both return the id (the existing one if name is already known, reloaded if it was evicted),
+    // -1 on error. A single cycle of any length is band-limited into a SINGLE_CYCLE_SIZE MIP chain
     int load_table(const std::string& name, const std::string& filepath);
+    int load_single_cycle(const std::string& name, const float* samples, int length);
+    int load_single_cycle_file(const std::string& name, const std::string& wav_path);
     int get_table_id(const std::string& name) const;
 
-    // Real-Time render
+    // Cache (control thread). acquire() makes a table resident again and marks it used, trim()
+    // evicts least recently used tables until the budget holds, never the ones in keep / extra_keep
+    bool acquire(int table_id);
+    void trim(const int* keep, int num_keep, const int* extra_keep = nullptr, int num_extra = 0);
+    void set_budget(size_t bytes) { budget_.store(bytes); }
+    size_t budget() const { return budget_.load(); }
+    size_t resident_bytes() const { return resident_bytes_.load(); }
+    int table_count() const;
+    int resident_count() const;
+
+    // Audio thread brackets every block that renders tables, eviction waits until none is in flight
+    void begin_render() { renders_.fetch_add(1); }
+    void end_render() { renders_.fetch_sub(1); }
+
+    // Real-Time render. interp is an InterpMode; gain of frame i is amplitude + amp_inc * i.
+    // position (0..1) picks the waveform of multi-frame tables, blended into morph_slot's copy
+    // (one slot per oscillator, so oscillators sharing a table can sit at different positions).
+    // inc_ratio multiplies the increment every frame (exponential pitch ramp, 1 = steady pitch);
+    // the MIP level and crossfade then follow the pitch frame by frame
     void render(
         int table_id,
         double& current_phase, 
         double phase_inc,
         int num_frames,
         double amplitude,
-        float* output_buffer
+        float amp_inc,
+        float* output_buffer,
+        int interp = INTERP_LINEAR,
+        float position = 0.0f,
+        int morph_slot = 0,
+        double inc_ratio = 1.0
+    );
+
+    // Unison render: all voices share one MIP pair and are summed (+=) into stereo outputs.
+    // phases (0..1) of all unison voices are kept in one contiguous array and updated in place.
+    // Gains ramp by gain_incs per frame, all increments by inc_ratio
+    void render_unison(
+        int table_id,
+        float* phases,
+        const double* phase_incs,
+        const float* gains_l,
+        const float* gains_r,
+        const float* gain_incs_l,
+        const float* gain_incs_r,
+        int num_unison,
+        int num_frames,
+        float* out_l,
+        float* out_r,
+        int interp = INTERP_LINEAR,
+        float position = 0.0f,
+        int morph_slot = 0,
+        double inc_ratio = 1.0
+    );
+
+    // Batched render of one oscillator slot for `count` voices playing the same table.
+    // Per voice phase (0..1, updated in place), increment, amplitude and its per frame ramp;
+    // output is frame-major and accumulated: out[i * stride + k] += sample i of voice k.
+    // inc_ratios (per voice, null = all steady) ramp the increments like render()
+    void render_batch(
+        int table_id,
+        double* phases,
+        const double* phase_incs,
+        const float* amplitudes,
+        const float* amp_incs,
+        int count,
+        int num_frames,
+        float* out,
+        int stride,
+        int interp = INTERP_LINEAR,
+        float position = 0.0f,
+        int morph_slot = 0,
+        const double* inc_ratios = nullptr
     );
 
 private:
     int sample_rate_;
-    
-    // Vector for all uploaded tables 
-    std::vector<FlatWavetable> tables_;
-    
-    std::vector<std::pair<std::string, int>> registry_;
+
+    // What is needed to rebuild an evicted table: a .wvt path or the single cycle itself
+    struct Entry {
+        std::string name;
+        std::string path;
+        std::vector<float> cycle;
+        std::unique_ptr<FlatWavetable> table;   // Null while evicted
+        size_t bytes = 0;
+        uint64_t last_used = 0;
+    };
+    std::vector<Entry> entries_;                // Index is the table id
+    mutable std::mutex mutex_;                  // Control side only
+    uint64_t use_clock_ = 0;
+
+    // What the audio thread sees: one pointer per id, null when evicted (renders nothing)
+    std::unique_ptr<std::atomic<FlatWavetable*>[]> live_;
+    std::atomic<int> renders_{0};
+    std::atomic<size_t> budget_;
+    std::atomic<size_t> resident_bytes_{0};
+
+    FlatWavetable* table(int table_id) const {
+        if (table_id < 0 || table_id >= MAX_TABLES) return nullptr;
+        return live_[table_id].load(std::memory_order_acquire);
+    }
+
+    int find(const std::string& name) const;
+    int add_entry(Entry&& entry);
+    bool build(Entry& entry);
+    bool make_resident(int table_id);       // With mutex_ held
+    void publish(int table_id);
+    void evict(int table_id);
 };
\ No newline at end of file
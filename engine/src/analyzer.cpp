@@ -0,0 +1,298 @@
+#include "../include/analyzer.h"
+#include "../include/trace.h"
+#include <cmath>
+#include <chrono>
+#include <cstring>
+#include <algorithm>
+
+#ifndef M_PI
+#define M_PI 3.14159265358979323846
+#endif
+
+static std::mutex g_planner_mutex;
+static std::string g_wisdom_file;
+static bool g_wisdom_loaded = false;
+
+std::mutex& fftw_planner_mutex() {
+    return g_planner_mutex;
+}
+
+/*
+    Initialization
+*/
+
+SpectrumAnalyzer::SpectrumAnalyzer(RingBuffer& ring, int sample_rate) : ring_(ring), sample_rate_(sample_rate) {
+    frames_.resize(MAX_QUEUED_FRAMES * num_bins_, 0.0f);
+    latest_.resize(num_bins_, 0.0f);
+}
+
+SpectrumAnalyzer::~SpectrumAnalyzer() {
+    stop();
+
+    std::lock_guard<std::mutex> planner(g_planner_mutex);
+    if (fft_plan_) fftwf_destroy_plan(fft_plan_);
+    if (fft_in_) fftwf_free(fft_in_);
+    if (fft_out_) fftwf_free(fft_out_);
+}
+
+void SpectrumAnalyzer::set_wisdom_file(const std::string& path) {
+    std::lock_guard<std::mutex> planner(g_planner_mutex);
+    g_wisdom_file = path;
+    g_wisdom_loaded = false;
+}
+
+void SpectrumAnalyzer::build_window() {
+    window_.resize(fft_size_);
+    double sum = 0.0;
+    double n = fft_size_ - 1.0;
+
+    for (int i = 0; i < fft_size_; ++i) {
+        double w = 1.0;
+        switch (window_type_) {
+            case WINDOW_HANN:     w = 0.5 * (1.0 - std::cos(2.0 * M_PI * i / n)); break;
+            case WINDOW_HAMMING:  w = 0.54 - 0.46 * std::cos(2.0 * M_PI * i / n); break;
+            case WINDOW_BLACKMAN: w = 0.42 - 0.5 * std::cos(2.0 * M_PI * i / n) + 0.08 * std::cos(4.0 * M_PI * i / n); break;
+            default: break;
+        }
+        window_[i] = (float)w;
+        sum += w;
+    }
+
+    // Coherent gain compensation, so every window maps a full-scale sine to the same level
+    // (for Hann this equals the old fixed 2 / FFT_SIZE factor)
+    norm_factor_ = (float)(1.0 / sum);
+}
+
+void SpectrumAnalyzer::rebuild_plan() {
+    std::lock_guard<std::mutex> planner(g_planner_mutex);
+
+    if (fft_plan_) fftwf_destroy_plan(fft_plan_);
+    if (fft_in_) fftwf_free(fft_in_);
+    if (fft_out_) fftwf_free(fft_out_);
+
+    fft_in_ = (float*)fftwf_malloc(sizeof(float) * fft_size_);
+    fft_out_ = (fftwf_complex*)fftwf_malloc(sizeof(fftwf_complex) * (fft_size_ / 2 + 1));
+
+    if (!g_wisdom_loaded && !g_wisdom_file.empty()) {
+        fftwf_import_wisdom_from_filename(g_wisdom_file.c_str());
+        g_wisdom_loaded = true;
+    }
+
+    // Measured plans are slow to create, so reuse saved wisdom when possible
+    fft_plan_ = fftwf_plan_dft_r2c_1d(fft_size_, fft_in_, fft_out_, FFTW_MEASURE | FFTW_WISDOM_ONLY);
+    if (!fft_plan_) {
+        fft_plan_ = fftwf_plan_dft_r2c_1d(fft_size_, fft_in_, fft_out_, FFTW_MEASURE);
+        if (!g_wisdom_file.empty()) fftwf_export_wisdom_to_filename(g_wisdom_file.c_str());
+    }
+}
+
+bool SpectrumAnalyzer::configure(int fft_size, int window, float overlap) {
+    if (fft_size < MIN_FFT_SIZE || fft_size > MAX_FFT_SIZE || (fft_size & (fft_size - 1)) != 0) return false;
+    if (window < 0 || window >= WINDOW_COUNT) return false;
+    if (fft_size + MAX_BLOCK_FRAMES > (int)ring_.capacity()) return false;     // See RingBuffer::read_from
+
+    overlap = std::max(0.0f, std::min(0.95f, overlap));
+
+    std::lock_guard<std::mutex> lock(config_mutex_);
+
+    bool size_changed = (fft_size != fft_size_) || !fft_plan_;
+    fft_size_ = fft_size;
+    window_type_ = window;
+    hop_size_ = std::max(1, (int)std::lround(fft_size * (1.0f - overlap)));
+
+    build_window();
+    if (size_changed) rebuild_plan();
+
+    int bins = fft_size_ / 2 + 1;
+    {
+        std::lock_guard<std::mutex> qlock(queue_mutex_);
+        if (bins != num_bins_) {
+            num_bins_ = bins;
+            frames_.assign(MAX_QUEUED_FRAMES * num_bins_, 0.0f);
+            latest_.assign(num_bins_, 0.0f);
+            queue_head_ = 0;
+            queue_count_ = 0;
+        }
+    }
+
+    // Start from the newest data
+    uint64_t written = ring_.total_written();
+    next_start_ = written > (uint64_t)fft_size_ ? written - fft_size_ : 0;
+    return true;
+}
+
+int SpectrumAnalyzer::get_fft_size() {
+    std::lock_guard<std::mutex> lock(config_mutex_);
+    return fft_size_;
+}
+
+int SpectrumAnalyzer::get_hop_size() {
+    std::lock_guard<std::mutex> lock(config_mutex_);
+    return hop_size_;
+}
+
+int SpectrumAnalyzer::get_num_bins() {
+    std::lock_guard<std::mutex> lock(queue_mutex_);
+    return num_bins_;
+}
+
+/*
+    Thread
+*/
+
+void SpectrumAnalyzer::start() {
+    if (running_.load()) return;
+
+    {
+        std::lock_guard<std::mutex> lock(config_mutex_);
+        if (window_.empty()) build_window();
+        if (!fft_plan_) rebuild_plan();
+
+        uint64_t written = ring_.total_written();
+        next_start_ = written > (uint64_t)fft_size_ ? written - fft_size_ : 0;
+    }
+
+    running_.store(true);
+    worker_ = std::thread(&SpectrumAnalyzer::worker_loop, this);
+}
+
+void SpectrumAnalyzer::stop() {
+    if (!running_.exchange(false)) return;
+    if (worker_.joinable()) worker_.join();
+}
+
+void SpectrumAnalyzer::worker_loop() {
+    while (running_.load(std::memory_order_acquire)) {
+        int hop;
+        {
+            std::lock_guard<std::mutex> lock(config_mutex_);
+            uint64_t written = ring_.total_written();
+            uint64_t limit = ring_.capacity() - MAX_BLOCK_FRAMES - fft_size_;
+
+            // Fell behind further than the ring holds: skip to the newest frame
+            if (written > next_start_ + fft_size_ + limit) {
+                uint64_t skipped = (written - fft_size_ - next_start_) / hop_size_;
+                dropped_frames_.fetch_add(skipped);
+                next_start_ += skipped * hop_size_;
+            }
+
+            while (running_.load(std::memory_order_relaxed) && next_start_ + fft_size_ <= written) {
+                analyze_frame();
+                next_start_ += hop_size_;
+            }
+            hop = hop_size_;
+        }
+
+        // Wake up roughly twice per hop
+        int sleep_us = (int)(500000.0 * hop / sample_rate_);
+        sleep_us = std::max(1000, std::min(10000, sleep_us));
+        std::this_thread::sleep_for(std::chrono::microseconds(sleep_us));
+    }
+}
+
+/*
+    Processing
+*/
+
+void SpectrumAnalyzer::analyze_frame() {
+    TRACE_THREAD("analyzer");
+    TRACE_SCOPE("analyze_frame");
+
+    magnitudes_.resize(fft_size_ / 2 + 1);
+    if (!transform(next_start_, magnitudes_.data())) {
+        dropped_frames_.fetch_add(1);
+        return;
+    }
+
+    push_frame(magnitudes_.data());
+}
+
+// One windowed FFT of fft_size_ samples from `start`, written to dest as 0..1 magnitudes.
+// Caller holds config_mutex_
+bool SpectrumAnalyzer::transform(uint64_t start, float* dest) {
+    if (!ring_.read_from(start, fft_in_, fft_size_)) return false;
+
+    #pragma omp simd
+    for (int i = 0; i < fft_size_; ++i) {
+        fft_in_[i] *= window_[i];
+    }
+
+    {
+        TRACE_SCOPE("fft");
+        fftwf_execute(fft_plan_);
+    }
+
+    int num_bins = fft_size_ / 2 + 1;
+    for (int i = 0; i < num_bins; ++i) {
+        float re = fft_out_[i][0];
+        float im = fft_out_[i][1];
+
+        // Magnitude
+        float mag = std::sqrt(re * re + im * im) * norm_factor_;
+
+        // dBFS (deciBells relative to Full Scale)
+        float db = 20.0f * std::log10(mag + 1e-9f);
+
+        // Mapping: -100dB ... 0 dB --> 0.0 .. 1.0
+        float val = (db + 100.0f) / 100.0f;
+        dest[i] = std::max(0.0f, std::min(1.0f, val));
+    }
+    return true;
+}
+
+void SpectrumAnalyzer::push_frame(const float* frame) {
+    std::lock_guard<std::mutex> lock(queue_mutex_);
+
+    // Queue full: overwrite the oldest frame
+    if (queue_count_ == MAX_QUEUED_FRAMES) {
+        queue_head_ = (queue_head_ + 1) % MAX_QUEUED_FRAMES;
+        queue_count_--;
+        dropped_frames_.fetch_add(1);
+    }
+
+    int slot = (queue_head_ + queue_count_) % MAX_QUEUED_FRAMES;
+    std::memcpy(&frames_[(size_t)slot * num_bins_], frame, num_bins_ * sizeof(float));
+    std::memcpy(latest_.data(), frame, num_bins_ * sizeof(float));
+    queue_count_++;
+}
+
+/*
+    GUI API
+*/
+
+int SpectrumAnalyzer::pending_frames() {
+    std::lock_guard<std::mutex> lock(queue_mutex_);
+    return queue_count_;
+}
+
+int SpectrumAnalyzer::fetch_frames(float* dest, int max_frames, int num_bins) {
+    std::lock_guard<std::mutex> lock(queue_mutex_);
+    if (num_bins != num_bins_) return 0;
+
+    int n = std::min(max_frames, queue_count_);
+    for (int f = 0; f < n; ++f) {
+        int slot = (queue_head_ + f) % MAX_QUEUED_FRAMES;
+        std::memcpy(dest + (size_t)f * num_bins_, &frames_[(size_t)slot * num_bins_], num_bins_ * sizeof(float));
+    }
+
+    queue_head_ = (queue_head_ + n) % MAX_QUEUED_FRAMES;
+    queue_count_ -= n;
+    return n;
+}
+
+std::vector<float> SpectrumAnalyzer::latest_frame() {
+    if (running_.load()) {
+        std::lock_guard<std::mutex> lock(queue_mutex_);
+        return latest_;
+    }
+
+    // Worker stopped: the queue is stale, transform the newest ring data on demand
+    std::lock_guard<std::mutex> lock(config_mutex_);
+    if (window_.empty()) build_window();
+    if (!fft_plan_) rebuild_plan();
+
+    std::vector<float> frame(fft_size_ / 2 + 1, 0.0f);
+    uint64_t written = ring_.total_written();
+    if (written >= (uint64_t)fft_size_) transform(written - fft_size_, frame.data());
+    return frame;
+}
@@ -1,46 +1,50 @@
 #include "../include/engine.h"
-#include "../include/voice.h"
+#include "../include/log.h"
 #include <cmath>
+#include <cstring>
+#include <algorithm>
+#include <thread>
 
 /*
     Initialization
 */ 
 
 
-SynthEngine::SynthEngine(int _sample_rate) : sample_rate(_sample_rate), wt_manager(_sample_rate) {
+SynthEngine::SynthEngine(int _sample_rate, int _output_rate) : sample_rate(_sample_rate), wt_manager(_sample_rate),
+    arena(2 * ScratchArena::footprint(MAX_BLOCK_FRAMES) + VoiceBank::scratch_floats()),
+    voices(wt_manager, arena, _sample_rate), analyzer(ring_buffer, _sample_rate), meter(_sample_rate) {
     for (int i = 0; i < PARAM_COUNT; ++i) params[i] = 0.0f;
 
     params[MASTER_VOL] = 0.4f;
-    params[FILTER_CUTOFF] = 22050.0f;
+    params[FILTER_CUTOFF] = 0.5f * sample_rate;
     params[AMP_DECAY] = 0.5f;
     params[AMP_SUSTAIN] = 1.0f;
+    params[OSC1_UNISON] = 1.0f;
+    params[OSC2_UNISON] = 1.0f;
+    params[OSC3_UNISON] = 1.0f;
+    params[BEND_RANGE] = DEFAULT_BEND_RANGE;
 
-    initVoices();
-    initFFT();
-    ring_buffer.resize(VISUALIZATION_BUFFER_SIZE);
+    for (int i = 0; i < PARAM_COUNT; ++i) {
+        staged_params[i] = 0.0f;
+        staged_mask[i] = false;
+    }
 
-    buf_l.resize(4096);
-    buf_r.resize(4096);
-}
+    // Voices always play the current patch
+    for (int i = 0; i < PARAM_COUNT; ++i) apply_param(i, params[i], false);
+    ring_buffer.resize(std::max(VISUALIZATION_BUFFER_SIZE, sample_rate));     // About a second
+    scope_scratch.resize(MAX_SCOPE_POINTS * 2);
 
-SynthEngine::~SynthEngine() {
-    if (fft_plan) fftwf_destroy_plan(fft_plan);
-    if (fft_in) fftwf_free(fft_in);
-    if (fft_out) fftwf_free(fft_out);
-}
+    buf_l = arena.take(MAX_BLOCK_FRAMES);
+    buf_r = arena.take(MAX_BLOCK_FRAMES);
 
-void SynthEngine::initVoices() {
-    voices.reserve(MAX_VOICES);
-    for (int i = 0; i < MAX_VOICES; ++i) {
-        voices.push_back(std::make_unique<Voice>(wt_manager, sample_rate));
+    // Device runs at another rate: render at sample_rate, convert in render_interleaved
+    if (_output_rate > 0 && _output_rate != sample_rate) {
+        resampler.reset(new Resampler(sample_rate, _output_rate, MAX_BLOCK_FRAMES));
     }
 }
 
-void SynthEngine::initFFT() {
-    fft_in = (float*)fftwf_malloc(sizeof(float) * FFT_SIZE);
-    fft_out = (fftwf_complex*)fftwf_malloc(sizeof(fftw_complex) * (FFT_SIZE / 2 + 1));
-    fft_plan = fftwf_plan_dft_r2c_1d(FFT_SIZE, fft_in, fft_out, FFTW_ESTIMATE);
-    spectrum_cache.resize(FFT_SIZE / 2 + 1);
+SynthEngine::~SynthEngine() {
+    analyzer.stop();
 }
 
 /*
@@ -49,52 +53,97 @@ void SynthEngine::initFFT() {
 
 
 int SynthEngine::load_wavetable(const std::string& name, const std::string& path) { 
-    return wt_manager.load_table(name, path);
+    int id = wt_manager.load_table(name, path);
+    if (id >= 0) trim_tables(&id, 1);
+    return id;
 }
 
-void SynthEngine::note_on(int note, float velocity) {
-    Voice* target_voice = nullptr;
+int SynthEngine::load_single_cycle(const std::string& name, const float* samples, int length) {
+    int id = wt_manager.load_single_cycle(name, samples, length);
+    if (id >= 0) trim_tables(&id, 1);
+    return id;
+}
 
-    for (const auto& v : voices) { 
-        if (!v->is_active()) {
-            target_voice = v.get();
-            break;
-        }
-    }
+int SynthEngine::load_single_cycle_file(const std::string& name, const std::string& wav_path) {
+    int id = wt_manager.load_single_cycle_file(name, wav_path);
+    if (id >= 0) trim_tables(&id, 1);
+    return id;
+}
 
-    // Redo, temporary method
-    if (!target_voice) target_voice = voices[0].get();
+void SynthEngine::set_table_budget(size_t bytes) {
+    wt_manager.set_budget(bytes);
+    trim_tables(nullptr, 0);
+}
 
-    target_voice->set_param(AMP_ATTACK, params[AMP_ATTACK]);
-    target_voice->set_param(AMP_DECAY, params[AMP_DECAY]);
-    target_voice->set_param(AMP_SUSTAIN, params[AMP_SUSTAIN]);
-    target_voice->set_param(AMP_RELEASE, params[AMP_RELEASE]);
+static const int OSC_TYPE_PARAMS[NUM_OSCS] = { OSC1_TYPE, OSC2_TYPE, OSC3_TYPE };
 
-    // Apply global parameters
-    for (int i = 0; i < PARAM_COUNT; ++i) {
-        target_voice->set_param(i, params[i]);
-    }
+static bool is_table_param(int param_id) {
+    return param_id == OSC1_TYPE || param_id == OSC2_TYPE || param_id == OSC3_TYPE;
+}
 
-    target_voice->note_on(note, velocity);
+// Control thread: tables about to be selected are rebuilt here if they were evicted,
+// so the audio thread only ever switches ids
+void SynthEngine::prepare_tables(const int* table_ids, int count) {
+    for (int i = 0; i < count; ++i) wt_manager.acquire(table_ids[i]);
+    trim_tables(table_ids, count);
 }
 
-void SynthEngine::note_off(int note) {
-    for (const auto& v : voices) {
-        if (v->is_active() && v->get_note() == note) {
-            v->note_off();
+// Evicts over budget, keeping the selected tables, the ones of a staged swap and extra_keep
+void SynthEngine::trim_tables(const int* extra_keep, int count) {
+    int keep[2 * NUM_OSCS];
+    int num_keep = 0;
+    for (int s = 0; s < NUM_OSCS; ++s) keep[num_keep++] = (int)params[OSC_TYPE_PARAMS[s]];
+    {
+        std::lock_guard<std::mutex> lock(staging_mutex);
+        for (int s = 0; s < NUM_OSCS; ++s) {
+            if (staged_mask[OSC_TYPE_PARAMS[s]]) keep[num_keep++] = (int)staged_params[OSC_TYPE_PARAMS[s]];
         }
     }
+    wt_manager.trim(keep, num_keep, extra_keep, count);
+}
+
+void SynthEngine::note_on(int note, float velocity) {
+    voices.note_on(note, velocity);
+    recorder.record(EVENT_NOTE_ON, note, velocity, sample_clock.load(std::memory_order_relaxed));
+}
+
+void SynthEngine::note_off(int note) {
+    voices.note_off(note);
+    recorder.record(EVENT_NOTE_OFF, note, 0.0f, sample_clock.load(std::memory_order_relaxed));
 }
 
 void SynthEngine::set_param(int param_id, float value) {
     if (param_id >= 0 && param_id < PARAM_COUNT) {
-        params[param_id] = value;
+        // Real-time parameters change, continuous ones glide
+        apply_param(param_id, value, true);
+        recorder.record(EVENT_PARAM, param_id, value, sample_clock.load(std::memory_order_relaxed));
+    }
+}
 
-        // Real-time parameters change
-        for (const auto& v : voices) {
-            if (v->is_active()) v->set_param(param_id, value);
-        }
+void SynthEngine::apply_param(int param_id, float value, bool smooth) {
+    params[param_id] = value;
+
+    if (param_id == MASTER_VOL) {
+        if (smooth && voices.active_count() > 0) master_vol.target = value;
+        else master_vol.snap(value);
+        return;
     }
+    voices.set_param(param_id, value, smooth);
+}
+
+bool SynthEngine::set_smoothing(int param_id, float ms) {
+    if (!is_finite_value(ms)) return false;
+    if (param_id == MASTER_VOL) {
+        master_vol.time = std::max(0.0f, ms) * 0.001f;
+        return true;
+    }
+    return voices.set_smoothing(param_id, ms);
+}
+
+void SynthEngine::set_interpolation(int mode) {
+    set_param(OSC1_INTERP, (float)mode);
+    set_param(OSC2_INTERP, (float)mode);
+    set_param(OSC3_INTERP, (float)mode);
 }
 
 float SynthEngine::get_param(int param_id) {
@@ -102,106 +151,390 @@ float SynthEngine::get_param(int param_id) {
     return 0.0f;
 }
 
+bool SynthEngine::set_params(const float* values, const bool* mask, float crossfade_ms) {
+    // Validate everything first, nothing is published on error
+    for (int i = 0; i < PARAM_COUNT; ++i) {
+        if (mask[i] && !is_finite_value(values[i])) return false;
+    }
+    if (!is_finite_value(crossfade_ms) || crossfade_ms < 0.0f) return false;
+
+    int table_ids[NUM_OSCS];
+    int num_tables = 0;
+    for (int s = 0; s < NUM_OSCS; ++s) {
+        if (mask[OSC_TYPE_PARAMS[s]]) table_ids[num_tables++] = (int)values[OSC_TYPE_PARAMS[s]];
+    }
+    prepare_tables(table_ids, num_tables);
+
+    std::lock_guard<std::mutex> lock(staging_mutex);
+
+    // Merge with a not yet applied swap
+    for (int i = 0; i < PARAM_COUNT; ++i) {
+        if (mask[i]) {
+            staged_params[i] = values[i];
+            staged_mask[i] = true;
+        }
+    }
+    staged_fade_samples = (int)(crossfade_ms * 0.001f * sample_rate);
+    params_pending.store(true, std::memory_order_release);
+
+    // Recorded as plain param changes (replay has no crossfade)
+    if (recorder.is_recording()) {
+        uint64_t now = sample_clock.load(std::memory_order_relaxed);
+        for (int i = 0; i < PARAM_COUNT; ++i) {
+            if (mask[i]) recorder.record(EVENT_PARAM, i, values[i], now);
+        }
+    }
+    return true;
+}
+
+// Audio thread. Returns false if control thread holds the staging area (retry next block)
+bool SynthEngine::apply_staged_params() {
+    std::unique_lock<std::mutex> lock(staging_mutex, std::try_to_lock);
+    if (!lock.owns_lock()) return false;
+
+    for (int i = 0; i < PARAM_COUNT; ++i) {
+        if (!staged_mask[i]) continue;
+        staged_mask[i] = false;
+        apply_param(i, staged_params[i], false);     // Patch switch, no glides
+    }
+    params_pending.store(false, std::memory_order_relaxed);
+    return true;
+}
+
+// Audio thread, block start
+void SynthEngine::begin_block_swap() {
+    if (swap_state == SWAP_FADE_OUT && swap_fade_pos >= swap_fade_len) {
+        // Output is silent now, safe to switch the patch
+        if (apply_staged_params()) {
+            swap_state = SWAP_FADE_IN;
+            swap_fade_pos = 0;
+        }
+        return;
+    }
+
+    if (swap_state != SWAP_IDLE || !params_pending.load(std::memory_order_acquire)) return;
+
+    std::unique_lock<std::mutex> lock(staging_mutex, std::try_to_lock);
+    if (!lock.owns_lock()) return;
+    int fade = staged_fade_samples;
+    lock.unlock();
+
+    if (fade <= 1) {
+        apply_staged_params();
+    } else {
+        // Half of the crossfade goes out, half comes back in
+        swap_state = SWAP_FADE_OUT;
+        swap_fade_len = fade / 2;
+        swap_fade_pos = 0;
+    }
+}
+
+// Audio thread, linear gain ramp for the swap crossfade
+void SynthEngine::apply_swap_gain(float* left, float* right, int num_frames) {
+    if (swap_state == SWAP_IDLE) return;
+
+    float step = 1.0f / (float)swap_fade_len;
+    float g0 = (float)swap_fade_pos * step;
+    float dir = 1.0f;
+    if (swap_state == SWAP_FADE_OUT) {
+        g0 = 1.0f - g0;
+        dir = -1.0f;
+    }
+
+    #pragma omp simd
+    for (int i = 0; i < num_frames; ++i) {
+        float g = std::max(0.0f, std::min(1.0f, g0 + dir * step * i));
+        left[i] *= g;
+        right[i] *= g;
+    }
+
+    swap_fade_pos += num_frames;
+    if (swap_state == SWAP_FADE_IN && swap_fade_pos >= swap_fade_len) {
+        swap_state = SWAP_IDLE;
+    }
+}
+
 /*
     Processing
 */ 
 
-// Main render method
+// Main render method, any block size
 void SynthEngine::render(float* left_out, float* right_out, int num_frames) {
+    TRACE_THREAD("audio");
+    for (int pos = 0; pos < num_frames; pos += MAX_BLOCK_FRAMES) {
+        int len = std::min(MAX_BLOCK_FRAMES, num_frames - pos);
+        render_block(left_out + pos, right_out + pos, len, AudioOutput(), 0);
+    }
+}
+
+// One sub-block: swaps, voices, master, limiter, meters
+void SynthEngine::render_block(float* left_out, float* right_out, int num_frames, const AudioOutput& out, size_t offset) {
+    TRACE_SCOPE("render");
+
+    // Denormals in release tails and feedback paths cost 10-100x per operation
+    ScopedDenormalFlush flush_guard;
+
+    // Bulk parameter swaps are applied only here, between blocks
+    begin_block_swap();
 
     // Clear buffers
     std::memset(left_out, 0, num_frames * sizeof(float));
     std::memset(right_out, 0, num_frames * sizeof(float));
 
+    // Idle fast path: nothing to mix, limit or crossfade
+    last_block_silent = (active_voice_count() == 0);
+    if (last_block_silent) {
+        // Nothing audible to crossfade, finish a pending swap right away
+        if (swap_state == SWAP_FADE_OUT) {
+            if (apply_staged_params()) swap_state = SWAP_IDLE;
+        } else if (swap_state == SWAP_FADE_IN) {
+            swap_state = SWAP_IDLE;
+        }
+        voices.settle();
+        master_vol.snap(master_vol.target);
+        clear_output(out, offset, num_frames);
+        if (metering.load(std::memory_order_relaxed)) meter.process_silence(num_frames);
+        sample_clock.fetch_add(num_frames, std::memory_order_relaxed);
+        return;
+    }
+
     // Summarize voices
-    for (const auto& v : voices) {
-        if (v->is_active()) v->render(left_out, right_out, num_frames);
+    {
+        TRACE_SCOPE("voices");
+        wt_manager.begin_render();
+        voices.render(left_out, right_out, num_frames);
+        wt_manager.end_render();
     }
 
-    // Master FX and volume
-    float master_gain = params[MASTER_VOL];
+    // Master FX and volume, ramped over the block while it glides
+    float master_gain = master_vol.value;
+    float gain_inc = (master_vol.advance(num_frames, sample_rate) - master_gain) / (float)num_frames;
 
-    // Main loop
-    #pragma omp simd
-    for (int i = 0; i < num_frames; ++i) {
-        left_out[i] *= master_gain;
-        right_out[i] *= master_gain;
+    // Main loop: gain, limiter, conversion to the output format and store in one pass. A patch swap
+    // crossfade comes after the limiter, then the output gets its own pass
+    int limiter_hits = 0;
+    {
+        TRACE_SCOPE("master_limiter");
 
-        // Hard limiter, needed to get rid of clipping due to polyphony
-        if (left_out[i] > 1.0f) left_out[i] = 1.0f;
-        else if (left_out[i] < -1.0f) left_out[i] = -1.0f;
+        bool fused = (swap_state == SWAP_IDLE);
+        AudioOutput master = fused ? out : AudioOutput();
+        limiter_hits = write_output(master, offset, left_out, right_out, num_frames, master_gain, gain_inc, true, dither_pos);
 
-        if (right_out[i] > 1.0f) right_out[i] = 1.0f;
-        else if (right_out[i] < -1.0f) right_out[i] = -1.0f;
+        if (!fused) {
+            apply_swap_gain(left_out, right_out, num_frames);
+            if (out.data) write_output(out, offset, left_out, right_out, num_frames, 1.0f, 0.0f, false, dither_pos);
+        }
+        if (out.data) dither_pos += num_frames;
+    }
+
+    if (metering.load(std::memory_order_relaxed)) {
+        TRACE_SCOPE("meters");
+        meter.process(left_out, right_out, num_frames, limiter_hits);
     }
+    sample_clock.fetch_add(num_frames, std::memory_order_relaxed);
 }
 
-// Interleaved for python (spectrogram especially)
-void SynthEngine::render_interleaved(float* output, int num_frames) {
-    // Using static buffers not to allocate memory with every call
+/*
+    Automation
+*/
+
+void SynthEngine::start_recording(size_t capacity) {
+    recorder.start(capacity, sample_clock.load(std::memory_order_relaxed), params);
+}
+
+void SynthEngine::render_automation(const float* snapshot, const AutomationEvent* events, size_t num_events,
+                                    const AudioOutput& out, int num_frames, int block_size) {
+    block_size = std::max(1, block_size);
+
+    // Replay must not end up in a running recording
+    bool was_recording = recorder.is_recording();
+    recorder.stop();
 
-    if (num_frames > (int)buf_l.size()) {
-        std::cerr << "Buffer overflow in render_interleaved!" << std::endl;
-        std::memset(output, 0, num_frames * 2 * sizeof(float));
-        return; 
+    // Tables of the whole replay are made resident up front, the render loop only switches ids
+    for (int s = 0; s < NUM_OSCS; ++s) {
+        float id = snapshot[OSC_TYPE_PARAMS[s]];
+        if (is_finite_value(id)) wt_manager.acquire((int)id);
+    }
+    for (size_t i = 0; i < num_events; ++i) {
+        if (events[i].type == EVENT_PARAM && is_table_param(events[i].id)) wt_manager.acquire((int)events[i].value);
     }
 
-    // Usual render
-    render(buf_l.data(), buf_r.data(), num_frames);
+    // Same starting point as the recording (dither noise included)
+    voices.retire_all();
+    dither_pos = 0;
+    for (int i = 0; i < PARAM_COUNT; ++i) {
+        if (is_finite_value(snapshot[i])) set_param(i, snapshot[i]);   // NaN: param newer than the recording
+    }
 
-    // Interleaving [L, R, L, R...]
-    const float* l_ptr = buf_l.data();
-    const float* r_ptr = buf_r.data();
+    size_t next = 0;
+    int pos = 0;
+    while (pos < num_frames) {
+        while (next < num_events && events[next].sample <= (uint64_t)pos) {
+            const AutomationEvent& e = events[next++];
+            switch (e.type) {
+                case EVENT_NOTE_ON:  note_on(e.id, e.value); break;
+                case EVENT_NOTE_OFF: note_off(e.id); break;
+                case EVENT_PARAM:    set_param(e.id, e.value); break;
+                default: break;
+            }
+        }
 
-    // Write to ring buffer for spectrogram
-    ring_buffer.write(l_ptr, num_frames); 
+        // Next block ends at the next event, so every event lands on its exact sample
+        int len = std::min(block_size, num_frames - pos);
+        if (next < num_events) len = (int)std::min<uint64_t>(len, events[next].sample - pos);
 
-    for (int i = 0; i < num_frames; ++i) {
-        output[i * 2 + 0] = l_ptr[i];
-        output[i * 2 + 1] = r_ptr[i];
+        render_frames(out, pos, len, false);
+        pos += len;
+    }
+
+    trim_tables(nullptr, 0);
+    if (was_recording) {
+        engine_log(LOG_WARNING, "Recording was stopped by render_automation");
     }
 }
 
-/*
-    Visualisation
-*/ 
+int SynthEngine::active_voice_count() const {
+    return voices.active_count();
+}
 
-std::vector<float> SynthEngine::get_spectrum_data() {
-    std::lock_guard<std::mutex> lock(fft_mutex);
+// Interleaved for python (spectrogram especially). Any size: a realtime block or a whole offline render
+void SynthEngine::render_interleaved(float* output, int num_frames) {
+    render_output(AudioOutput::interleaved_stereo(output), num_frames);
+}
 
-    std::vector<float> raw = ring_buffer.read_latest(FFT_SIZE);
+void SynthEngine::render_output(const AudioOutput& out, int num_frames) {
+    if (!resampler) {
+        render_frames(out, 0, num_frames, true);
+        return;
+    }
 
-    // Apply Hanning window
-    for (int i = 0; i < FFT_SIZE; ++i) {
-        double window = 0.5 * (1 - std::cos(2.0 * M_PI * i / (FFT_SIZE - 1.0)));
-        fft_in[i] = raw[i] * window;
+    // num_frames are at the output rate. Visualization, tap and meters see the engine rate
+    for (int pos = 0; pos < num_frames; pos += MAX_BLOCK_FRAMES) {
+        int len = std::min(MAX_BLOCK_FRAMES, num_frames - pos);
+        int needed = resampler->input_needed(len);
+        render_frames(AudioOutput::interleaved_stereo(resampler->input(needed)), 0, needed, true);
+
+        // The sub-block buffers are free again, they take the resampled block on its way out
+        TRACE_SCOPE("resample");
+        resampler->process(buf_l, buf_r, len);
+        write_output(out, pos, buf_l, buf_r, len, 1.0f, 0.0f, false, dither_pos);
+        dither_pos += len;
     }
+}
 
-    fftwf_execute(fft_plan);
+void SynthEngine::render_frames(const AudioOutput& out, size_t offset, int num_frames, bool visualize) {
+    for (int pos = 0; pos < num_frames; pos += MAX_BLOCK_FRAMES) {
+        int len = std::min(MAX_BLOCK_FRAMES, num_frames - pos);
 
-    // Calculate magnitudes and convert to dB
-    int num_bins = FFT_SIZE / 2 + 1;
-    float norm_factor = 2.0f / (float)FFT_SIZE;
+        render_block(buf_l, buf_r, len, out, offset + pos);
+        if (!visualize) continue;
 
-    for (int i = 0; i < num_bins; ++i) {
-        float re = fft_out[i][0];
-        float im = fft_out[i][1];
+        if (last_block_silent) {
+            ring_buffer.write_silence(len);     // Keeps analyzer and scope running
+            publish_tap(true, len);
+            continue;
+        }
 
-        // Magnitude
-        float mag = std::sqrt(re * re + im * im) * norm_factor;
+        // Write to ring buffer for spectrogram
+        ring_buffer.write(buf_l, len);
+        publish_tap(false, len);
+    }
+}
+
+// Audio thread: output and visualization signal of one sub-block (in buf_l / buf_r) to the tap
+void SynthEngine::publish_tap(bool silent, int num_frames) {
+    tap_users.fetch_add(1);
+    ShmTap* t = tap.load();
+    if (t) {
+        TRACE_SCOPE("shm_tap");
+        if (!silent) {
+            t->write_output(buf_l, buf_r, num_frames);
+            t->write_visual(buf_l, num_frames);
+        } else {
+            t->write_silence(num_frames);
+        }
+    }
+    tap_users.fetch_sub(1);
+}
+
+bool SynthEngine::open_tap(const std::string& name, int capacity) {
+    close_tap();        // The new segment may reuse the name
+
+    std::lock_guard<std::mutex> lock(tap_mutex);
+    tap_owner = ShmTap::create(name, capacity, sample_rate);
+    if (!tap_owner) return false;
+
+    tap.store(tap_owner.get());
+    engine_log(LOG_INFO, "Shared memory tap '%s' open (%d frames)", tap_owner->name().c_str(), capacity);
+    return true;
+}
+
+void SynthEngine::close_tap() {
+    std::lock_guard<std::mutex> lock(tap_mutex);
+    if (!tap.exchange(nullptr)) return;
+
+    // Audio thread may still be inside publish_tap() with the old pointer
+    while (tap_users.load() > 0) std::this_thread::yield();
+    tap_owner.reset();
+}
+
+/*
+    Metering
+*/
+
+void SynthEngine::enable_meters(bool on) {
+    if (on && !metering.load(std::memory_order_relaxed)) meter.reset();
+    metering.store(on, std::memory_order_release);
+}
 
-        // dBFS (deciBells relative to Full Scale)
-        float db = 20.0f * std::log10(mag + 1e-9f);
+/*
+    Visualisation
+*/ 
 
-        // Mapping: -100dB ... 0 dB --> 0.0 .. 1.0
-        float val = (db + 100.0f) / 100.0f;
+bool SynthEngine::configure_analyzer(int fft_size, int window, float overlap) {
+    return analyzer.configure(fft_size, window, overlap);
+}
 
-        // Clamp
-        if (val < 0.0f) val = 0.0f;
-        if (val > 1.0f) val = 1.0f;
+void SynthEngine::start_analyzer() {
+    analyzer.start();
+}
 
-        spectrum_cache[i] = val;
+void SynthEngine::stop_analyzer() {
+    analyzer.stop();
+}
+
+// Newest analyzer frame. While the analyzer thread runs this never blocks on the transform,
+// otherwise the newest ring data is transformed on the calling thread
+std::vector<float> SynthEngine::get_spectrum_data() {
+    TRACE_SCOPE("get_spectrum");
+    return analyzer.latest_frame();
+}
+
+// Latest `num_points` samples aligned to a rising zero crossing, so the scope picture stands still.
+// Returns trigger position inside the search window or -1 if the signal has no crossing (free run)
+int SynthEngine::get_scope_data(float* dest, int num_points) {
+    num_points = std::max(2, std::min(MAX_SCOPE_POINTS, num_points));
+
+    // Search window: one extra screen of history before the displayed part
+    int total = num_points * 2;
+    float* raw = scope_scratch.data();
+
+    uint64_t written = ring_buffer.total_written();
+    if (written < (uint64_t)total || !ring_buffer.read_from(written - total, raw, total)) {
+        std::memset(dest, 0, num_points * sizeof(float));
+        return -1;
+    }
+
+    // Newest crossing which still leaves a full screen after it
+    int trigger = -1;
+    for (int i = num_points; i > 0; --i) {
+        if (raw[i - 1] <= 0.0f && raw[i] > 0.0f) {
+            trigger = i;
+            break;
+        }
     }
 
-    return spectrum_cache;
-}
\ No newline at end of file
+    int start = (trigger >= 0) ? trigger : num_points;
+    std::memcpy(dest, raw + start, num_points * sizeof(float));
+    return trigger;
+}
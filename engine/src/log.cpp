@@ -0,0 +1,79 @@
+#include "../include/log.h"
+#include <cstdio>
+#include <cstdarg>
+#include <cstring>
+
+LogQueue::LogQueue() {
+    for (int i = 0; i < LOG_QUEUE_SIZE; ++i) {
+        slots_[i].seq.store(i, std::memory_order_relaxed);
+    }
+}
+
+bool LogQueue::push(int level, const char* text) {
+    const size_t mask = LOG_QUEUE_SIZE - 1;
+    size_t pos = enqueue_pos_.load(std::memory_order_relaxed);
+    Slot* slot;
+
+    for (;;) {
+        slot = &slots_[pos & mask];
+        size_t seq = slot->seq.load(std::memory_order_acquire);
+        intptr_t diff = (intptr_t)seq - (intptr_t)pos;
+
+        if (diff == 0) {
+            // Slot is free, claim it
+            if (enqueue_pos_.compare_exchange_weak(pos, pos + 1, std::memory_order_relaxed)) break;
+        } else if (diff < 0) {
+            // Consumer hasn't caught up
+            dropped_.fetch_add(1, std::memory_order_relaxed);
+            return false;
+        } else {
+            pos = enqueue_pos_.load(std::memory_order_relaxed);
+        }
+    }
+
+    slot->msg.level = level;
+    std::strncpy(slot->msg.text, text, LOG_MESSAGE_SIZE - 1);
+    slot->msg.text[LOG_MESSAGE_SIZE - 1] = '\0';
+    slot->seq.store(pos + 1, std::memory_order_release);
+    return true;
+}
+
+bool LogQueue::pop(LogMessage& out) {
+    const size_t mask = LOG_QUEUE_SIZE - 1;
+    size_t pos = dequeue_pos_.load(std::memory_order_relaxed);
+    Slot* slot;
+
+    for (;;) {
+        slot = &slots_[pos & mask];
+        size_t seq = slot->seq.load(std::memory_order_acquire);
+        intptr_t diff = (intptr_t)seq - (intptr_t)(pos + 1);
+
+        if (diff == 0) {
+            if (dequeue_pos_.compare_exchange_weak(pos, pos + 1, std::memory_order_relaxed)) break;
+        } else if (diff < 0) {
+            return false;   // Empty
+        } else {
+            pos = dequeue_pos_.load(std::memory_order_relaxed);
+        }
+    }
+
+    out = slot->msg;
+    slot->seq.store(pos + LOG_QUEUE_SIZE, std::memory_order_release);
+    return true;
+}
+
+LogQueue& engine_log_queue() {
+    static LogQueue queue;
+    return queue;
+}
+
+void engine_log(int level, const char* fmt, ...) {
+    char text[LOG_MESSAGE_SIZE];
+
+    va_list args;
+    va_start(args, fmt);
+    std::vsnprintf(text, sizeof(text), fmt, args);
+    va_end(args);
+
+    engine_log_queue().push(level, text);
+}
@@ -0,0 +1,325 @@
+#include "../include/meter.h"
+#include <cmath>
+#include <algorithm>
+
+#ifndef M_PI
+#define M_PI 3.14159265358979323846
+#endif
+
+// Sub-block is 100 ms: momentary = 4, short-term = 30, RMS = 3 sub-blocks
+static const int MOMENTARY_BLOCKS = 4;
+static const int SHORT_TERM_BLOCKS = 30;
+static const int RMS_BLOCKS = 3;
+
+// Gating (ITU-R BS.1770-4)
+static const double ABSOLUTE_GATE = -70.0;
+static const double RELATIVE_GATE = -10.0;
+static const int HIST_BINS = 750;               // 0.1 LU from -70 to +5 LUFS
+
+// True peak interpolator
+static const int TP_PHASES = 4;
+static const int TP_TAPS = 12;
+static const int TP_CHUNK = 1024;
+
+static inline float amp_to_db(float x) {
+    return (x > 1e-6f) ? 20.0f * std::log10(x) : METER_FLOOR_DB;
+}
+
+static inline float energy_to_lufs(double e) {
+    return (e > 1e-12) ? (float)(-0.691 + 10.0 * std::log10(e)) : METER_FLOOR_DB;
+}
+
+/*
+    Initialization
+*/
+
+LoudnessMeter::LoudnessMeter(int sample_rate) : sample_rate_(sample_rate) {
+    sub_block_len_ = std::max(1, sample_rate / 10);
+
+    k_history_.resize(SHORT_TERM_BLOCKS, 0.0);
+    sq_history_[0].resize(SHORT_TERM_BLOCKS, 0.0);
+    sq_history_[1].resize(SHORT_TERM_BLOCKS, 0.0);
+    hist_count_.resize(HIST_BINS, 0);
+    hist_energy_.resize(HIST_BINS, 0.0);
+
+    tp_buf_[0].resize(TP_TAPS - 1 + TP_CHUNK, 0.0f);
+    tp_buf_[1].resize(TP_TAPS - 1 + TP_CHUNK, 0.0f);
+
+    design_filters();
+    clear();
+}
+
+// K-weighting for any sample rate (pre-filter shelf + RLB high-pass of BS.1770,
+// re-derived from the analog prototypes instead of the 48 kHz coefficient table)
+void LoudnessMeter::design_filters() {
+    double f0 = 1681.974450955533;
+    double gain_db = 3.999843853973347;
+    double q = 0.7071752369554196;
+
+    double k = std::tan(M_PI * f0 / sample_rate_);
+    double vh = std::pow(10.0, gain_db / 20.0);
+    double vb = std::pow(vh, 0.4996667741545416);
+    double a0 = 1.0 + k / q + k * k;
+
+    shelf_.b0 = (vh + vb * k / q + k * k) / a0;
+    shelf_.b1 = 2.0 * (k * k - vh) / a0;
+    shelf_.b2 = (vh - vb * k / q + k * k) / a0;
+    shelf_.a1 = 2.0 * (k * k - 1.0) / a0;
+    shelf_.a2 = (1.0 - k / q + k * k) / a0;
+
+    f0 = 38.13547087602444;
+    q = 0.5003270373238773;
+    k = std::tan(M_PI * f0 / sample_rate_);
+    a0 = 1.0 + k / q + k * k;
+
+    highpass_.b0 = 1.0;
+    highpass_.b1 = -2.0;
+    highpass_.b2 = 1.0;
+    highpass_.a1 = 2.0 * (k * k - 1.0) / a0;
+    highpass_.a2 = (1.0 - k / q + k * k) / a0;
+
+    // Windowed sinc, cutoff at the original Nyquist, split into phases.
+    // Stored reversed per phase so the inner loop is a plain dot product
+    int n = TP_PHASES * TP_TAPS;
+    std::vector<double> proto(n);
+    for (int i = 0; i < n; ++i) {
+        double t = (i - (n - 1) / 2.0) / TP_PHASES;
+        double sinc = (std::fabs(t) < 1e-9) ? 1.0 : std::sin(M_PI * t) / (M_PI * t);
+        double w = 0.42 - 0.5 * std::cos(2.0 * M_PI * i / (n - 1)) + 0.08 * std::cos(4.0 * M_PI * i / (n - 1));
+        proto[i] = sinc * w;
+    }
+
+    tp_coeffs_.resize(n);
+    for (int p = 0; p < TP_PHASES; ++p) {
+        double sum = 0.0;
+        for (int t = 0; t < TP_TAPS; ++t) sum += proto[t * TP_PHASES + p];
+        for (int t = 0; t < TP_TAPS; ++t) {
+            tp_coeffs_[p * TP_TAPS + (TP_TAPS - 1 - t)] = (float)(proto[t * TP_PHASES + p] / sum);
+        }
+    }
+}
+
+void LoudnessMeter::clear() {
+    for (auto& ch : state_) for (double& z : ch) z = 0.0;
+    std::fill(tp_buf_[0].begin(), tp_buf_[0].end(), 0.0f);
+    std::fill(tp_buf_[1].begin(), tp_buf_[1].end(), 0.0f);
+
+    sub_block_pos_ = 0;
+    sub_k_sum_ = 0.0;
+    sub_sq_sum_[0] = sub_sq_sum_[1] = 0.0;
+    std::fill(k_history_.begin(), k_history_.end(), 0.0);
+    std::fill(sq_history_[0].begin(), sq_history_[0].end(), 0.0);
+    std::fill(sq_history_[1].begin(), sq_history_[1].end(), 0.0);
+    history_pos_ = 0;
+    history_count_ = 0;
+
+    std::fill(hist_count_.begin(), hist_count_.end(), 0);
+    std::fill(hist_energy_.begin(), hist_energy_.end(), 0.0);
+
+    true_peak_max_ = 0.0f;
+    limiter_hits_ = 0;
+
+    peak_l_ = peak_r_ = rms_l_ = rms_r_ = METER_FLOOR_DB;
+    true_peak_ = true_peak_max_db_ = METER_FLOOR_DB;
+    momentary_ = short_term_ = integrated_ = METER_FLOOR_DB;
+    limiter_hits_pub_.store(0, std::memory_order_relaxed);
+}
+
+/*
+    Processing (audio thread)
+*/
+
+// Max of the 4x oversampled signal for one chunk (n <= TP_CHUNK)
+float LoudnessMeter::true_peak_chunk(int ch, const float* x, int n) {
+    float* buf = tp_buf_[ch].data();
+    std::copy(x, x + n, buf + TP_TAPS - 1);
+
+    float peak = 0.0f;
+    for (int p = 0; p < TP_PHASES; ++p) {
+        const float* c = tp_coeffs_.data() + p * TP_TAPS;
+
+        #pragma omp simd reduction(max:peak)
+        for (int i = 0; i < n; ++i) {
+            float y = 0.0f;
+            for (int t = 0; t < TP_TAPS; ++t) y += c[t] * buf[i + t];
+            peak = std::max(peak, std::fabs(y));
+        }
+    }
+
+    // Last samples become history of the next chunk
+    std::copy(buf + n, buf + n + TP_TAPS - 1, buf);
+    return peak;
+}
+
+void LoudnessMeter::process(const float* left, const float* right, int num_frames, int limiter_hits) {
+    if (reset_requested_.exchange(false, std::memory_order_acq_rel)) clear();
+
+    const float* in[2] = {left, right};
+    float peak[2] = {0.0f, 0.0f};
+    float true_peak = 0.0f;
+
+    for (int c = 0; c < 2; ++c) {
+        const float* x = in[c];
+        float p = 0.0f;
+
+        #pragma omp simd reduction(max:p)
+        for (int i = 0; i < num_frames; ++i) p = std::max(p, std::fabs(x[i]));
+        peak[c] = p;
+
+        for (int off = 0; off < num_frames; off += TP_CHUNK) {
+            true_peak = std::max(true_peak, true_peak_chunk(c, x + off, std::min(TP_CHUNK, num_frames - off)));
+        }
+    }
+    true_peak = std::max(true_peak, std::max(peak[0], peak[1]));
+    true_peak_max_ = std::max(true_peak_max_, true_peak);
+
+    // Energy sums, split on 100 ms sub-block boundaries
+    int pos = 0;
+    while (pos < num_frames) {
+        int len = std::min(num_frames - pos, sub_block_len_ - sub_block_pos_);
+
+        for (int c = 0; c < 2; ++c) {
+            const float* x = in[c] + pos;
+
+            // Plain energy for RMS
+            float sq = 0.0f;
+            #pragma omp simd reduction(+:sq)
+            for (int i = 0; i < len; ++i) sq += x[i] * x[i];
+            sub_sq_sum_[c] += sq;
+
+            // K-weighted energy (recursive, so per sample)
+            double* z = state_[c];
+            double k_sum = 0.0;
+            for (int i = 0; i < len; ++i) {
+                double s = x[i];
+                double y = shelf_.b0 * s + z[0];
+                z[0] = shelf_.b1 * s - shelf_.a1 * y + z[1];
+                z[1] = shelf_.b2 * s - shelf_.a2 * y;
+
+                double h = highpass_.b0 * y + z[2];
+                z[2] = highpass_.b1 * y - highpass_.a1 * h + z[3];
+                z[3] = highpass_.b2 * y - highpass_.a2 * h;
+
+                k_sum += h * h;
+            }
+            sub_k_sum_ += k_sum;
+        }
+
+        sub_block_pos_ += len;
+        pos += len;
+        if (sub_block_pos_ >= sub_block_len_) close_sub_block();
+    }
+
+    limiter_hits_ += limiter_hits;
+
+    peak_l_.store(amp_to_db(peak[0]), std::memory_order_relaxed);
+    peak_r_.store(amp_to_db(peak[1]), std::memory_order_relaxed);
+    true_peak_.store(amp_to_db(true_peak), std::memory_order_relaxed);
+    true_peak_max_db_.store(amp_to_db(true_peak_max_), std::memory_order_relaxed);
+    limiter_hits_pub_.store(limiter_hits_, std::memory_order_relaxed);
+    blocks_pub_.store(++blocks_, std::memory_order_release);
+}
+
+// Idle engine: no filtering, just keeps time running so meters fall to silence
+void LoudnessMeter::process_silence(int num_frames) {
+    if (reset_requested_.exchange(false, std::memory_order_acq_rel)) clear();
+
+    for (auto& ch : state_) for (double& z : ch) z = 0.0;
+    std::fill(tp_buf_[0].begin(), tp_buf_[0].begin() + TP_TAPS - 1, 0.0f);
+    std::fill(tp_buf_[1].begin(), tp_buf_[1].begin() + TP_TAPS - 1, 0.0f);
+
+    int pos = 0;
+    while (pos < num_frames) {
+        int len = std::min(num_frames - pos, sub_block_len_ - sub_block_pos_);
+        sub_block_pos_ += len;
+        pos += len;
+        if (sub_block_pos_ >= sub_block_len_) close_sub_block();
+    }
+
+    peak_l_.store(METER_FLOOR_DB, std::memory_order_relaxed);
+    peak_r_.store(METER_FLOOR_DB, std::memory_order_relaxed);
+    true_peak_.store(METER_FLOOR_DB, std::memory_order_relaxed);
+    blocks_pub_.store(++blocks_, std::memory_order_release);
+}
+
+void LoudnessMeter::close_sub_block() {
+    k_history_[history_pos_] = sub_k_sum_ / sub_block_len_;
+    sq_history_[0][history_pos_] = sub_sq_sum_[0] / sub_block_len_;
+    sq_history_[1][history_pos_] = sub_sq_sum_[1] / sub_block_len_;
+    history_pos_ = (history_pos_ + 1) % SHORT_TERM_BLOCKS;
+    history_count_ = std::min(history_count_ + 1, SHORT_TERM_BLOCKS);
+
+    sub_block_pos_ = 0;
+    sub_k_sum_ = 0.0;
+    sub_sq_sum_[0] = sub_sq_sum_[1] = 0.0;
+
+    // Mean of the newest `count` sub-blocks
+    auto mean_of = [&](const std::vector<double>& h, int count) {
+        count = std::min(count, history_count_);
+        double sum = 0.0;
+        for (int i = 1; i <= count; ++i) sum += h[(history_pos_ - i + SHORT_TERM_BLOCKS) % SHORT_TERM_BLOCKS];
+        return sum / count;
+    };
+
+    double momentary = mean_of(k_history_, MOMENTARY_BLOCKS);
+    double short_term = mean_of(k_history_, SHORT_TERM_BLOCKS);
+
+    // Gating blocks are 400 ms with 75% overlap, i.e. one per sub-block once 4 exist
+    if (history_count_ >= MOMENTARY_BLOCKS) {
+        double lufs = -0.691 + 10.0 * std::log10(std::max(momentary, 1e-20));
+        if (lufs > ABSOLUTE_GATE) {
+            int bin = std::min(HIST_BINS - 1, (int)((lufs - ABSOLUTE_GATE) * 10.0));
+            hist_count_[bin]++;
+            hist_energy_[bin] += momentary;
+        }
+    }
+
+    rms_l_.store(amp_to_db((float)std::sqrt(mean_of(sq_history_[0], RMS_BLOCKS))), std::memory_order_relaxed);
+    rms_r_.store(amp_to_db((float)std::sqrt(mean_of(sq_history_[1], RMS_BLOCKS))), std::memory_order_relaxed);
+    momentary_.store(energy_to_lufs(momentary), std::memory_order_relaxed);
+    short_term_.store(energy_to_lufs(short_term), std::memory_order_relaxed);
+    integrated_.store(compute_integrated(), std::memory_order_relaxed);
+}
+
+float LoudnessMeter::compute_integrated() const {
+    // Absolute gate is applied when filling the histogram
+    uint64_t count = 0;
+    double energy = 0.0;
+    for (int i = 0; i < HIST_BINS; ++i) {
+        count += hist_count_[i];
+        energy += hist_energy_[i];
+    }
+    if (count == 0) return METER_FLOOR_DB;
+
+    // Relative gate: 10 LU below the absolute-gated mean
+    double threshold = -0.691 + 10.0 * std::log10(energy / count) + RELATIVE_GATE;
+    int first_bin = std::max(0, (int)std::ceil((threshold - ABSOLUTE_GATE) * 10.0));
+
+    count = 0;
+    energy = 0.0;
+    for (int i = first_bin; i < HIST_BINS; ++i) {
+        count += hist_count_[i];
+        energy += hist_energy_[i];
+    }
+    return (count > 0) ? energy_to_lufs(energy / count) : METER_FLOOR_DB;
+}
+
+/*
+    Readout (any thread)
+*/
+
+MeterValues LoudnessMeter::get() const {
+    MeterValues v;
+    v.blocks = blocks_pub_.load(std::memory_order_acquire);
+    v.peak_l = peak_l_.load(std::memory_order_relaxed);
+    v.peak_r = peak_r_.load(std::memory_order_relaxed);
+    v.rms_l = rms_l_.load(std::memory_order_relaxed);
+    v.rms_r = rms_r_.load(std::memory_order_relaxed);
+    v.true_peak = true_peak_.load(std::memory_order_relaxed);
+    v.true_peak_max = true_peak_max_db_.load(std::memory_order_relaxed);
+    v.momentary = momentary_.load(std::memory_order_relaxed);
+    v.short_term = short_term_.load(std::memory_order_relaxed);
+    v.integrated = integrated_.load(std::memory_order_relaxed);
+    v.limiter_hits = limiter_hits_pub_.load(std::memory_order_relaxed);
+    return v;
+}
@@ -0,0 +1,187 @@
+#include "../include/output.h"
+#include <algorithm>
+#include <cmath>
+#include <cstring>
+
+/*
+    Sample conversion
+*/
+
+// Integer hash of the sample number (lowbias32)
+static inline uint32_t dither_hash(uint32_t x) {
+    x ^= x >> 16;
+    x *= 0x7feb352du;
+    x ^= x >> 15;
+    x *= 0x846ca68bu;
+    x ^= x >> 16;
+    return x;
+}
+
+// Triangular noise in (-1, 1) LSB: sum of the two 16 bit halves of one hash. A hash of the sample
+// number instead of a running generator keeps the loop free of carried state, so it vectorizes
+static inline float tpdf(uint32_t n) {
+    uint32_t h = dither_hash(n);
+    return (float)(h & 0xFFFFu) * (1.0f / 65536.0f) + (float)(h >> 16) * (1.0f / 65536.0f) - 1.0f;
+}
+
+template <class Sample> struct Convert;
+
+template <> struct Convert<float> {
+    static inline float run(float x, uint32_t) { return x; }
+};
+
+template <> struct Convert<int16_t> {
+    static inline int16_t run(float x, uint32_t n) {
+        float v = x * 32767.0f + tpdf(n);
+        v = std::max(-32768.0f, std::min(32767.0f, v));
+        return (int16_t)(int32_t)(v + (v < 0.0f ? -0.5f : 0.5f));
+    }
+};
+
+// 24 bits of float mantissa are far above any DAC's noise floor, no dither needed
+template <> struct Convert<int32_t> {
+    static inline int32_t run(float x, uint32_t) {
+        float v = x * 2147483648.0f;
+        v = std::max(-2147483648.0f, std::min(2147483520.0f, v));      // Largest float below 2^31
+        return (int32_t)v;
+    }
+};
+
+/*
+    Kernels
+*/
+
+enum OutputKind {
+    KIND_NONE,          // Gain and limiter only
+    KIND_STEREO,        // Interleaved, 2 channels
+    KIND_INTERLEAVED,   // Interleaved, more channels
+    KIND_PLANAR,
+    KIND_MONO
+};
+
+template <class Sample, int KIND, bool LIMIT>
+static int store_block(const AudioOutput& out, size_t offset, float* left, float* right, int num_frames,
+                       float gain, float gain_inc, uint32_t dither_pos) {
+    Sample* base = static_cast<Sample*>(out.data);
+    const size_t channels = (size_t)out.channels;
+    Sample* dst = nullptr;
+    Sample* dst_r = nullptr;
+    if (KIND == KIND_STEREO || KIND == KIND_INTERLEAVED) dst = base + offset * channels;
+    if (KIND == KIND_PLANAR || KIND == KIND_MONO) dst = base + offset;
+    if (KIND == KIND_PLANAR) dst_r = dst + out.channel_stride;
+
+    int hits = 0;
+
+    #pragma omp simd reduction(+:hits)
+    for (int i = 0; i < num_frames; ++i) {
+        float g = gain + gain_inc * (float)i;
+        float l = left[i] * g;
+        float r = right[i] * g;
+
+        // Hard limiter, needed to get rid of clipping due to polyphony
+        if (LIMIT) {
+            hits += (std::fabs(l) > 1.0f) + (std::fabs(r) > 1.0f);
+            l = std::max(-1.0f, std::min(1.0f, l));
+            r = std::max(-1.0f, std::min(1.0f, r));
+        }
+        left[i] = l;
+        right[i] = r;
+
+        // Left and right get independent dither
+        uint32_t n = 2u * (dither_pos + (uint32_t)i);
+        if (KIND == KIND_STEREO) {
+            dst[i * 2] = Convert<Sample>::run(l, n);
+            dst[i * 2 + 1] = Convert<Sample>::run(r, n + 1);
+        } else if (KIND == KIND_INTERLEAVED) {
+            dst[i * channels] = Convert<Sample>::run(l, n);
+            dst[i * channels + 1] = Convert<Sample>::run(r, n + 1);
+        } else if (KIND == KIND_PLANAR) {
+            dst[i] = Convert<Sample>::run(l, n);
+            dst_r[i] = Convert<Sample>::run(r, n + 1);
+        } else if (KIND == KIND_MONO) {
+            dst[i] = Convert<Sample>::run(0.5f * (l + r), n);
+        }
+    }
+    return hits;
+}
+
+// Channels from `first` on are silent
+template <class Sample>
+static void clear_channels(const AudioOutput& out, size_t offset, int num_frames, int first) {
+    Sample* base = static_cast<Sample*>(out.data);
+    if (out.planar) {
+        for (int c = first; c < out.channels; ++c) {
+            std::memset(base + c * out.channel_stride + offset, 0, (size_t)num_frames * sizeof(Sample));
+        }
+        return;
+    }
+    const size_t channels = (size_t)out.channels;
+    Sample* dst = base + offset * channels;
+    if (first == 0) {
+        std::memset(dst, 0, (size_t)num_frames * channels * sizeof(Sample));
+        return;
+    }
+    for (int i = 0; i < num_frames; ++i) {
+        for (size_t c = first; c < channels; ++c) dst[i * channels + c] = Sample(0);
+    }
+}
+
+template <class Sample, bool LIMIT>
+static int write_kind(const AudioOutput& out, size_t offset, float* left, float* right, int num_frames,
+                      float gain, float gain_inc, uint32_t dither_pos) {
+    if (!out.data) {
+        return store_block<Sample, KIND_NONE, LIMIT>(out, offset, left, right, num_frames, gain, gain_inc, dither_pos);
+    }
+    if (out.channels == 1) {
+        return store_block<Sample, KIND_MONO, LIMIT>(out, offset, left, right, num_frames, gain, gain_inc, dither_pos);
+    }
+
+    int hits;
+    if (out.planar) {
+        hits = store_block<Sample, KIND_PLANAR, LIMIT>(out, offset, left, right, num_frames, gain, gain_inc, dither_pos);
+    } else if (out.channels == 2) {
+        hits = store_block<Sample, KIND_STEREO, LIMIT>(out, offset, left, right, num_frames, gain, gain_inc, dither_pos);
+    } else {
+        hits = store_block<Sample, KIND_INTERLEAVED, LIMIT>(out, offset, left, right, num_frames, gain, gain_inc, dither_pos);
+    }
+    if (out.channels > 2) clear_channels<Sample>(out, offset, num_frames, 2);
+    return hits;
+}
+
+template <class Sample>
+static int write_format(const AudioOutput& out, size_t offset, float* left, float* right, int num_frames,
+                        float gain, float gain_inc, bool limit, uint32_t dither_pos) {
+    if (limit) return write_kind<Sample, true>(out, offset, left, right, num_frames, gain, gain_inc, dither_pos);
+    return write_kind<Sample, false>(out, offset, left, right, num_frames, gain, gain_inc, dither_pos);
+}
+
+/*
+    Interface
+*/
+
+bool valid_output(const AudioOutput& out) {
+    if (!out.data || out.channels < 1) return false;
+    if (out.format < 0 || out.format >= SAMPLE_FORMAT_COUNT) return false;
+    return !out.planar || out.channel_stride > 0 || out.channels == 1;
+}
+
+int write_output(const AudioOutput& out, size_t offset, float* left, float* right, int num_frames,
+                 float gain, float gain_inc, bool limit, uint32_t dither_pos) {
+    switch (out.format) {
+        case SAMPLE_INT16:
+            return write_format<int16_t>(out, offset, left, right, num_frames, gain, gain_inc, limit, dither_pos);
+        case SAMPLE_INT32:
+            return write_format<int32_t>(out, offset, left, right, num_frames, gain, gain_inc, limit, dither_pos);
+        default:
+            return write_format<float>(out, offset, left, right, num_frames, gain, gain_inc, limit, dither_pos);
+    }
+}
+
+void clear_output(const AudioOutput& out, size_t offset, int num_frames) {
+    if (!out.data) return;
+    switch (out.format) {
+        case SAMPLE_INT16: clear_channels<int16_t>(out, offset, num_frames, 0); break;
+        case SAMPLE_INT32: clear_channels<int32_t>(out, offset, num_frames, 0); break;
+        default: clear_channels<float>(out, offset, num_frames, 0); break;
+    }
+}
@@ -0,0 +1,123 @@
+#include "../include/rack.h"
+#include "../include/log.h"
+#include <algorithm>
+#include <cstring>
+#include <thread>
+
+Rack::Rack(int sample_rate, int num_threads) : sample_rate(sample_rate) {
+    if (num_threads <= 0) num_threads = (int)std::max(1u, std::thread::hardware_concurrency());
+    this->num_threads = num_threads;
+    mix.assign((size_t)MAX_BLOCK_FRAMES * 2, 0.0f);
+}
+
+/*
+    Control
+*/
+
+SynthEngine& Rack::add_engine() {
+    std::unique_ptr<Slot> slot(new Slot());
+    slot->engine.reset(new SynthEngine(sample_rate));
+    slot->out.assign((size_t)MAX_BLOCK_FRAMES * 2, 0.0f);
+
+    SynthEngine& engine = *slot->engine;
+    std::lock_guard<std::mutex> lock(slots_mutex);
+    active.push_back(slot.get());
+    slots.push_back(std::move(slot));
+    return engine;
+}
+
+bool Rack::set_route(int index, int channel, int key_lo, int key_hi) {
+    if (index < 0 || index >= size() || key_lo > key_hi) return false;
+
+    Slot& slot = *slots[index];
+    slot.channel = channel < 0 ? OMNI : channel;
+    slot.key_lo = std::max(0, key_lo);
+    slot.key_hi = std::min(127, key_hi);
+    return true;
+}
+
+bool Rack::set_gain(int index, float gain) {
+    if (index < 0 || index >= size() || !is_finite_value(gain)) return false;
+    slots[index]->gain.store(gain, std::memory_order_relaxed);
+    return true;
+}
+
+bool Rack::routes(const Slot& slot, int channel) const {
+    return slot.channel == OMNI || slot.channel == channel;
+}
+
+void Rack::note_on(int channel, int note, float velocity) {
+    for (auto& slot : slots) {
+        if (routes(*slot, channel) && note >= slot->key_lo && note <= slot->key_hi) {
+            slot->engine->note_on(note, velocity);
+        }
+    }
+}
+
+void Rack::note_off(int channel, int note) {
+    for (auto& slot : slots) {
+        if (routes(*slot, channel)) slot->engine->note_off(note);
+    }
+}
+
+/*
+    Render
+*/
+
+void Rack::render_interleaved(float* output, int num_frames) {
+    render_output(AudioOutput::interleaved_stereo(output), num_frames);
+}
+
+void Rack::render_output(const AudioOutput& output, int num_frames) {
+    TRACE_THREAD("audio");
+
+    // An instance is being added: one silent block instead of waiting
+    std::unique_lock<std::mutex> lock(slots_mutex, std::try_to_lock);
+    int count = (int)active.size();
+    if (!lock.owns_lock() || count == 0) {
+        clear_output(output, 0, num_frames);
+        return;
+    }
+
+    int threads = std::min(num_threads, count);
+    float* mix_l = mix.data();
+    float* mix_r = mix_l + MAX_BLOCK_FRAMES;
+
+    for (int pos = 0; pos < num_frames; pos += MAX_BLOCK_FRAMES) {
+        int len = std::min(MAX_BLOCK_FRAMES, num_frames - pos);
+
+        {
+            TRACE_SCOPE("rack.instances");
+            #pragma omp parallel for schedule(dynamic, 1) num_threads(threads) if(threads > 1)
+            for (int k = 0; k < count; ++k) {
+                float* out = active[k]->out.data();
+                active[k]->engine->render_output(AudioOutput::planar_stereo(out, out + MAX_BLOCK_FRAMES), len);
+            }
+        }
+
+        TRACE_SCOPE("rack.mix");
+        for (int k = 0; k < count; ++k) {
+            float g = active[k]->gain.load(std::memory_order_relaxed);
+            const float* src_l = active[k]->out.data();
+            const float* src_r = src_l + MAX_BLOCK_FRAMES;
+
+            if (k == 0) {
+                #pragma omp simd
+                for (int i = 0; i < len; ++i) {
+                    mix_l[i] = src_l[i] * g;
+                    mix_r[i] = src_r[i] * g;
+                }
+            } else {
+                #pragma omp simd
+                for (int i = 0; i < len; ++i) {
+                    mix_l[i] += src_l[i] * g;
+                    mix_r[i] += src_r[i] * g;
+                }
+            }
+        }
+
+        // Conversion to the device format and layout
+        write_output(output, pos, mix_l, mix_r, len, 1.0f, 0.0f, false, dither_pos);
+        dither_pos += len;
+    }
+}
@@ -0,0 +1,108 @@
+#include "../include/resampler.h"
+#include <algorithm>
+#include <cmath>
+#include <cstring>
+
+// Zeroth order modified Bessel function (Kaiser window), power series
+static double bessel_i0(double x) {
+    double sum = 1.0, term = 1.0;
+    double q = x * x * 0.25;
+    for (int k = 1; k < 64; ++k) {
+        term *= q / ((double)k * k);
+        sum += term;
+        if (term < sum * 1e-12) break;
+    }
+    return sum;
+}
+
+Resampler::Resampler(int in_rate, int out_rate, int max_output) : in_rate_(in_rate), out_rate_(out_rate) {
+    // Downsampling stretches the kernel in input frames, cutoff follows the output Nyquist
+    double scale = std::min(1.0, (double)out_rate / in_rate);
+    int half = (int)std::ceil(RESAMPLER_ZERO_CROSSINGS / scale);
+    taps_ = half * 2;
+
+    double cutoff = 0.5 * scale * RESAMPLER_PASSBAND;      // Cycles per input frame
+    double norm = bessel_i0(RESAMPLER_KAISER_BETA);
+    coeffs_.resize((size_t)(RESAMPLER_PHASES + 1) * taps_);
+
+    for (int p = 0; p <= RESAMPLER_PHASES; ++p) {
+        double frac = (double)p / RESAMPLER_PHASES;
+        float* c = coeffs_.data() + (size_t)p * taps_;
+        double sum = 0.0;
+
+        for (int k = 0; k < taps_; ++k) {
+            // Tap k sits at input frame (k - half + 1), the output at frac after frame 0
+            double t = (double)(k - half + 1) - frac;
+            double x = 2.0 * cutoff * t;
+            double sinc = (std::fabs(x) < 1e-12) ? 1.0 : std::sin(M_PI * x) / (M_PI * x);
+            double w = t / half;
+            double window = (std::fabs(w) >= 1.0) ? 0.0
+                : bessel_i0(RESAMPLER_KAISER_BETA * std::sqrt(1.0 - w * w)) / norm;
+            c[k] = (float)(sinc * window);
+            sum += c[k];
+        }
+        // Unity DC gain for every phase
+        for (int k = 0; k < taps_; ++k) c[k] = (float)(c[k] / sum);
+    }
+
+    kernel_.resize(taps_);
+    int max_input = (int)(((int64_t)max_output * in_rate + out_rate - 1) / out_rate) + 1;
+    buffer_.resize((size_t)(taps_ + max_input) * 2);
+    reset();
+}
+
+void Resampler::reset() {
+    // Zero history, so the first outputs are the kernel's fade in
+    std::fill(buffer_.begin(), buffer_.end(), 0.0f);
+    length_ = taps_ - 1;
+    remainder_ = 0;
+}
+
+int Resampler::input_needed(int out_frames) const {
+    if (out_frames <= 0) return 0;
+    // Window start of the last output frame, plus its taps
+    int64_t last = (remainder_ + (int64_t)(out_frames - 1) * in_rate_) / out_rate_;
+    return (int)std::max<int64_t>(0, last + taps_ - length_);
+}
+
+float* Resampler::input(int in_frames) {
+    float* dest = buffer_.data() + (size_t)length_ * 2;
+    length_ += in_frames;
+    return dest;
+}
+
+void Resampler::process(float* left, float* right, int out_frames) {
+    const float* x = buffer_.data();
+    const int taps = taps_;
+    float* kernel = kernel_.data();
+    int64_t rem = remainder_;
+
+    for (int j = 0; j < out_frames; ++j) {
+        int64_t start = rem / out_rate_;
+        double pos = (double)(rem - start * out_rate_) / out_rate_ * RESAMPLER_PHASES;
+        int p = (int)pos;
+        float frac = (float)(pos - p);
+
+        const float* c0 = coeffs_.data() + (size_t)p * taps;
+        const float* c1 = c0 + taps;
+        #pragma omp simd
+        for (int k = 0; k < taps; ++k) kernel[k] = c0[k] + frac * (c1[k] - c0[k]);
+
+        const float* w = x + start * 2;
+        float l = 0.0f, r = 0.0f;
+        #pragma omp simd reduction(+:l, r)
+        for (int k = 0; k < taps; ++k) {
+            l += w[k * 2] * kernel[k];
+            r += w[k * 2 + 1] * kernel[k];
+        }
+        left[j] = l;
+        right[j] = r;
+        rem += in_rate_;
+    }
+
+    // Drop the frames no later output needs
+    int64_t consumed = rem / out_rate_;
+    remainder_ = rem - consumed * out_rate_;
+    length_ -= (int)consumed;
+    std::memmove(buffer_.data(), buffer_.data() + consumed * 2, (size_t)length_ * 2 * sizeof(float));
+}
@@ -0,0 +1,147 @@
+#include "../include/shm_tap.h"
+#include "../include/defs.h"
+#include "../include/log.h"
+#include <algorithm>
+#include <cstring>
+#include <new>
+
+#if defined(__unix__) || defined(__APPLE__)
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <unistd.h>
+#define SHM_TAP_SUPPORTED 1
+#else
+#define SHM_TAP_SUPPORTED 0
+#endif
+
+static_assert(sizeof(ShmTapHeader) == 192, "Header layout is shared with control/shm_tap.py");
+
+// Copies frames * channels floats into a ring at frame position pos (wraps once at most)
+static void ring_write(float* ring, uint64_t mask, int channels, uint64_t pos, const float* src, int frames) {
+    uint64_t capacity = mask + 1;
+    uint64_t start = pos & mask;
+    uint64_t first = std::min<uint64_t>((uint64_t)frames, capacity - start);
+
+    std::memcpy(ring + start * channels, src, first * channels * sizeof(float));
+    if (first < (uint64_t)frames) {
+        std::memcpy(ring, src + first * channels, (frames - first) * channels * sizeof(float));
+    }
+}
+
+static void ring_clear(float* ring, uint64_t mask, int channels, uint64_t pos, int frames) {
+    uint64_t capacity = mask + 1;
+    uint64_t start = pos & mask;
+    uint64_t first = std::min<uint64_t>((uint64_t)frames, capacity - start);
+
+    std::memset(ring + start * channels, 0, first * channels * sizeof(float));
+    if (first < (uint64_t)frames) {
+        std::memset(ring, 0, (frames - first) * channels * sizeof(float));
+    }
+}
+
+std::unique_ptr<ShmTap> ShmTap::create(const std::string& name, int capacity, int sample_rate) {
+#if SHM_TAP_SUPPORTED
+    // Readers keep a block of margin behind the cursor, the ring must hold at least one more
+    if (capacity < 2 * MAX_BLOCK_FRAMES || (capacity & (capacity - 1)) != 0) {
+        engine_log(LOG_WARNING, "Tap capacity must be a power of 2 >= %d (got %d)", 2 * MAX_BLOCK_FRAMES, capacity);
+        return nullptr;
+    }
+
+    // POSIX names start with '/', Python's SharedMemory adds it the same way
+    std::string shm_name = (!name.empty() && name[0] == '/') ? name : "/" + name;
+
+    size_t out_bytes = (size_t)capacity * 2 * sizeof(float);
+    size_t vis_bytes = (size_t)capacity * sizeof(float);
+    size_t size = sizeof(ShmTapHeader) + out_bytes + vis_bytes;
+
+    int fd = shm_open(shm_name.c_str(), O_CREAT | O_RDWR, 0600);
+    if (fd < 0) {
+        engine_log(LOG_WARNING, "Cannot create shared memory tap '%s'", shm_name.c_str());
+        return nullptr;
+    }
+    if (ftruncate(fd, (off_t)size) != 0) {
+        close(fd);
+        shm_unlink(shm_name.c_str());
+        engine_log(LOG_WARNING, "Cannot size shared memory tap '%s'", shm_name.c_str());
+        return nullptr;
+    }
+
+    void* base = mmap(nullptr, size, PROT_READ | PROT_WRITE, MAP_SHARED, fd, 0);
+    close(fd);
+    if (base == MAP_FAILED) {
+        shm_unlink(shm_name.c_str());
+        engine_log(LOG_WARNING, "Cannot map shared memory tap '%s'", shm_name.c_str());
+        return nullptr;
+    }
+    std::memset(base, 0, size);
+
+    std::unique_ptr<ShmTap> tap(new ShmTap());
+    tap->name_ = shm_name;
+    tap->base_ = base;
+    tap->size_ = size;
+    tap->mask_ = (uint64_t)capacity - 1;
+
+    ShmTapHeader* h = new (base) ShmTapHeader();
+    std::memcpy(h->magic, SHM_TAP_MAGIC, sizeof(h->magic));
+    h->version = SHM_TAP_VERSION;
+    h->sample_rate = (uint32_t)sample_rate;
+    h->capacity = (uint32_t)capacity;
+    h->out_channels = 2;
+    h->out_offset = sizeof(ShmTapHeader);
+    h->vis_offset = sizeof(ShmTapHeader) + out_bytes;
+    h->max_block = MAX_BLOCK_FRAMES;
+    h->out_write.store(0, std::memory_order_relaxed);
+    h->vis_write.store(0, std::memory_order_release);
+
+    tap->header_ = h;
+    tap->out_ = reinterpret_cast<float*>((char*)base + h->out_offset);
+    tap->vis_ = reinterpret_cast<float*>((char*)base + h->vis_offset);
+    return tap;
+#else
+    (void)name; (void)capacity; (void)sample_rate;
+    engine_log(LOG_WARNING, "Shared memory tap is not supported on this platform");
+    return nullptr;
+#endif
+}
+
+ShmTap::~ShmTap() {
+#if SHM_TAP_SUPPORTED
+    if (base_) {
+        munmap(base_, size_);
+        shm_unlink(name_.c_str());      // Readers keep their mapping until they close it
+    }
+#endif
+}
+
+void ShmTap::write_output(const float* left, const float* right, int num_frames) {
+    uint64_t pos = header_->out_write.load(std::memory_order_relaxed);
+    uint64_t start = pos & mask_;
+    int first = (int)std::min<uint64_t>((uint64_t)num_frames, mask_ + 1 - start);
+
+    float* dst = out_ + start * 2;
+    for (int i = 0; i < first; ++i) {
+        dst[i * 2] = left[i];
+        dst[i * 2 + 1] = right[i];
+    }
+    for (int i = first; i < num_frames; ++i) {
+        out_[(i - first) * 2] = left[i];
+        out_[(i - first) * 2 + 1] = right[i];
+    }
+    header_->out_write.store(pos + num_frames, std::memory_order_release);
+}
+
+void ShmTap::write_visual(const float* mono, int num_frames) {
+    uint64_t pos = header_->vis_write.load(std::memory_order_relaxed);
+    ring_write(vis_, mask_, 1, pos, mono, num_frames);
+    header_->vis_write.store(pos + num_frames, std::memory_order_release);
+}
+
+void ShmTap::write_silence(int num_frames) {
+    uint64_t pos = header_->out_write.load(std::memory_order_relaxed);
+    ring_clear(out_, mask_, 2, pos, num_frames);
+    header_->out_write.store(pos + num_frames, std::memory_order_release);
+
+    pos = header_->vis_write.load(std::memory_order_relaxed);
+    ring_clear(vis_, mask_, 1, pos, num_frames);
+    header_->vis_write.store(pos + num_frames, std::memory_order_release);
+}
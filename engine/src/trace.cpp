@@ -0,0 +1,156 @@
+#include "../include/trace.h"
+#include "../include/log.h"
+#include <algorithm>
+#include <chrono>
+#include <cstdio>
+#include <thread>
+
+uint64_t trace_now_ns() {
+    return (uint64_t)std::chrono::duration_cast<std::chrono::nanoseconds>(
+        std::chrono::steady_clock::now().time_since_epoch()).count();
+}
+
+Tracer& tracer() {
+    static Tracer instance;
+    return instance;
+}
+
+void Tracer::start(size_t capacity_per_thread) {
+    std::lock_guard<std::mutex> lock(control_mutex_);
+    stop();
+
+    // Buffers are only touched by writers inside record(), wait for the last one to leave
+    while (in_flight_.load() > 0) std::this_thread::yield();
+
+    if (capacity_per_thread != capacity_) {
+        for (ThreadBuffer& b : buffers_) b.events.reset();
+        capacity_ = capacity_per_thread;
+    }
+    for (ThreadBuffer& b : buffers_) {
+        if (!b.events && capacity_ > 0) b.events.reset(new TraceEvent[capacity_]);
+        b.count.store(0, std::memory_order_relaxed);
+        b.name.store(nullptr, std::memory_order_relaxed);
+    }
+
+    next_slot_.store(0, std::memory_order_relaxed);
+    dropped_.store(0, std::memory_order_relaxed);
+    generation_.fetch_add(1, std::memory_order_relaxed);
+    origin_ns_ = trace_now_ns();
+    recording_.store(true, std::memory_order_release);
+}
+
+void Tracer::stop() {
+    recording_.store(false);
+}
+
+// Slot of the calling thread in this capture, claimed on its first event
+Tracer::ThreadBuffer* Tracer::thread_buffer() {
+    thread_local int slot = -1;
+    thread_local uint32_t slot_generation = 0;
+
+    uint32_t gen = generation_.load(std::memory_order_relaxed);
+    if (slot_generation != gen) {
+        slot = next_slot_.fetch_add(1, std::memory_order_relaxed);
+        slot_generation = gen;
+    }
+    return (slot >= 0 && slot < MAX_TRACE_THREADS) ? &buffers_[slot] : nullptr;
+}
+
+// in_flight_ / recording_ are sequentially consistent: start() clears the flag, then waits
+// until no writer that could have seen it set is left
+void Tracer::record(const char* name, uint64_t start_ns, uint64_t end_ns) {
+    in_flight_.fetch_add(1);
+
+    if (recording_.load()) {
+        ThreadBuffer* b = thread_buffer();
+        size_t n = b ? b->count.load(std::memory_order_relaxed) : capacity_;
+
+        if (n < capacity_) {
+            TraceEvent& e = b->events[n];
+            e.name = name;
+            e.start_ns = start_ns;
+            e.dur_ns = end_ns > start_ns ? end_ns - start_ns : 0;
+            b->count.store(n + 1, std::memory_order_release);
+        } else {
+            dropped_.fetch_add(1, std::memory_order_relaxed);
+        }
+    }
+
+    in_flight_.fetch_sub(1);
+}
+
+void Tracer::name_thread(const char* name) {
+    in_flight_.fetch_add(1);
+    if (recording_.load()) {
+        ThreadBuffer* b = thread_buffer();
+        if (b && !b->name.load(std::memory_order_relaxed)) b->name.store(name, std::memory_order_relaxed);
+    }
+    in_flight_.fetch_sub(1);
+}
+
+const char* Tracer::intern(const std::string& name) {
+    std::lock_guard<std::mutex> lock(control_mutex_);
+    for (const std::string& s : names_) {
+        if (s == name) return s.c_str();
+    }
+    names_.push_back(name);
+    return names_.back().c_str();
+}
+
+// Names are literals from this code base or interned Python names, quotes / backslashes escaped
+static void write_json_string(FILE* f, const char* s) {
+    std::fputc('"', f);
+    for (; *s; ++s) {
+        if (*s == '"' || *s == '\\') std::fputc('\\', f);
+        if ((unsigned char)*s < 0x20) continue;
+        std::fputc(*s, f);
+    }
+    std::fputc('"', f);
+}
+
+bool Tracer::dump(const std::string& path) {
+    std::lock_guard<std::mutex> lock(control_mutex_);
+
+    FILE* f = std::fopen(path.c_str(), "w");
+    if (!f) {
+        engine_log(LOG_WARNING, "Cannot write trace: %s", path.c_str());
+        return false;
+    }
+
+    std::fprintf(f, "{\"displayTimeUnit\": \"ms\", \"traceEvents\": [\n");
+    bool first = true;
+    int threads = std::min(next_slot_.load(std::memory_order_relaxed), MAX_TRACE_THREADS);
+
+    for (int t = 0; t < threads; ++t) {
+        ThreadBuffer& b = buffers_[t];
+
+        // Thread label (metadata event)
+        const char* name = b.name.load(std::memory_order_relaxed);
+        char fallback[32];
+        if (!name) {
+            std::snprintf(fallback, sizeof(fallback), "thread %d", t);
+            name = fallback;
+        }
+        std::fprintf(f, "%s{\"name\": \"thread_name\", \"ph\": \"M\", \"pid\": 1, \"tid\": %d, \"args\": {\"name\": ",
+                     first ? "" : ",\n", t);
+        write_json_string(f, name);
+        std::fprintf(f, "}}");
+        first = false;
+
+        // Complete events, microseconds from the capture start
+        size_t n = b.count.load(std::memory_order_acquire);
+        for (size_t i = 0; i < n; ++i) {
+            const TraceEvent& e = b.events[i];
+            double ts = e.start_ns >= origin_ns_ ? (double)(e.start_ns - origin_ns_) * 1e-3 : 0.0;
+            std::fprintf(f, ",\n{\"name\": ");
+            write_json_string(f, e.name);
+            std::fprintf(f, ", \"ph\": \"X\", \"pid\": 1, \"tid\": %d, \"ts\": %.3f, \"dur\": %.3f}",
+                         t, ts, (double)e.dur_ns * 1e-3);
+        }
+    }
+
+    std::fprintf(f, "\n]}\n");
+    bool ok = std::ferror(f) == 0;
+    std::fclose(f);
+    return ok;
+}
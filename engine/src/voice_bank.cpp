@@ -0,0 +1,539 @@
+#include "../include/voice_bank.h"
+#include "../include/trace.h"
+#include <algorithm>
+#include <cstring>
+#include <cmath>
+
+#ifndef M_PI
+#define M_PI 3.14159265358979323846
+#endif
+
+size_t VoiceBank::scratch_floats() {
+    return 2 * ScratchArena::footprint(CHUNK_FRAMES * MAX_VOICES) + 3 * ScratchArena::footprint(CHUNK_FRAMES);
+}
+
+VoiceBank::VoiceBank(WavetableManager& wm, ScratchArena& arena, int _sample_rate) :
+    wt_manager(wm),
+    sample_rate(_sample_rate),
+    amp_env(_sample_rate)
+    {
+        for (int v = 0; v < MAX_VOICES; ++v) {
+            note[v] = -1;
+            for (int s = 0; s < NUM_OSCS; ++s) table[s][v] = -1;
+        }
+        osc[0].mix.snap(1.0f);
+
+        // One chunk each, render never allocates
+        mix_buffer = arena.take(CHUNK_FRAMES * MAX_VOICES);
+        env_buffer = arena.take(CHUNK_FRAMES * MAX_VOICES);
+        uni_left = arena.take(CHUNK_FRAMES);
+        uni_right = arena.take(CHUNK_FRAMES);
+        temp_osc_buffer = arena.take(CHUNK_FRAMES);
+        amp_env.set_params(env_attack, env_decay, env_sustain, env_release);
+}
+
+float VoiceBank::mtof(float note) {
+    return 440.0f * std::pow(2.0f, (note - 69.0f) / 12.0f);
+}
+
+// Per frame increment ratio that sweeps freq_from to freq_to over the chunk (1 when steady)
+static inline double sweep_ratio(float freq_from, float freq_to, int num_frames) {
+    if (freq_from == freq_to) return 1.0;
+    return std::pow((double)freq_to / (double)freq_from, 1.0 / (double)num_frames);
+}
+
+/*
+    Voice management
+*/
+
+void VoiceBank::note_on(int _note, float _velocity) {
+    int v = 0;      // Redo, temporary method: steal the first voice when all are busy
+    for (int i = 0; i < MAX_VOICES; ++i) {
+        if (!active[i]) {
+            v = i;
+            break;
+        }
+    }
+
+    // Portamento starts where the last note is now (or was headed, once its voice is gone).
+    // Legato only glides when some key is still down
+    float from = (float)_note;
+    if (glide_mode != GLIDE_OFF && glide_time > 0.0f && last_pitch >= 0.0f) {
+        bool held = false;
+        for (int i = 0; i < MAX_VOICES; ++i) held = held || (active[i] && amp_env.isHeld(i));
+        if (glide_mode == GLIDE_ALWAYS || held) {
+            from = (last_voice >= 0 && active[last_voice]) ? pitch[last_voice].value : last_pitch;
+        }
+    }
+    pitch[v].snap(from);
+    pitch[v].target = (float)_note;
+    pitch[v].time = glide_time;
+    last_voice = v;
+    last_pitch = (float)_note;
+
+    note[v] = _note;
+    velocity[v] = _velocity;
+    active[v] = true;
+
+    // Seed makes the unison start phases reproducible (same note -> same phases),
+    // so recorded automation replays bit-exact regardless of what was played before
+    uint32_t seed = (uint32_t)_note * 2654435761u;
+    for (int s = 0; s < NUM_OSCS; ++s) {
+        table[s][v] = osc[s].table_id;
+        phase[s][v] = 0.0;
+
+        // Random start phases (deterministic LCG), otherwise all unison voices start in phase
+        // and sound like one loud voice
+        uint32_t state = seed ^ (uint32_t)(s + 1);
+        float* uni = uni_phases[s][v];
+        uni[0] = 0.0f;
+        for (int u = 1; u < MAX_UNISON; ++u) {
+            state = state * 1664525u + 1013904223u;
+            uni[u] = (float)(state >> 8) / 16777216.0f;
+        }
+    }
+
+    amp_env.gate(v, true);
+}
+
+void VoiceBank::note_off(int _note) {
+    for (int v = 0; v < MAX_VOICES; ++v) {
+        if (active[v] && note[v] == _note) amp_env.gate(v, false);
+    }
+}
+
+// Drops the voice immediately (silence detection, replay reset)
+void VoiceBank::retire(int v) {
+    amp_env.reset(v);
+    active[v] = false;
+    note[v] = -1;
+}
+
+void VoiceBank::retire_all() {
+    for (int v = 0; v < MAX_VOICES; ++v) retire(v);
+
+    // Next note starts without a glide, so replays don't depend on what was played before
+    last_voice = -1;
+    last_pitch = -1.0f;
+}
+
+int VoiceBank::active_count() const {
+    int count = 0;
+    for (int v = 0; v < MAX_VOICES; ++v) {
+        if (active[v]) ++count;
+    }
+    return count;
+}
+
+// Params that glide instead of stepping, nullptr for the rest
+SmoothedParam* VoiceBank::smoothed_param(int param_id) {
+    switch(param_id) {
+        case OSC1_MIX:          return &osc[0].mix;
+        case OSC1_PITCH:        return &osc[0].semi;
+        case OSC1_DETUNE:       return &osc[0].detune;
+        case OSC1_UNI_DETUNE:   return &osc[0].uni_detune;
+        case OSC1_UNI_SPREAD:   return &osc[0].uni_spread;
+        case OSC1_POS:          return &osc[0].position;
+
+        case OSC2_MIX:          return &osc[1].mix;
+        case OSC2_PITCH:        return &osc[1].semi;
+        case OSC2_DETUNE:       return &osc[1].detune;
+        case OSC2_UNI_DETUNE:   return &osc[1].uni_detune;
+        case OSC2_UNI_SPREAD:   return &osc[1].uni_spread;
+        case OSC2_POS:          return &osc[1].position;
+
+        case OSC3_MIX:          return &osc[2].mix;
+        case OSC3_PITCH:        return &osc[2].semi;
+        case OSC3_DETUNE:       return &osc[2].detune;
+        case OSC3_UNI_DETUNE:   return &osc[2].uni_detune;
+        case OSC3_UNI_SPREAD:   return &osc[2].uni_spread;
+        case OSC3_POS:          return &osc[2].position;
+
+        case PITCH_BEND:        return &bend;
+
+        default: return nullptr;
+    }
+}
+
+void VoiceBank::set_param(int param_id, float value, bool smooth) {
+    bool update_env = false;
+    switch(param_id) {
+
+        // Osc1:
+        case OSC1_TYPE:     osc[0].table_id = (int)value; break;
+        case OSC1_UNISON:       osc[0].unison = std::max(1, std::min(MAX_UNISON, (int)std::lround(value))); break;
+        case OSC1_INTERP:       osc[0].interp = std::max(0, std::min(INTERP_COUNT - 1, (int)std::lround(value))); break;
+
+        // Osc2:
+        case OSC2_TYPE:     osc[1].table_id = (int)value; break;
+        case OSC2_UNISON:       osc[1].unison = std::max(1, std::min(MAX_UNISON, (int)std::lround(value))); break;
+        case OSC2_INTERP:       osc[1].interp = std::max(0, std::min(INTERP_COUNT - 1, (int)std::lround(value))); break;
+
+        // Osc3:
+        case OSC3_TYPE:     osc[2].table_id = (int)value; break;
+        case OSC3_UNISON:       osc[2].unison = std::max(1, std::min(MAX_UNISON, (int)std::lround(value))); break;
+        case OSC3_INTERP:       osc[2].interp = std::max(0, std::min(INTERP_COUNT - 1, (int)std::lround(value))); break;
+
+        // Unison and position ranges
+        case OSC1_UNI_DETUNE: case OSC2_UNI_DETUNE: case OSC3_UNI_DETUNE:
+            value = std::max(0.0f, value);
+            break;
+        case OSC1_UNI_SPREAD: case OSC2_UNI_SPREAD: case OSC3_UNI_SPREAD:
+        case OSC1_POS: case OSC2_POS: case OSC3_POS:
+            value = std::max(0.0f, std::min(1.0f, value));
+            break;
+
+        // Pitch: the bend glides in semitones, so the range scales it
+        case GLIDE_TIME:    glide_time = std::max(0.0f, value); break;
+        case GLIDE_MODE:    glide_mode = std::max(0, std::min(GLIDE_MODE_COUNT - 1, (int)std::lround(value))); break;
+        case PITCH_BEND:
+            bend_amount = std::max(-1.0f, std::min(1.0f, value));
+            value = bend_amount * bend_range;
+            break;
+        case BEND_RANGE:
+            bend_range = std::max(0.0f, std::min(MAX_BEND_RANGE, value));
+            if (smooth && active_count() > 0) bend.target = bend_amount * bend_range;
+            else bend.snap(bend_amount * bend_range);
+            break;
+
+        // ADSR:
+        case AMP_ATTACK:    env_attack = value; update_env = true; break;
+        case AMP_DECAY:     env_decay = value; update_env = true; break;
+        case AMP_SUSTAIN:   env_sustain = value; update_env = true; break;
+        case AMP_RELEASE:   env_release = value; update_env = true; break;
+
+        default: break;
+    }
+
+    if (update_env) {
+        amp_env.set_params(env_attack, env_decay, env_sustain, env_release, -1.0f);
+    }
+
+    // Nothing sounding: no glide to hear, the next note starts at the new value
+    if (SmoothedParam* p = smoothed_param(param_id)) {
+        if (smooth && active_count() > 0) p->target = value;
+        else p->snap(value);
+    }
+}
+
+bool VoiceBank::set_smoothing(int param_id, float ms) {
+    SmoothedParam* p = smoothed_param(param_id);
+    if (!p) return false;
+    p->time = std::max(0.0f, ms) * 0.001f;
+    return true;
+}
+
+void VoiceBank::settle() {
+    for (int s = 0; s < NUM_OSCS; ++s) {
+        OscParams& o = osc[s];
+        o.mix.snap(o.mix.target);
+        o.semi.snap(o.semi.target);
+        o.detune.snap(o.detune.target);
+        o.uni_detune.snap(o.uni_detune.target);
+        o.uni_spread.snap(o.uni_spread.target);
+        o.position.snap(o.position.target);
+    }
+    bend.snap(bend.target);
+}
+
+/*
+    Rendering
+*/
+
+void VoiceBank::render(float* left_out, float* right_out, int num_frames) {
+    for (int offset = 0; offset < num_frames; offset += CHUNK_FRAMES) {
+        int len = std::min(CHUNK_FRAMES, num_frames - offset);
+        render_chunk(left_out + offset, right_out + offset, len);
+    }
+}
+
+void VoiceBank::render_chunk(float* left_out, float* right_out, int num_frames) {
+    // Lanes: voices still sounding, in voice order
+    num_lanes = 0;
+    for (int v = 0; v < MAX_VOICES; ++v) {
+        if (!active[v]) continue;
+        if (!amp_env.isActive(v)) {
+            active[v] = false;
+            continue;
+        }
+        lanes[num_lanes++] = v;
+    }
+    if (num_lanes == 0) {
+        settle();
+        return;
+    }
+
+    // Glides advance once per chunk: unison and position values step to the chunk end value
+    // (phases stay continuous), mixes ramp per sample over the chunk and pitches (portamento,
+    // bend, tuning) sweep exponentially from the chunk start to the chunk end value
+    for (int k = 0; k < num_lanes; ++k) {
+        SmoothedParam& p = pitch[lanes[k]];
+        freq_from[k] = mtof(p.value);
+        freq_to[k] = p.moving() ? mtof(p.advance(num_frames, sample_rate)) : freq_from[k];
+    }
+    float bend_from = bend.value;
+    float bend_to = bend.advance(num_frames, sample_rate);
+
+    // Plain slots of all lanes go through one batched pass, unison slots (and every slot when only
+    // a few lanes sound, where the batch costs more than it saves) are rendered lane by lane
+    bool batched = num_lanes > FEW_LANES;
+    bool plain_on[NUM_OSCS];
+    bool lane_on[NUM_OSCS];
+    bool any_plain = false;
+    bool any_lane = false;
+    for (int s = 0; s < NUM_OSCS; ++s) {
+        OscParams& o = osc[s];
+        mix_start[s] = o.mix.value;
+        float mix_end = o.mix.advance(num_frames, sample_rate);
+        mix_inc[s] = (mix_end - mix_start[s]) / (float)num_frames;
+
+        float semis_from = o.semi.value + o.detune.value + bend_from;
+        float semis_to = o.semi.advance(num_frames, sample_rate) + o.detune.advance(num_frames, sample_rate) + bend_to;
+        tune_from[s] = std::pow(2.0f, semis_from / 12.0f);
+        tune_to[s] = semis_to == semis_from ? tune_from[s] : std::pow(2.0f, semis_to / 12.0f);
+
+        o.uni_detune.advance(num_frames, sample_rate);
+        o.uni_spread.advance(num_frames, sample_rate);
+        o.position.advance(num_frames, sample_rate);
+
+        bool on = std::max(mix_start[s], mix_end) >= 0.001f && o.table_id >= 0;
+        plain_on[s] = on && batched && o.unison <= 1;
+        lane_on[s] = on && !plain_on[s];
+        any_plain = any_plain || plain_on[s];
+        any_lane = any_lane || lane_on[s];
+    }
+
+    // Curves of all lanes, frame-major like the mix
+    float* env = env_buffer;
+    {
+        TRACE_SCOPE("envelopes");
+        for (int k = 0; k < num_lanes; ++k) {
+            amp_env.process(lanes[k], env + k, MAX_VOICES, num_frames);
+        }
+    }
+
+    // Stereo pan, using Equal-Power method (cos / sin based) instead of linear
+    // For example, linear gives 0.5² + 0.5² = 0.5 gain at center, it is too silent
+    // Equal-power gives a 0.707² + 0.707² = 1 at center so it is much more realistic
+    float pan_clamped = std::max(-1.0f, std::min(1.0f, pan));
+    float angle = (pan_clamped + 1.0f) * (M_PI / 4.0f);
+    float l_gain = std::cos(angle);
+    float r_gain = std::sin(angle);
+
+    // Mono: all lanes of a plain slot in one batched pass
+    float* mix = mix_buffer;
+    if (any_plain) {
+        {
+            TRACE_SCOPE("oscillators");
+            std::memset(mix, 0, (size_t)num_frames * MAX_VOICES * sizeof(float));
+            render_mono(num_frames, plain_on);
+        }
+
+        TRACE_SCOPE("env_pan_mix");
+        for (int i = 0; i < num_frames; ++i) {
+            float* row = mix + (size_t)i * MAX_VOICES;
+            const float* env_row = env + (size_t)i * MAX_VOICES;
+
+            #pragma omp simd
+            for (int k = 0; k < num_lanes; ++k) row[k] *= env_row[k];
+        }
+    }
+
+    // Silence detection: inaudible release tail is not worth rendering further.
+    // Retired lanes are left out of the bus through a zero gain
+    alignas(64) float lane_l[MAX_VOICES];
+    alignas(64) float lane_r[MAX_VOICES];
+    for (int k = 0; k < num_lanes; ++k) {
+        lane_l[k] = l_gain;
+        lane_r[k] = r_gain;
+
+        int v = lanes[k];
+        bool releasing = amp_env.isReleasing(v);
+
+        float peak = 0.0f;
+        if (any_plain && releasing) {
+            for (int i = 0; i < num_frames; ++i) {
+                peak = std::max(peak, std::fabs(mix[(size_t)i * MAX_VOICES + k]));
+            }
+        }
+
+        const float* out_l = uni_left;
+        const float* out_r = uni_left;
+        if (any_lane) {
+            TRACE_SCOPE("voice_lanes");
+            if (render_lane(k, num_frames, lane_on)) out_r = uni_right;
+
+            if (releasing) {
+                #pragma omp simd reduction(max:peak)
+                for (int i = 0; i < num_frames; ++i) {
+                    peak = std::max(peak, std::max(std::fabs(out_l[i]), std::fabs(out_r[i])));
+                }
+            }
+        }
+
+        if (releasing && peak < SILENCE_THRESHOLD) {
+            retire(v);
+            lane_l[k] = 0.0f;
+            lane_r[k] = 0.0f;
+            continue;
+        }
+
+        if (any_lane) {
+            for (int i = 0; i < num_frames; ++i) {
+                left_out[i] += out_l[i] * l_gain;
+                right_out[i] += out_r[i] * r_gain;
+            }
+        }
+    }
+
+    if (!any_plain) return;
+
+    // Accumulate to global bus
+    for (int i = 0; i < num_frames; ++i) {
+        const float* row = mix + (size_t)i * MAX_VOICES;
+        float l = left_out[i];
+        float r = right_out[i];
+        for (int k = 0; k < num_lanes; ++k) {
+            l += row[k] * lane_l[k];
+            r += row[k] * lane_r[k];
+        }
+        left_out[i] = l;
+        right_out[i] = r;
+    }
+}
+
+void VoiceBank::render_mono(int num_frames, const bool* osc_on) {
+    alignas(64) float scale[MAX_VOICES];
+    for (int k = 0; k < num_lanes; ++k) {
+        int v = lanes[k];
+        scale[k] = velocity[v] * gain * 0.33f;      // Scaling to reduce clipping
+    }
+
+    alignas(64) double phases[MAX_VOICES];
+    alignas(64) double incs[MAX_VOICES];
+    alignas(64) double ratios[MAX_VOICES];
+    alignas(64) float amps[MAX_VOICES];
+    alignas(64) float amp_incs[MAX_VOICES];
+
+    for (int s = 0; s < NUM_OSCS; ++s) {
+        if (!osc_on[s]) continue;
+
+        float mix_peak = std::max(mix_start[s], mix_start[s] + mix_inc[s] * num_frames);
+        int k = 0;
+        while (k < num_lanes) {
+            int tid = table[s][lanes[k]];
+            if (tid < 0 || mix_peak * scale[k] < 0.001f) {
+                ++k;
+                continue;
+            }
+
+            // Run of neighbouring lanes on the same table goes through one batched call
+            int start = k;
+            for (; k < num_lanes; ++k) {
+                int v = lanes[k];
+                if (table[s][v] != tid || mix_peak * scale[k] < 0.001f) break;
+
+                float freq = freq_from[k] * tune_from[s];
+                phases[k] = phase[s][v];
+                incs[k] = (double)freq / (double)sample_rate;
+                ratios[k] = sweep_ratio(freq, freq_to[k] * tune_to[s], num_frames);
+                amps[k] = mix_start[s] * scale[k];
+                amp_incs[k] = mix_inc[s] * scale[k];
+            }
+
+            wt_manager.render_batch(tid, phases + start, incs + start, amps + start, amp_incs + start, k - start,
+                                    num_frames, mix_buffer + start, MAX_VOICES, osc[s].interp,
+                                    osc[s].position.value, s, ratios + start);
+
+            for (int j = start; j < k; ++j) phase[s][lanes[j]] = phases[j];
+        }
+    }
+}
+
+// Slots in slot_on of lane k on their own (contiguous buffers), enveloped into uni_left / uni_right.
+// Plain slots are summed into uni_left only: returns false if no unison slot made the lane stereo,
+// then uni_left holds both sides
+bool VoiceBank::render_lane(int k, int num_frames, const bool* slot_on) {
+    int v = lanes[k];
+    float* out_l = uni_left;
+    float* out_r = uni_right;
+    float* temp = temp_osc_buffer;
+
+    std::memset(out_l, 0, num_frames * sizeof(float));
+    bool stereo = false;
+
+    float scale = velocity[v] * gain * 0.33f;
+
+    alignas(64) float gains_l[MAX_UNISON];
+    alignas(64) float gains_r[MAX_UNISON];
+    alignas(64) float gain_incs_l[MAX_UNISON];
+    alignas(64) float gain_incs_r[MAX_UNISON];
+    double incs[MAX_UNISON];
+
+    for (int s = 0; s < NUM_OSCS; ++s) {
+        if (!slot_on[s]) continue;
+
+        int tid = table[s][v];
+        float mix_level = mix_start[s] * scale;
+        float level_inc = mix_inc[s] * scale;
+        if (tid < 0 || std::max(mix_level, mix_level + level_inc * num_frames) < 0.001f) continue;
+
+        float freq = freq_from[k] * tune_from[s];
+        double inc_ratio = sweep_ratio(freq, freq_to[k] * tune_to[s], num_frames);
+        int unison = osc[s].unison;
+
+        if (unison <= 1) {
+            // Mono osc feeds both sides
+            wt_manager.render(tid, phase[s][v], (double)freq / (double)sample_rate, num_frames,
+                              (double)mix_level, level_inc, temp, osc[s].interp, osc[s].position.value, s, inc_ratio);
+            for (int i = 0; i < num_frames; ++i) out_l[i] += temp[i];
+            if (stereo) {
+                for (int i = 0; i < num_frames; ++i) out_r[i] += temp[i];
+            }
+            continue;
+        }
+
+        // First unison slot splits the sides, mono slots so far go to both
+        if (!stereo) {
+            std::memcpy(out_r, out_l, num_frames * sizeof(float));
+            stereo = true;
+        }
+
+        // 1/sqrt(n) keeps the perceived level close to a single voice
+        float norm = mix_level / std::sqrt((float)unison);
+        float norm_inc = level_inc / std::sqrt((float)unison);
+
+        for (int u = 0; u < unison; ++u) {
+            // Evenly spaced over [-1, 1]
+            float pos = 2.0f * u / (unison - 1) - 1.0f;
+
+            double cents = (double)(pos * osc[s].uni_detune.value);
+            incs[u] = (double)freq * std::pow(2.0, cents / 1200.0) / (double)sample_rate;
+
+            // Equal-power pan, scaled by sqrt(2) so the center voice keeps unity gain like the mono path
+            float uni_angle = (pos * osc[s].uni_spread.value + 1.0f) * (float)(M_PI / 4.0);
+            float pan_l = std::cos(uni_angle);
+            float pan_r = std::sin(uni_angle);
+            gains_l[u] = norm * pan_l * (float)M_SQRT2;
+            gains_r[u] = norm * pan_r * (float)M_SQRT2;
+            gain_incs_l[u] = norm_inc * pan_l * (float)M_SQRT2;
+            gain_incs_r[u] = norm_inc * pan_r * (float)M_SQRT2;
+        }
+
+        wt_manager.render_unison(tid, uni_phases[s][v], incs, gains_l, gains_r, gain_incs_l, gain_incs_r,
+                                 unison, num_frames, out_l, out_r, osc[s].interp, osc[s].position.value, s, inc_ratio);
+    }
+
+    // Curve applying
+    const float* env = env_buffer + k;
+    if (stereo) {
+        for (int i = 0; i < num_frames; ++i) {
+            float env_val = env[(size_t)i * MAX_VOICES];
+            out_l[i] *= env_val;
+            out_r[i] *= env_val;
+        }
+    } else {
+        for (int i = 0; i < num_frames; ++i) out_l[i] *= env[(size_t)i * MAX_VOICES];
+    }
+    return stereo;
+}
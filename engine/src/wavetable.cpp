@@ -1,129 +1,1134 @@
 #include "../include/wavetable.h"
+#include "../include/defs.h"
+#include "../include/log.h"
+#include "../include/utils.h"
+#include "../include/trace.h"
 #include <fstream>
 #include <iostream>
 #include <algorithm>
 #include <vector>
 #include <cstring>
+#include <thread>
+#include <cstdint>
 
-WavetableManager::WavetableManager(int sample_rate) : sample_rate_(sample_rate) {
-    tables_.reserve(16);
-}
-WavetableManager::~WavetableManager() {}
+#include "../include/analyzer.h"    // FFTW and its planner lock
 
-int WavetableManager::get_table_id(const std::string& name) const {
-    for (const auto& pair : registry_) {
-        if (pair.first == name) return pair.second;
+#ifndef M_PI
+#define M_PI 3.14159265358979323846
+#endif
+
+/*
+    Table construction
+*/
+
+// Flat table from num_mips * num_frames cycles of table_size samples (level-major, frame-major
+// inside a level). Every cycle gets guard samples (copies of the other end of the cycle), so
+// 4-point interpolation reads i-1 .. i+2 without wrap masking
+static std::unique_ptr<FlatWavetable> make_table(const float* cycles, int num_mips, int table_size, int num_frames) {
+    std::unique_ptr<FlatWavetable> table(new FlatWavetable());
+    FlatWavetable& wt = *table;
+    wt.num_mips = num_mips;
+    wt.base_size = table_size;
+    wt.stride = table_size + TABLE_GUARD_FRONT + TABLE_GUARD_BACK;
+    wt.num_frames = num_frames;
+    wt.level_size = num_frames * wt.stride;
+    wt.mip_offsets.resize(num_mips);
+
+    // Frames of a level are back to back, so the whole level is num_cycles guarded cycles in a row
+    size_t num_cycles = (size_t)num_mips * num_frames;
+    wt.data.resize(num_cycles * wt.stride);
+
+    for (size_t c = 0; c < num_cycles; ++c) {
+        const float* src = cycles + c * table_size;
+        float* cycle = wt.data.data() + c * wt.stride;
+
+        for (int g = 0; g < TABLE_GUARD_FRONT; ++g) {
+            cycle[g] = src[table_size - TABLE_GUARD_FRONT + g];
+        }
+        std::memcpy(cycle + TABLE_GUARD_FRONT, src, table_size * sizeof(float));
+        for (int g = 0; g < TABLE_GUARD_BACK; ++g) {
+            cycle[TABLE_GUARD_FRONT + table_size + g] = src[g % table_size];
+        }
     }
-    return -1;
-}
 
-int WavetableManager::load_table(const std::string& name, const std::string& filepath) {
-    int existing = get_table_id(name);
-    if (existing >= 0) return existing;
+    // Offsets point at sample 0 of the level (its first frame), guards sit around it
+    for (int i = 0; i < num_mips; ++i) {
+        wt.mip_offsets[i] = i * wt.level_size + TABLE_GUARD_FRONT;
+    }
 
+    wt.unison_data.assign((size_t)MORPH_SLOTS * wt.stride, 0.0f);
+
+    if (num_frames > 1) {
+        wt.morph_data.assign((size_t)MORPH_SLOTS * num_mips * wt.stride, 0.0f);
+        wt.morph_pos.assign((size_t)MORPH_SLOTS * num_mips, -1.0f);
+        wt.morph_offsets.resize(num_mips);
+        for (int i = 0; i < num_mips; ++i) wt.morph_offsets[i] = i * wt.stride + TABLE_GUARD_FRONT;
+    }
+    return table;
+}
+
+static std::unique_ptr<FlatWavetable> read_wvt(const std::string& name, const std::string& filepath) {
     std::ifstream file(filepath, std::ios::binary);
-    if (!file.is_open()) return -1;
+    if (!file.is_open()) {
+        engine_log(LOG_WARNING, "Cannot open wavetable '%s': %s", name.c_str(), filepath.c_str());
+        return nullptr;
+    }
 
+    // WVT1: one waveform per MIP level, WVT2: num_frames waveforms per level (frame-major)
     char magic[4];
     file.read(magic, 4);
 
-    int32_t num_mips, table_size;
+    int32_t num_mips, table_size, num_frames = 1;
     file.read((char*)& num_mips, 4);
     file.read((char*)&table_size, 4);
+    if (std::memcmp(magic, "WVT2", 4) == 0) {
+        file.read((char*)&num_frames, 4);
+    } else if (std::memcmp(magic, "WVT1", 4) != 0) {
+        engine_log(LOG_WARNING, "Not a wavetable file '%s': %s", name.c_str(), filepath.c_str());
+        return nullptr;
+    }
+    if (!file || num_mips <= 0 || table_size <= 0 || num_frames <= 0) {
+        engine_log(LOG_WARNING, "Bad wavetable header '%s': %s", name.c_str(), filepath.c_str());
+        return nullptr;
+    }
 
-    // Allocate flat memory
-    FlatWavetable wt;
-    wt.num_mips = num_mips;
-    wt.base_size = table_size;
-    wt.mip_offsets.resize(num_mips);
+    std::vector<float> cycles((size_t)num_mips * num_frames * table_size);
+    file.read(reinterpret_cast<char*>(cycles.data()), cycles.size() * sizeof(float));
+    if (!file) {
+        engine_log(LOG_WARNING, "Truncated wavetable '%s': %s", name.c_str(), filepath.c_str());
+        return nullptr;
+    }
+    return make_table(cycles.data(), num_mips, table_size, num_frames);
+}
 
-    // Get general size
-    size_t general = num_mips * table_size;
-    wt.data.resize(general);
+// PCM (8..32 bit) or float WAV, channels averaged to mono
+static bool read_wav_mono(const std::string& path, std::vector<float>& out) {
+    std::ifstream file(path, std::ios::binary);
+    char riff[12];
+    if (!file.read(riff, 12) || std::memcmp(riff, "RIFF", 4) != 0 || std::memcmp(riff + 8, "WAVE", 4) != 0) {
+        return false;
+    }
 
-    file.read(reinterpret_cast<char*>(wt.data.data()), general * sizeof(float));
+    uint16_t format = 0, channels = 0, bits = 0;
+    char id[4];
+    uint32_t size;
+    while (file.read(id, 4) && file.read((char*)&size, 4)) {
+        if (std::memcmp(id, "fmt ", 4) == 0) {
+            if (size < 16) return false;
+            std::vector<char> fmt(size);
+            if (!file.read(fmt.data(), size)) return false;
+            std::memcpy(&format, fmt.data(), 2);
+            std::memcpy(&channels, fmt.data() + 2, 2);
+            std::memcpy(&bits, fmt.data() + 14, 2);
+            // WAVE_FORMAT_EXTENSIBLE: the sub-format GUID starts with the actual format tag
+            if (format == 0xFFFE && size >= 26) std::memcpy(&format, fmt.data() + 24, 2);
+            if (size & 1) file.ignore(1);
+            continue;
+        }
+        if (std::memcmp(id, "data", 4) != 0) {
+            file.ignore(size + (size & 1));
+            continue;
+        }
 
-    // Fill the MIP offsets
-    for (int i = 0; i < num_mips; ++i) {
-        wt.mip_offsets[i] = i * table_size;
-    } 
+        int bytes = bits / 8;
+        bool pcm = (format == 1 && bytes >= 1 && bytes <= 4);
+        bool ieee = (format == 3 && (bytes == 4 || bytes == 8));
+        if (channels == 0 || (!pcm && !ieee)) return false;
 
-    // Save
-    int new_id = (int)tables_.size();
-    tables_.push_back(std::move(wt));
-    registry_.push_back({name, new_id});
+        std::vector<uint8_t> raw(size);
+        file.read((char*)raw.data(), size);
+        size_t frames = (size_t)file.gcount() / ((size_t)bytes * channels);
+        out.assign(frames, 0.0f);
 
+        const float scale = 1.0f / (float)channels;
+        const uint8_t* p = raw.data();
+        for (size_t f = 0; f < frames; ++f) {
+            float sum = 0.0f;
+            for (int c = 0; c < channels; ++c, p += bytes) {
+                if (ieee && bytes == 4) { float v; std::memcpy(&v, p, 4); sum += v; }
+                else if (ieee) { double v; std::memcpy(&v, p, 8); sum += (float)v; }
+                else if (bytes == 1) sum += ((int)p[0] - 128) / 128.0f;
+                else if (bytes == 2) { int16_t v; std::memcpy(&v, p, 2); sum += v / 32768.0f; }
+                else if (bytes == 3) sum += (float)((int32_t)((uint32_t)p[0] << 8 | (uint32_t)p[1] << 16 | (uint32_t)p[2] << 24) >> 8) / 8388608.0f;
+                else { int32_t v; std::memcpy(&v, p, 4); sum += v / 2147483648.0f; }
+            }
+            out[f] = sum * scale;
+        }
+        return frames > 0;
+    }
+    return false;
+}
+
+// MIP chain of one cycle of any length: forward FFT once, then per level the harmonics that fit the
+// octave (with the sigma approximation of tools/wavemanager.py) go through one inverse FFT at
+// SINGLE_CYCLE_SIZE, which resamples the cycle at the same time. DC is removed, levels are peak normalized
+static std::unique_ptr<FlatWavetable> band_limit_cycle(const float* samples, int length) {
+    const int size = SINGLE_CYCLE_SIZE;
+    const int in_bins = length / 2 + 1;
+    const int out_bins = size / 2 + 1;
+
+    float* in = fftwf_alloc_real(length);
+    fftwf_complex* spectrum = fftwf_alloc_complex(in_bins);
+    fftwf_complex* level = fftwf_alloc_complex(out_bins);
+    float* out = fftwf_alloc_real(size);
+
+    // Estimated plans: one-off transforms, measuring would cost more than it saves
+    fftwf_plan forward, inverse;
+    {
+        std::lock_guard<std::mutex> planner(fftw_planner_mutex());
+        forward = fftwf_plan_dft_r2c_1d(length, in, spectrum, FFTW_ESTIMATE);
+        inverse = fftwf_plan_dft_c2r_1d(size, level, out, FFTW_ESTIMATE);
+    }
+
+    std::memcpy(in, samples, length * sizeof(float));
+    fftwf_execute(forward);
+
+    // Highest harmonic below the Nyquist of both the input and the table
+    const int max_input = std::min((length - 1) / 2, size / 2 - 1);
+
+    std::vector<float> cycles((size_t)SINGLE_CYCLE_MIPS * size);
+    for (int m = 0; m < SINGLE_CYCLE_MIPS; ++m) {
+        int max_harmonic = std::min(max_input, std::max(1, (size / 2) >> m));
+
+        std::memset(level, 0, out_bins * sizeof(fftwf_complex));
+        for (int k = 1; k <= max_harmonic; ++k) {
+            float sigma = 1.0f;
+            if (k > 1) {
+                double x = M_PI * k / (max_harmonic + 1);
+                sigma = (float)(std::sin(x) / x);
+            }
+            level[k][0] = spectrum[k][0] * sigma;
+            level[k][1] = spectrum[k][1] * sigma;
+        }
+        fftwf_execute(inverse);
+
+        float peak = 0.0f;
+        for (int i = 0; i < size; ++i) peak = std::max(peak, std::fabs(out[i]));
+        float norm = (peak > 1e-9f) ? 1.0f / peak : 0.0f;
+
+        float* dst = cycles.data() + (size_t)m * size;
+        for (int i = 0; i < size; ++i) dst[i] = out[i] * norm;
+    }
+
+    {
+        std::lock_guard<std::mutex> planner(fftw_planner_mutex());
+        fftwf_destroy_plan(forward);
+        fftwf_destroy_plan(inverse);
+    }
+    fftwf_free(in);
+    fftwf_free(spectrum);
+    fftwf_free(level);
+    fftwf_free(out);
+
+    return make_table(cycles.data(), SINGLE_CYCLE_MIPS, size, 1);
+}
+
+/*
+    Manager and cache
+*/
+
+WavetableManager::WavetableManager(int sample_rate) : sample_rate_(sample_rate),
+    live_(new std::atomic<FlatWavetable*>[MAX_TABLES]), budget_((size_t)DEFAULT_TABLE_BUDGET_MB << 20) {
+    for (int i = 0; i < MAX_TABLES; ++i) live_[i].store(nullptr, std::memory_order_relaxed);
+    entries_.reserve(16);
+}
+WavetableManager::~WavetableManager() {}
+
+int WavetableManager::find(const std::string& name) const {
+    for (size_t i = 0; i < entries_.size(); ++i) {
+        if (entries_[i].name == name) return (int)i;
+    }
+    return -1;
+}
+
+int WavetableManager::get_table_id(const std::string& name) const {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return find(name);
+}
+
+bool WavetableManager::build(Entry& entry) {
+    std::unique_ptr<FlatWavetable> wt = entry.path.empty()
+        ? band_limit_cycle(entry.cycle.data(), (int)entry.cycle.size())
+        : read_wvt(entry.name, entry.path);
+    if (!wt) return false;
+
+    entry.bytes = (wt->data.size() + wt->morph_data.size() + wt->unison_data.size()) * sizeof(float);
+    entry.table = std::move(wt);
+    return true;
+}
+
+void WavetableManager::publish(int table_id) {
+    Entry& entry = entries_[table_id];
+    entry.last_used = ++use_clock_;
+    resident_bytes_.fetch_add(entry.bytes);
+    live_[table_id].store(entry.table.get(), std::memory_order_release);
+}
+
+void WavetableManager::evict(int table_id) {
+    Entry& entry = entries_[table_id];
+    if (!entry.table) return;
+
+    // New blocks see null; one that started before the store may still read the table
+    live_[table_id].store(nullptr);
+    while (renders_.load() > 0) std::this_thread::yield();
+
+    entry.table.reset();
+    resident_bytes_.fetch_sub(entry.bytes);
+}
+
+int WavetableManager::add_entry(Entry&& entry) {
+    if ((int)entries_.size() >= MAX_TABLES) {
+        engine_log(LOG_WARNING, "Table limit (%d) reached, '%s' not loaded", MAX_TABLES, entry.name.c_str());
+        return -1;
+    }
+    int new_id = (int)entries_.size();
+    entries_.push_back(std::move(entry));
+    publish(new_id);
     return new_id;
 }
 
+bool WavetableManager::make_resident(int table_id) {
+    Entry& entry = entries_[table_id];
+    if (entry.table) {
+        entry.last_used = ++use_clock_;
+        return true;
+    }
+    if (!build(entry)) return false;
+    publish(table_id);
+    return true;
+}
+
+bool WavetableManager::acquire(int table_id) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    if (table_id < 0 || table_id >= (int)entries_.size()) return false;
+    return make_resident(table_id);
+}
+
+int WavetableManager::load_table(const std::string& name, const std::string& filepath) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    int existing = find(name);
+    if (existing >= 0) return make_resident(existing) ? existing : -1;
+
+    Entry entry;
+    entry.name = name;
+    entry.path = filepath;
+    if (!build(entry)) return -1;
+    return add_entry(std::move(entry));
+}
+
+int WavetableManager::load_single_cycle(const std::string& name, const float* samples, int length) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    int existing = find(name);
+    if (existing >= 0) return make_resident(existing) ? existing : -1;
+
+    if (!samples || length < 2) {
+        engine_log(LOG_WARNING, "Single cycle '%s' needs at least 2 samples", name.c_str());
+        return -1;
+    }
+    for (int i = 0; i < length; ++i) {
+        if (!is_finite_value(samples[i])) {
+            engine_log(LOG_WARNING, "Single cycle '%s' has non-finite samples", name.c_str());
+            return -1;
+        }
+    }
+
+    // The cycle is kept (it is small), an evicted table is rebuilt from it
+    Entry entry;
+    entry.name = name;
+    entry.cycle.assign(samples, samples + length);
+    if (!build(entry)) return -1;
+    return add_entry(std::move(entry));
+}
+
+int WavetableManager::load_single_cycle_file(const std::string& name, const std::string& wav_path) {
+    int existing = get_table_id(name);
+    if (existing >= 0) return acquire(existing) ? existing : -1;
+
+    std::vector<float> cycle;
+    if (!read_wav_mono(wav_path, cycle)) {
+        engine_log(LOG_WARNING, "Cannot read single cycle '%s': %s", name.c_str(), wav_path.c_str());
+        return -1;
+    }
+    return load_single_cycle(name, cycle.data(), (int)cycle.size());
+}
+
+void WavetableManager::trim(const int* keep, int num_keep, const int* extra_keep, int num_extra) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    const size_t budget = budget_.load();
+
+    while (resident_bytes_.load() > budget) {
+        int victim = -1;
+        uint64_t oldest = UINT64_MAX;
+        for (int i = 0; i < (int)entries_.size(); ++i) {
+            if (!entries_[i].table || entries_[i].last_used >= oldest) continue;
+            if (std::find(keep, keep + num_keep, i) != keep + num_keep) continue;
+            if (extra_keep && std::find(extra_keep, extra_keep + num_extra, i) != extra_keep + num_extra) continue;
+            victim = i;
+            oldest = entries_[i].last_used;
+        }
+        if (victim < 0) break;      // Everything left is in use
+        evict(victim);
+    }
+}
+
+int WavetableManager::table_count() const {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return (int)entries_.size();
+}
+
+int WavetableManager::resident_count() const {
+    std::lock_guard<std::mutex> lock(mutex_);
+    int count = 0;
+    for (const auto& entry : entries_) count += (entry.table != nullptr);
+    return count;
+}
+
+/*
+    Rendering
+*/
+
 static inline float interpolate_linear(float y0, float y1, float frac) {
     return y0 + frac * (y1 - y0);
 }
 
+// 4-point, 3rd-order Hermite (Catmull-Rom) between y0 and y1
+static inline float interpolate_hermite(float ym1, float y0, float y1, float y2, float frac) {
+    float c1 = 0.5f * (y1 - ym1);
+    float c2 = ym1 - 2.5f * y0 + 2.0f * y1 - 0.5f * y2;
+    float c3 = 0.5f * (y2 - ym1) + 1.5f * (y0 - y1);
+    return ((c3 * frac + c2) * frac + c1) * frac + y0;
+}
+
+// 4-point, 3rd-order "optimal 2x" polynomial (Niemitalo, z-form). MIP levels keep the content
+// below half of the table band, which is the oversampled case this one is fitted for
+static inline float interpolate_optimal(float ym1, float y0, float y1, float y2, float frac) {
+    float z = frac - 0.5f;
+    float even1 = y1 + y0, odd1 = y1 - y0;
+    float even2 = y2 + ym1, odd2 = y2 - ym1;
+    float c0 = even1 * 0.45868970870461956f + even2 * 0.04131401926395584f;
+    float c1 = odd1 * 0.48068024766578432f + odd2 * 0.17577925564495955f;
+    float c2 = even1 * -0.246185007019907091f + even2 * 0.24614027139700284f;
+    float c3 = odd1 * -0.36030925263849456f + odd2 * 0.10174985775982505f;
+    return ((c3 * z + c2) * z + c1) * z + c0;
+}
+
+// Value at t[i + frac], t points to sample 0 of a guard-padded level (i in 0..size-1)
+template <int MODE>
+static inline float interpolate(const float* t, int i, float frac) {
+    if (MODE == INTERP_CUBIC) return interpolate_hermite(t[i - 1], t[i], t[i + 1], t[i + 2], frac);
+    if (MODE == INTERP_OPTIMAL) return interpolate_optimal(t[i - 1], t[i], t[i + 1], t[i + 2], frac);
+    return interpolate_linear(t[i], t[i + 1], frac);
+}
+
+// Fractional MIP level for a phase increment: one level per octave of table step
+static inline double mip_level(const FlatWavetable& wt, double phase_inc) {
+    double step = phase_inc * wt.base_size;
+    double table_idx_float = 0.0;
+
+    if (step >= 1.0) table_idx_float = std::log2(step + 0.5);
+    if (table_idx_float <= 0) table_idx_float = 0.0;
+    else if (table_idx_float > wt.num_mips - 1.001) table_idx_float = wt.num_mips - 1.001;
+    return table_idx_float;
+}
+
+// MIP pair and crossfade for a steady increment
+static inline void select_mips(const FlatWavetable& wt, double phase_inc, int& idx0, int& idx1, float& mix) {
+    double table_idx_float = mip_level(wt, phase_inc);
+
+    idx0 = (int)table_idx_float;
+    idx1 = idx0 + 1;
+    if (idx1 >= wt.num_mips) idx1 = wt.num_mips - 1;
+    mix = (float)(table_idx_float - idx0);
+}
+
+// MIP levels at both ends of a pitch ramp (increment times ratio every frame). The increment is
+// geometric, so the level (log2 of the table step) is a straight line in the frame index, bent
+// only by the +0.5 toward the duller side: kernels interpolate it per frame from the two ends,
+// two log2 per voice and block instead of one per sample. False for a steady increment, or one
+// that leaves [0, 1) on the way (pitch at the sample rate), which the steady path handles
+static inline bool mip_ramp(const FlatWavetable& wt, double inc, double ratio, int num_frames,
+                            float& level_start, float& level_end) {
+    if (ratio == 1.0 || !(inc >= 0.0 && inc < 1.0)) return false;
+    double inc_end = inc * std::pow(ratio, (double)num_frames);
+    if (!(inc_end < 1.0)) return false;
+
+    level_start = (float)mip_level(wt, inc);
+    level_end = (float)mip_level(wt, inc_end);
+    return true;
+}
+
+// Levels a ramp between two fractional levels reads (with a margin for float rounding)
+static inline void ramp_span(const FlatWavetable& wt, float a, float b, int& lo, int& hi) {
+    lo = std::max(0, (int)(std::min(a, b) - 0.001f));
+    hi = std::min(wt.num_mips - 1, (int)(std::max(a, b) + 0.001f) + 1);
+}
+
+// Distance between neighbouring levels in a kernel's data (table or morphed copy), so a ramp
+// finds level l at offsets[0] + l * step without a lookup per sample
+static inline int level_step(const FlatWavetable& wt, const int* offsets) {
+    return wt.num_mips > 1 ? offsets[1] - offsets[0] : 0;
+}
+
+// Keeps phase and increment in [0, 1) once per block, so positions stay inside the level
+// (+ guards) with no per-sample masking, even for pitches above the sample rate
+static inline double wrap_unit(double x) {
+    return x - std::floor(x);
+}
+
+// Data and level offsets the kernels read for MIP levels lo..hi. Multi-frame tables blend the two
+// frames around position into the slot's copy, once per level and position: every voice of the
+// slot then reads it like a single-frame table, so morphing costs nothing per voice
+static const float* morph_levels(FlatWavetable& wt, int lo, int hi, float position, int slot, const int*& offsets) {
+    if (wt.num_frames <= 1) {
+        offsets = wt.mip_offsets.data();
+        return wt.data.data();
+    }
+    slot = std::max(0, std::min(MORPH_SLOTS - 1, slot));
+    position = std::max(0.0f, std::min(1.0f, position));
+
+    float frame_pos = position * (float)(wt.num_frames - 1);
+    int f0 = std::min((int)frame_pos, wt.num_frames - 2);
+    float frac = frame_pos - (float)f0;
+
+    float* copy = wt.morph_data.data() + (size_t)slot * wt.num_mips * wt.stride;
+    float* blended_at = wt.morph_pos.data() + (size_t)slot * wt.num_mips;
+
+    for (int i = lo; i <= hi; ++i) {
+        if (blended_at[i] == position) continue;
+        blended_at[i] = position;
+
+        const float* a = wt.data.data() + (size_t)i * wt.level_size + (size_t)f0 * wt.stride;
+        const float* b = a + wt.stride;
+        float* dst = copy + (size_t)i * wt.stride;
+        const int n = wt.stride;
+
+        #pragma omp simd
+        for (int j = 0; j < n; ++j) dst[j] = a[j] + frac * (b[j] - a[j]);
+    }
+
+    offsets = wt.morph_offsets.data();
+    return copy;
+}
+
+template <int MODE>
+static void render_loop(const float* t0, const float* t1, float mix, double& pos, double inc,
+                        double size, float amp, float amp_inc, int num_frames, float* output_buffer) {
+    for (int i = 0;  i < num_frames; ++i) {
+        int int_pos = (int)pos;
+        float frac_pos = (float)(pos - int_pos);
+
+        // Read from cache
+        float val0 = interpolate<MODE>(t0, int_pos, frac_pos);
+        float val1 = interpolate<MODE>(t1, int_pos, frac_pos);
+
+        // Mix MIP levels
+        float final_val = val0 + mix * (val1 - val0);
+
+        output_buffer[i] = (amp + amp_inc * (float)i) * final_val;
+
+        pos += inc;
+        if (pos >= size) pos -= size;
+    }
+}
+
+// render_loop with the increment growing by ratio per frame and the MIP pair following it
+template <int MODE>
+static void ramp_loop(const float* raw_data, int first, int step, float level, float level_inc,
+                      double& pos, double inc, double ratio, double size, float amp, float amp_inc,
+                      int num_frames, float* output_buffer) {
+    for (int i = 0; i < num_frames; ++i) {
+        float lvl = level + level_inc * (float)i;
+        int l0 = (int)lvl;
+        float mix = lvl - (float)l0;
+        const float* t0 = raw_data + first + l0 * step;
+        const float* t1 = t0 + step;
+
+        int int_pos = (int)pos;
+        float frac_pos = (float)(pos - int_pos);
+
+        float val0 = interpolate<MODE>(t0, int_pos, frac_pos);
+        float val1 = interpolate<MODE>(t1, int_pos, frac_pos);
+
+        output_buffer[i] = (amp + amp_inc * (float)i) * (val0 + mix * (val1 - val0));
+
+        pos += inc;
+        if (pos >= size) pos -= size;
+        inc *= ratio;
+    }
+}
+
 void WavetableManager::render(
     int table_id,
     double& current_phase,
     double phase_inc,
     int num_frames,
     double amplitude,
-    float* output_buffer
+    float amp_inc,
+    float* output_buffer,
+    int interp,
+    float position,
+    int morph_slot,
+    double inc_ratio
 ) {
-    if (table_id < 0 || table_id >= tables_.size()) {
+    // Unknown or evicted table renders nothing
+    FlatWavetable* table_ptr = table(table_id);
+    if (!table_ptr) {
         return;
     }
+    TRACE_SCOPE("wavetable.render");
 
     // Get a link to the struct
-    const FlatWavetable& wt = tables_[table_id];
-    const float* raw_data = wt.data.data();
+    FlatWavetable& wt = *table_ptr;
 
-    // MIP level calculation
-    double step = phase_inc * wt.base_size;
-    double table_idx_float = 0.0;
+    // Pitch ramp: the MIP pair moves with the pitch inside the block
+    float level_start, level_end;
+    if (mip_ramp(wt, phase_inc, inc_ratio, num_frames, level_start, level_end)) {
+        int lo, hi;
+        ramp_span(wt, level_start, level_end, lo, hi);
+        const int* offsets;
+        const float* raw_data = morph_levels(wt, lo, hi, position, morph_slot, offsets);
+        int step = level_step(wt, offsets);
+        float level_inc = (level_end - level_start) / (float)num_frames;
 
-    if (step >= 1.0) table_idx_float = std::log2(step + 0.5);
-    if (table_idx_float <= 0) table_idx_float = 0.0;
-    else if (table_idx_float > wt.num_mips - 1.001) table_idx_float = wt.num_mips - 1.001;
+        double pos = wrap_unit(current_phase) * wt.base_size;
+        double inc_in_samples = phase_inc * wt.base_size;
+        double size = (double)wt.base_size;
+        float amp_f = (float)amplitude;
 
-    int idx0 = (int)table_idx_float;
-    int idx1 = idx0 + 1;
-    if (idx1 >= wt.num_mips) idx1 = wt.num_mips - 1;
-    float mix = (float)(table_idx_float - idx0);
+        switch (interp) {
+            case INTERP_CUBIC:
+                ramp_loop<INTERP_CUBIC>(raw_data, offsets[0], step, level_start, level_inc, pos, inc_in_samples, inc_ratio, size, amp_f, amp_inc, num_frames, output_buffer);
+                break;
+            case INTERP_OPTIMAL:
+                ramp_loop<INTERP_OPTIMAL>(raw_data, offsets[0], step, level_start, level_inc, pos, inc_in_samples, inc_ratio, size, amp_f, amp_inc, num_frames, output_buffer);
+                break;
+            default:
+                ramp_loop<INTERP_LINEAR>(raw_data, offsets[0], step, level_start, level_inc, pos, inc_in_samples, inc_ratio, size, amp_f, amp_inc, num_frames, output_buffer);
+                break;
+        }
+
+        current_phase = pos / wt.base_size;
+        return;
+    }
+
+    phase_inc = wrap_unit(phase_inc);
+
+    // MIP level calculation
+    int idx0, idx1;
+    float mix;
+    select_mips(wt, phase_inc, idx0, idx1, mix);
 
     // Get pointers to beginning of needed tables
     // Instead of wt.mips[idx][sample] we use raw_data[offset + sample]
     // Which is highly optimized
-    const float* t0 = raw_data + wt.mip_offsets[idx0];
-    const float* t1 = raw_data + wt.mip_offsets[idx1];
+    const int* offsets;
+    const float* raw_data = morph_levels(wt, idx0, idx1, position, morph_slot, offsets);
+    const float* t0 = raw_data + offsets[idx0];
+    const float* t1 = raw_data + offsets[idx1];
 
     // -- Main logic
     // This has to be the most efficient part
-    double pos = current_phase * wt.base_size;
+    double pos = wrap_unit(current_phase) * wt.base_size;
     double inc_in_samples = phase_inc * wt.base_size;
-    int mask = wt.base_size - 1;
-
+    double size = (double)wt.base_size;
     float amp_f = (float)amplitude;
 
-    for (int i = 0;  i < num_frames; ++i) {
-        int int_pos = (int)pos;
-        float frac_pos = (float)(pos - int_pos);
+    switch (interp) {
+        case INTERP_CUBIC:
+            render_loop<INTERP_CUBIC>(t0, t1, mix, pos, inc_in_samples, size, amp_f, amp_inc, num_frames, output_buffer);
+            break;
+        case INTERP_OPTIMAL:
+            render_loop<INTERP_OPTIMAL>(t0, t1, mix, pos, inc_in_samples, size, amp_f, amp_inc, num_frames, output_buffer);
+            break;
+        default:
+            render_loop<INTERP_LINEAR>(t0, t1, mix, pos, inc_in_samples, size, amp_f, amp_inc, num_frames, output_buffer);
+            break;
+    }
 
-        // Bitwise & mask works only if size is a power of 2 (as it is)
-        // Faster than `if (idx >= size) idx = 0;`
-        int i_next = (int_pos + 1) & mask;
-        int_pos = int_pos & mask;
+    current_phase = pos / wt.base_size;
+}
 
-        // Read from cache
-        float val0 = interpolate_linear(t0[int_pos], t0[i_next], frac_pos);
-        float val1 = interpolate_linear(t1[int_pos], t1[i_next], frac_pos);
+// Frames per pass of the steady unison render (positions of all voices fit in 4 kB)
+static const int UNISON_SPAN = 64;
 
-        // Mix MIP levels
-        float final_val = val0 + mix * (val1 - val0);
+// Steady unison in spans of UNISON_SPAN frames. First the positions of all voices advance
+// together, voices innermost over a fixed LANES-wide state (padding lanes never read), which is
+// the same per frame float chain whatever the block size. Then every voice reads its positions
+// frames innermost and adds into the outputs, so there is no per-frame sum over voices.
+// t1 == nullptr: t0 is the MIP pair already crossfaded, one read per frame instead of two
+template <int MODE, int LANES, bool PAIR>
+static inline __attribute__((always_inline)) void unison_loop(
+    const float* t0, const float* t1, float mix, float* pos, const float* inc,
+    const float* gains_l, const float* gains_r, const float* gain_incs_l, const float* gain_incs_r,
+    int num_unison, float size_f, int num_frames, float* out_l, float* out_r) {
 
-        output_buffer[i] = amp_f * final_val;
+    alignas(64) float span_pos[LANES * UNISON_SPAN];
 
-        pos += inc_in_samples;
-        if (pos >= wt.base_size) pos -= wt.base_size;
+    for (int start = 0; start < num_frames; start += UNISON_SPAN) {
+        const int n = std::min(UNISON_SPAN, num_frames - start);
+
+        for (int i = 0; i < n; ++i) {
+            #pragma omp simd
+            for (int u = 0; u < LANES; ++u) {
+                float p = pos[u];
+                span_pos[u * UNISON_SPAN + i] = p;
+                p += inc[u];
+                pos[u] = (p >= size_f) ? p - size_f : p;
+            }
+        }
+
+        for (int u = 0; u < num_unison; ++u) {
+            const float* vp = span_pos + u * UNISON_SPAN;
+            const float g_l = gains_l[u] + gain_incs_l[u] * (float)start;
+            const float g_r = gains_r[u] + gain_incs_r[u] * (float)start;
+            const float gi_l = gain_incs_l[u];
+            const float gi_r = gain_incs_r[u];
+            float* o_l = out_l + start;
+            float* o_r = out_r + start;
+
+            #pragma omp simd
+            for (int i = 0; i < n; ++i) {
+                float p = vp[i];
+                int i0 = (int)p;
+                float frac = p - (float)i0;
+
+                float val = interpolate<MODE>(t0, i0, frac);
+                if (PAIR) {
+                    float v1 = interpolate<MODE>(t1, i0, frac);
+                    val += mix * (v1 - val);
+                }
+
+                float ramp = (float)i;
+                o_l[i] += val * (g_l + gi_l * ramp);
+                o_r[i] += val * (g_r + gi_r * ramp);
+            }
+        }
     }
+}
 
-    current_phase = pos / wt.base_size;
-}
\ No newline at end of file
+// Unison loop of a pitch ramp: one MIP pair per frame for all voices, increments grow by ratio
+template <int MODE, int LANES>
+static inline __attribute__((always_inline)) void unison_ramp_loop(
+    const float* raw_data, int first, int step, float level, float level_inc,
+    float* pos, float* inc, float ratio, const float* gains_l, const float* gains_r,
+    const float* gain_incs_l, const float* gain_incs_r, float size_f, int num_frames,
+    float* out_l, float* out_r) {
+
+    for (int i = 0; i < num_frames; ++i) {
+        float ramp = (float)i;
+        float lvl = level + level_inc * ramp;
+        int l0 = (int)lvl;
+        float mix = lvl - (float)l0;
+        const float* t0 = raw_data + first + l0 * step;
+        const float* t1 = t0 + step;
+
+        float sum_l = 0.0f;
+        float sum_r = 0.0f;
+
+        #pragma omp simd reduction(+:sum_l, sum_r)
+        for (int u = 0; u < LANES; ++u) {
+            float p = pos[u];
+            int i0 = (int)p;
+            float frac = p - (float)i0;
+
+            float v0 = interpolate<MODE>(t0, i0, frac);
+            float v1 = interpolate<MODE>(t1, i0, frac);
+            float val = v0 + mix * (v1 - v0);
+
+            sum_l += val * (gains_l[u] + gain_incs_l[u] * ramp);
+            sum_r += val * (gains_r[u] + gain_incs_r[u] * ramp);
+
+            p += inc[u];
+            pos[u] = (p >= size_f) ? p - size_f : p;
+            inc[u] *= ratio;
+        }
+
+        out_l[i] += sum_l;
+        out_r[i] += sum_r;
+    }
+}
+
+// Lane count for num_unison voices: one AVX2 vector up to 8, two up to MAX_UNISON
+static inline int unison_lanes(int num_unison) {
+    return num_unison <= 8 ? 8 : MAX_UNISON;
+}
+
+// Gains padded to the kernel width, silent lanes past num_unison
+struct UnisonLanes {
+    int count;
+    alignas(64) float gains_l[MAX_UNISON] = {};
+    alignas(64) float gains_r[MAX_UNISON] = {};
+    alignas(64) float gain_incs_l[MAX_UNISON] = {};
+    alignas(64) float gain_incs_r[MAX_UNISON] = {};
+
+    UnisonLanes(const float* g_l, const float* g_r, const float* gi_l, const float* gi_r, int num_unison)
+        : count(unison_lanes(num_unison)) {
+        std::copy(g_l, g_l + num_unison, gains_l);
+        std::copy(g_r, g_r + num_unison, gains_r);
+        std::copy(gi_l, gi_l + num_unison, gain_incs_l);
+        std::copy(gi_r, gi_r + num_unison, gain_incs_r);
+    }
+};
+
+SIMD_CLONES
+static void unison_kernel(const float* t0, const float* t1, float mix, float* pos, const float* inc,
+                          const float* gains_l, const float* gains_r, const float* gain_incs_l,
+                          const float* gain_incs_r, int num_unison, float size_f, int num_frames,
+                          float* out_l, float* out_r, int interp) {
+#define UNISON_LOOP_PAIR(MODE, LANES) \
+    if (t1) unison_loop<MODE, LANES, true>(t0, t1, mix, pos, inc, gains_l, gains_r, gain_incs_l, gain_incs_r, num_unison, size_f, num_frames, out_l, out_r); \
+    else unison_loop<MODE, LANES, false>(t0, t1, mix, pos, inc, gains_l, gains_r, gain_incs_l, gain_incs_r, num_unison, size_f, num_frames, out_l, out_r)
+#define UNISON_LOOP(MODE) \
+    if (unison_lanes(num_unison) == 8) { UNISON_LOOP_PAIR(MODE, 8); } \
+    else { UNISON_LOOP_PAIR(MODE, MAX_UNISON); }
+
+    switch (interp) {
+        case INTERP_CUBIC: UNISON_LOOP(INTERP_CUBIC); break;
+        case INTERP_OPTIMAL: UNISON_LOOP(INTERP_OPTIMAL); break;
+        default: UNISON_LOOP(INTERP_LINEAR); break;
+    }
+#undef UNISON_LOOP
+#undef UNISON_LOOP_PAIR
+}
+
+SIMD_CLONES
+static void unison_ramp_kernel(const float* raw_data, int first, int step, float level, float level_inc,
+                               float* pos, float* inc, float ratio, const float* gains_l, const float* gains_r,
+                               const float* gain_incs_l, const float* gain_incs_r, int lanes, float size_f,
+                               int num_frames, float* out_l, float* out_r, int interp) {
+#define UNISON_RAMP_LOOP(MODE) \
+    if (lanes == 8) unison_ramp_loop<MODE, 8>(raw_data, first, step, level, level_inc, pos, inc, ratio, gains_l, gains_r, gain_incs_l, gain_incs_r, size_f, num_frames, out_l, out_r); \
+    else unison_ramp_loop<MODE, MAX_UNISON>(raw_data, first, step, level, level_inc, pos, inc, ratio, gains_l, gains_r, gain_incs_l, gain_incs_r, size_f, num_frames, out_l, out_r)
+
+    switch (interp) {
+        case INTERP_CUBIC: UNISON_RAMP_LOOP(INTERP_CUBIC); break;
+        case INTERP_OPTIMAL: UNISON_RAMP_LOOP(INTERP_OPTIMAL); break;
+        default: UNISON_RAMP_LOOP(INTERP_LINEAR); break;
+    }
+#undef UNISON_RAMP_LOOP
+}
+
+void WavetableManager::render_unison(
+    int table_id,
+    float* phases,
+    const double* phase_incs,
+    const float* gains_l,
+    const float* gains_r,
+    const float* gain_incs_l,
+    const float* gain_incs_r,
+    int num_unison,
+    int num_frames,
+    float* out_l,
+    float* out_r,
+    int interp,
+    float position,
+    int morph_slot,
+    double inc_ratio
+) {
+    // Unknown or evicted table renders nothing
+    FlatWavetable* table_ptr = table(table_id);
+    if (!table_ptr || num_unison <= 0) {
+        return;
+    }
+    if (num_unison > MAX_UNISON) num_unison = MAX_UNISON;
+    TRACE_SCOPE("wavetable.unison");
+
+    FlatWavetable& wt = *table_ptr;
+
+    // Pitch ramp: the highest voice (it stays the highest) moves the shared MIP pair
+    double max_ramp_inc = 0.0;
+    for (int u = 0; u < num_unison; ++u) max_ramp_inc = std::max(max_ramp_inc, phase_incs[u]);
+
+    float level_start, level_end;
+    if (mip_ramp(wt, max_ramp_inc, inc_ratio, num_frames, level_start, level_end)) {
+        int lo, hi;
+        ramp_span(wt, level_start, level_end, lo, hi);
+        const int* offsets;
+        const float* raw_data = morph_levels(wt, lo, hi, position, morph_slot, offsets);
+        int step = level_step(wt, offsets);
+        float level_inc = (level_end - level_start) / (float)num_frames;
+
+        const float size_f = (float)wt.base_size;
+        alignas(64) float pos[MAX_UNISON] = {};
+        alignas(64) float inc[MAX_UNISON] = {};
+        for (int u = 0; u < num_unison; ++u) {
+            pos[u] = (phases[u] - std::floor(phases[u])) * size_f;
+            inc[u] = (float)(phase_incs[u] * wt.base_size);
+        }
+        float ratio = (float)inc_ratio;
+        UnisonLanes lanes(gains_l, gains_r, gain_incs_l, gain_incs_r, num_unison);
+
+        unison_ramp_kernel(raw_data, offsets[0], step, level_start, level_inc, pos, inc, ratio,
+                           lanes.gains_l, lanes.gains_r, lanes.gain_incs_l, lanes.gain_incs_r, lanes.count,
+                           size_f, num_frames, out_l, out_r, interp);
+
+        for (int u = 0; u < num_unison; ++u) {
+            phases[u] = pos[u] / size_f;
+        }
+        return;
+    }
+
+    // Increments folded into one cycle, positions stay in range without masking
+    alignas(64) double incs[MAX_UNISON];
+    for (int u = 0; u < num_unison; ++u) incs[u] = wrap_unit(phase_incs[u]);
+
+    // MIP level from the highest detuned voice, so nothing aliases
+    double max_inc = 0.0;
+    for (int u = 0; u < num_unison; ++u) max_inc = std::max(max_inc, incs[u]);
+
+    int idx0, idx1;
+    float mix;
+    select_mips(wt, max_inc, idx0, idx1, mix);
+
+    const int* offsets;
+    const float* raw_data = morph_levels(wt, idx0, idx1, position, morph_slot, offsets);
+    const float* t0 = raw_data + offsets[idx0];
+    const float* t1 = raw_data + offsets[idx1];
+
+    // Long enough renders crossfade the pair once into the slot's level (a contiguous pass over
+    // one cycle), so every voice-sample gathers from one level instead of two
+    if (idx1 == idx0 || mix == 0.0f) {
+        t1 = nullptr;
+    } else if (num_unison * num_frames >= wt.stride / 4) {
+        int slot = std::max(0, std::min(MORPH_SLOTS - 1, morph_slot));
+        float* level = wt.unison_data.data() + (size_t)slot * wt.stride;
+        const float* a = t0 - TABLE_GUARD_FRONT;
+        const float* b = t1 - TABLE_GUARD_FRONT;
+        const int n = wt.stride;
+
+        #pragma omp simd
+        for (int j = 0; j < n; ++j) level[j] = a[j] + mix * (b[j] - a[j]);
+
+        t0 = level + TABLE_GUARD_FRONT;
+        t1 = nullptr;
+    }
+
+    // Positions in samples, contiguous so the unison loop vectorizes
+    const float size_f = (float)wt.base_size;
+    alignas(64) float pos[MAX_UNISON] = {};
+    alignas(64) float inc[MAX_UNISON] = {};
+    for (int u = 0; u < num_unison; ++u) {
+        pos[u] = (phases[u] - std::floor(phases[u])) * size_f;
+        inc[u] = (float)(incs[u] * wt.base_size);
+    }
+
+    unison_kernel(t0, t1, mix, pos, inc, gains_l, gains_r, gain_incs_l, gain_incs_r, num_unison,
+                  size_f, num_frames, out_l, out_r, interp);
+
+    for (int u = 0; u < num_unison; ++u) {
+        phases[u] = pos[u] / size_f;
+    }
+}
+
+template <int MODE>
+static inline __attribute__((always_inline)) void batch_loop(
+    const float* raw_data, const int* off0, const int* off1, const float* mip_mix,
+    double* pos, const double* inc, const float* amplitudes, const float* amp_incs, int count,
+    double size_d, int num_frames, float* out, int stride) {
+
+    for (int i = 0; i < num_frames; ++i) {
+        float* row = out + (size_t)i * stride;
+        float ramp = (float)i;
+
+        #pragma omp simd
+        for (int k = 0; k < count; ++k) {
+            double p = pos[k];
+            int i0 = (int)p;
+            float frac = (float)(p - i0);
+
+            // Indexed from the flat array base (not per voice pointers), so the gathers vectorize
+            float v0 = interpolate<MODE>(raw_data, off0[k] + i0, frac);
+            float v1 = interpolate<MODE>(raw_data, off1[k] + i0, frac);
+
+            row[k] += (amplitudes[k] + amp_incs[k] * ramp) * (v0 + mip_mix[k] * (v1 - v0));
+
+            p += inc[k];
+            pos[k] = (p >= size_d) ? p - size_d : p;
+        }
+    }
+}
+
+// Frame by frame, voices innermost: contiguous state and output row, so the voice loop vectorizes
+// (gathers from one table that stays in cache for all voices)
+SIMD_CLONES
+static void batch_kernel(const float* raw_data, const int* off0, const int* off1, const float* mip_mix,
+                         double* pos, const double* inc, const float* amplitudes, const float* amp_incs,
+                         int count, int base_size, int num_frames, float* out, int stride, int interp) {
+    const double size_d = (double)base_size;
+
+    switch (interp) {
+        case INTERP_CUBIC:
+            batch_loop<INTERP_CUBIC>(raw_data, off0, off1, mip_mix, pos, inc, amplitudes, amp_incs, count, size_d, num_frames, out, stride);
+            break;
+        case INTERP_OPTIMAL:
+            batch_loop<INTERP_OPTIMAL>(raw_data, off0, off1, mip_mix, pos, inc, amplitudes, amp_incs, count, size_d, num_frames, out, stride);
+            break;
+        default:
+            batch_loop<INTERP_LINEAR>(raw_data, off0, off1, mip_mix, pos, inc, amplitudes, amp_incs, count, size_d, num_frames, out, stride);
+            break;
+    }
+}
+
+template <int MODE>
+static inline __attribute__((always_inline)) void batch_ramp_loop(
+    const float* raw_data, int first, int step, const float* levels, const float* level_incs,
+    double* pos, double* inc, const double* ratios, const float* amplitudes, const float* amp_incs,
+    int count, double size_d, int num_frames, float* out, int stride) {
+
+    for (int i = 0; i < num_frames; ++i) {
+        float* row = out + (size_t)i * stride;
+        float ramp = (float)i;
+
+        #pragma omp simd
+        for (int k = 0; k < count; ++k) {
+            // Level and crossfade of this frame, interpolated from the block ends
+            float lvl = levels[k] + level_incs[k] * ramp;
+            int l0 = (int)lvl;
+            float mip_mix = lvl - (float)l0;
+            int off0 = first + l0 * step;
+
+            double p = pos[k];
+            int i0 = (int)p;
+            float frac = (float)(p - i0);
+
+            float v0 = interpolate<MODE>(raw_data, off0 + i0, frac);
+            float v1 = interpolate<MODE>(raw_data, off0 + step + i0, frac);
+
+            row[k] += (amplitudes[k] + amp_incs[k] * ramp) * (v0 + mip_mix * (v1 - v0));
+
+            p += inc[k];
+            pos[k] = (p >= size_d) ? p - size_d : p;
+            inc[k] *= ratios[k];
+        }
+    }
+}
+
+// batch_kernel for blocks where some voice's pitch moves
+SIMD_CLONES
+static void batch_ramp_kernel(const float* raw_data, int first, int step, const float* levels,
+                              const float* level_incs, double* pos, double* inc, const double* ratios,
+                              const float* amplitudes, const float* amp_incs, int count, int base_size,
+                              int num_frames, float* out, int stride, int interp) {
+    const double size_d = (double)base_size;
+
+    switch (interp) {
+        case INTERP_CUBIC:
+            batch_ramp_loop<INTERP_CUBIC>(raw_data, first, step, levels, level_incs, pos, inc, ratios, amplitudes, amp_incs, count, size_d, num_frames, out, stride);
+            break;
+        case INTERP_OPTIMAL:
+            batch_ramp_loop<INTERP_OPTIMAL>(raw_data, first, step, levels, level_incs, pos, inc, ratios, amplitudes, amp_incs, count, size_d, num_frames, out, stride);
+            break;
+        default:
+            batch_ramp_loop<INTERP_LINEAR>(raw_data, first, step, levels, level_incs, pos, inc, ratios, amplitudes, amp_incs, count, size_d, num_frames, out, stride);
+            break;
+    }
+}
+
+// Ramped batch: voices with a steady pitch ride along with ratio 1 and a flat level
+static void render_batch_ramp(FlatWavetable& wt, double* phases, const double* phase_incs,
+                              const double* inc_ratios, const float* amplitudes, const float* amp_incs,
+                              int count, int num_frames, float* out, int stride, int interp,
+                              float position, int morph_slot) {
+    alignas(64) float levels[MAX_VOICES];
+    alignas(64) float level_incs[MAX_VOICES];
+    alignas(64) double ratios[MAX_VOICES];
+    alignas(64) double pos[MAX_VOICES];
+    alignas(64) double inc[MAX_VOICES];
+
+    int lo = wt.num_mips, hi = 0;
+    for (int k = 0; k < count; ++k) {
+        double phase_inc = phase_incs[k];
+        float level_start, level_end;
+        ratios[k] = inc_ratios[k];
+        if (!mip_ramp(wt, phase_inc, ratios[k], num_frames, level_start, level_end)) {
+            phase_inc = wrap_unit(phase_inc);
+            level_start = level_end = (float)mip_level(wt, phase_inc);
+            ratios[k] = 1.0;
+        }
+        levels[k] = level_start;
+        level_incs[k] = (level_end - level_start) / (float)num_frames;
+
+        int l, h;
+        ramp_span(wt, level_start, level_end, l, h);
+        lo = std::min(lo, l);
+        hi = std::max(hi, h);
+        pos[k] = wrap_unit(phases[k]) * wt.base_size;
+        inc[k] = phase_inc * wt.base_size;
+    }
+
+    const int* offsets;
+    const float* raw_data = morph_levels(wt, lo, hi, position, morph_slot, offsets);
+    batch_ramp_kernel(raw_data, offsets[0], level_step(wt, offsets), levels, level_incs, pos, inc, ratios,
+                      amplitudes, amp_incs, count, wt.base_size, num_frames, out, stride, interp);
+
+    for (int k = 0; k < count; ++k) {
+        phases[k] = pos[k] / wt.base_size;
+    }
+}
+
+void WavetableManager::render_batch(
+    int table_id,
+    double* phases,
+    const double* phase_incs,
+    const float* amplitudes,
+    const float* amp_incs,
+    int count,
+    int num_frames,
+    float* out,
+    int stride,
+    int interp,
+    float position,
+    int morph_slot,
+    const double* inc_ratios
+) {
+    // Unknown or evicted table renders nothing
+    FlatWavetable* table_ptr = table(table_id);
+    if (!table_ptr || count <= 0) {
+        return;
+    }
+    if (count > MAX_VOICES) count = MAX_VOICES;
+    TRACE_SCOPE("wavetable.batch");
+
+    FlatWavetable& wt = *table_ptr;
+
+    if (inc_ratios) {
+        for (int k = 0; k < count; ++k) {
+            if (inc_ratios[k] == 1.0) continue;
+            render_batch_ramp(wt, phases, phase_incs, inc_ratios, amplitudes, amp_incs, count, num_frames,
+                              out, stride, interp, position, morph_slot);
+            return;
+        }
+    }
+
+    // Every voice has its own pitch, so its own MIP pair (as offsets into the flat array)
+    alignas(64) int off0[MAX_VOICES];
+    alignas(64) int off1[MAX_VOICES];
+    alignas(64) float mip_mix[MAX_VOICES];
+    alignas(64) double pos[MAX_VOICES];
+    alignas(64) double inc[MAX_VOICES];
+
+    int lo = wt.num_mips, hi = 0;
+    for (int k = 0; k < count; ++k) {
+        double phase_inc = wrap_unit(phase_incs[k]);
+        select_mips(wt, phase_inc, off0[k], off1[k], mip_mix[k]);
+        lo = std::min(lo, off0[k]);
+        hi = std::max(hi, off1[k]);
+        pos[k] = wrap_unit(phases[k]) * wt.base_size;
+        inc[k] = phase_inc * wt.base_size;
+    }
+
+    // Level indices -> offsets into whatever the kernel reads (table or its morphed copy)
+    const int* offsets;
+    const float* raw_data = morph_levels(wt, lo, hi, position, morph_slot, offsets);
+    for (int k = 0; k < count; ++k) {
+        off0[k] = offsets[off0[k]];
+        off1[k] = offsets[off1[k]];
+    }
+
+    batch_kernel(raw_data, off0, off1, mip_mix, pos, inc, amplitudes, amp_incs, count,
+                 wt.base_size, num_frames, out, stride, interp);
+
+    for (int k = 0; k < count; ++k) {
+        phases[k] = pos[k] / wt.base_size;
+    }
+}
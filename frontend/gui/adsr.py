@@ -86,9 +86,17 @@ class AdsrPanel(QWidget):
             "release": self.knob_r.value
         }
 
-    def set_state(self, state):
+    # emit=False only updates widgets (engine got the values through set_params already)
+    def set_state(self, state, emit=True):
         if not state: return
+        knobs = (self.knob_a, self.knob_d, self.knob_s, self.knob_r)
+        if not emit:
+            for k in knobs: k.blockSignals(True)
+
         if "attack" in state: self.knob_a.set_value(state["attack"])
         if "decay" in state: self.knob_d.set_value(state["decay"])
         if "sustain" in state: self.knob_s.set_value(state["sustain"])
-        if "release" in state: self.knob_r.set_value(state["release"])
\ No newline at end of file
+        if "release" in state: self.knob_r.set_value(state["release"])
+
+        if not emit:
+            for k in knobs: k.blockSignals(False)
\ No newline at end of file
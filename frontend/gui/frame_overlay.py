@@ -0,0 +1,47 @@
+from PyQt6.QtWidgets import QLabel
+from PyQt6.QtCore import Qt
+
+# On-screen GUI frame budget: per visualizer rate, frame time, timer drift and dropped frames
+# from the RefreshScheduler. Toggled from the main window, refreshed a few times per second
+class FrameOverlay(QLabel):
+    FPS = 4
+
+    def __init__(self, scheduler, parent=None):
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setTextFormat(Qt.TextFormat.PlainText)
+        self.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
+        self.setStyleSheet("""
+            background-color: rgba(0, 0, 0, 170);
+            color: #9f9;
+            font-family: monospace;
+            font-size: 11px;
+            padding: 6px;
+            border-radius: 4px;
+        """)
+        self.hide()
+
+        # Not adaptive and paused while hidden, so it costs nothing when off
+        scheduler.add("overlay", self, self.refresh, self.FPS, paint=None, adaptive=False)
+
+    def toggle(self):
+        self.setVisible(not self.isVisible())
+        if self.isVisible():
+            self.refresh()
+            self.raise_()
+
+    def refresh(self):
+        gui_ms, clients = self.scheduler.stats()
+        lines = [f"GUI {gui_ms:6.1f} ms/s ({gui_ms / 10.0:4.1f}% CPU)"]
+        for c in clients:
+            if c.widget is self:
+                continue
+            if c.paused:
+                lines.append(f"{c.name:<12} paused")
+                continue
+            lines.append(f"{c.name:<12} {c.fps:5.1f}/{c.target_fps:<3} fps  "
+                         f"frame {c.frame_ms:5.2f} ms (max {c.worst_ms:5.2f})  "
+                         f"drift {c.drift_ms:5.2f} ms  dropped {c.dropped}")
+        self.setText("\n".join(lines))
+        self.adjustSize()
@@ -1,36 +1,79 @@
 from PyQt6.QtWidgets import QWidget, QInputDialog
-from PyQt6.QtGui import QPainter, QPixmap, QMouseEvent
+from PyQt6.QtGui import QPainter, QPixmap, QImage, QMouseEvent
 from PyQt6.QtCore import Qt, pyqtSignal, QTimer
 
 # To make nice looking and at least poorly optimized GUI
+# All frames live in one atlas (see tools/knob_atlas.py), decoded once on first use.
+# Scaled frames are sliced lazily and cached per widget size
 class KnobCache:
-    _frames = None
-    _angle_cache = {}   # cache for similar angles
+    ATLAS_PATH = "gui:assets/knob/atlas.png"
+    ATLAS_COLUMNS = 16
+
+    _atlas = None
+    _total = 181
+    _frame_size = 0
+    _scaled_cache = {}  # (size, dpr, index) -> QPixmap
 
     @classmethod
     def load_frames(cls, total=181):
-        if cls._frames is None:
-            cls._frames = []
-            for i in range(total):
-                pix = QPixmap(f"gui:assets/knob/frame_{i}.png")
-                cls._frames.append(pix)
+        if cls._atlas is not None:
+            return
+        cls._total = total
+
+        atlas = QImage(cls.ATLAS_PATH)
+        if not atlas.isNull():
+            cls._atlas = atlas
+            cls._frame_size = atlas.width() // cls.ATLAS_COLUMNS
+            return
+
+        # No atlas: build it in memory from separate frames (slow path)
+        frames = [QImage(f"gui:assets/knob/frame_{i}.png") for i in range(total)]
+        cls._frame_size = frames[0].width()
+        rows = (total + cls.ATLAS_COLUMNS - 1) // cls.ATLAS_COLUMNS
+        atlas = QImage(cls.ATLAS_COLUMNS * cls._frame_size, rows * cls._frame_size,
+                       QImage.Format.Format_ARGB32_Premultiplied)
+        atlas.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(atlas)
+        for i, frame in enumerate(frames):
+            painter.drawImage((i % cls.ATLAS_COLUMNS) * cls._frame_size,
+                              (i // cls.ATLAS_COLUMNS) * cls._frame_size, frame)
+        painter.end()
+        cls._atlas = atlas
 
     @classmethod
-    def get_frame(cls, value, min_value=0.0, max_value=1.0):
+    def get_frame(cls, value, min_value=0.0, max_value=1.0, size=48, dpr=1.0):
         t = (value - min_value) / (max_value - min_value)
         t = max(0.0, min(1.0, t))
-        index = round(t * (len(cls._frames) - 1))
-
-        if index in cls._angle_cache:
-            return cls._angle_cache[index]
-
-        frame = cls._frames[index]
-        cls._angle_cache[index] = frame
+        index = round(t * (cls._total - 1))
+
+        key = (size, dpr, index)
+        frame = cls._scaled_cache.get(key)
+        if frame is not None:
+            return frame
+
+        fs = cls._frame_size
+        x = (index % cls.ATLAS_COLUMNS) * fs
+        y = (index // cls.ATLAS_COLUMNS) * fs
+        pixels = round(size * dpr)
+
+        # Scaled once per size, paintEvent only blits
+        image = cls._atlas.copy(x, y, fs, fs).scaled(
+            pixels, pixels,
+            Qt.AspectRatioMode.KeepAspectRatioByExpanding,
+            Qt.TransformationMode.SmoothTransformation)
+        frame = QPixmap.fromImage(image)
+        frame.setDevicePixelRatio(dpr)
+
+        cls._scaled_cache[key] = frame
         return frame
     
 class Knob(QWidget):
     valueChanged = pyqtSignal(float)
 
+    # Drags emit valueChanged at most this often (mouse moves come much faster);
+    # the engine smooths between the updates
+    CONTROL_RATE_HZ = 60
+
     def __init__(self, parent=None, x=0, y=0, size=256, image_path=None, total_frames=181):
         super().__init__(parent)
         self.setFixedSize(size, size)
@@ -45,27 +88,39 @@ class Knob(QWidget):
         self.last_y = None
         self.sensitivity = 200  # more - smoother
 
+        # Coalesced drag updates: last value sent and the rate limit timer
+        self.emitted_value = self.value
+        self.emit_timer = QTimer(self)
+        self.emit_timer.setSingleShot(True)
+        self.emit_timer.setInterval(round(1000 / self.CONTROL_RATE_HZ))
+        self.emit_timer.timeout.connect(self.flush_value)
+
     def set_value(self, val):
         val = max(self.min_value, min(self.max_value, float(val)))
         if self.value != val:
             self.value = val
             self.update()
+            self.emitted_value = val
+            self.valueChanged.emit(self.value)
+
+    def flush_value(self):
+        # Sends the newest value if it was not sent yet, then holds further ones for one interval
+        if self.value != self.emitted_value:
+            self.emitted_value = self.value
             self.valueChanged.emit(self.value)
+            self.emit_timer.start()
 
     def paintEvent(self, event):
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
 
-        pixmap = KnobCache.get_frame(self.value, self.min_value, self.max_value)
-        pixmap = pixmap.scaled(self.width(), self.height(),
-                               Qt.AspectRatioMode.KeepAspectRatioByExpanding,
-                               Qt.TransformationMode.SmoothTransformation)
+        size = max(self.width(), self.height())
+        pixmap = KnobCache.get_frame(self.value, self.min_value, self.max_value,
+                                     size, self.devicePixelRatioF())
 
         cx = self.width() // 2
         cy = self.height() // 2
-        px = pixmap.width() // 2
-        py = pixmap.height() // 2
+        px = round(pixmap.width() / pixmap.devicePixelRatio()) // 2
+        py = round(pixmap.height() / pixmap.devicePixelRatio()) // 2
 
         painter.translate(cx, cy)
         painter.drawPixmap(-px, -py, pixmap)
@@ -108,13 +163,18 @@ class Knob(QWidget):
         if new_value != self.value:
             self.value = new_value
             self.update()
-            self.valueChanged.emit(self.value)
+
+            # First move goes out at once, the rest at CONTROL_RATE_HZ
+            if not self.emit_timer.isActive():
+                self.flush_value()
 
         self.last_y = current_y
 
     def mouseReleaseEvent(self, event: QMouseEvent):
         if event.button() == Qt.MouseButton.LeftButton:
             self.last_y = None
+            self.emit_timer.stop()
+            self.flush_value()
             event.accept()
 
     def schedule_input_dialog(self):
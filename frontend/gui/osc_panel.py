@@ -1,6 +1,7 @@
 from PyQt6.QtWidgets import QWidget, QLabel, QVBoxLayout, QHBoxLayout, QComboBox
 from PyQt6.QtCore import Qt
 from frontend.gui.knob import Knob
+from control.presets import INTERPOLATIONS
 
 class OscPanel(QWidget):
     def __init__(self, parent=None, title="OSC 1", engine=None, osc_id=1, wavetables=None):
@@ -25,6 +26,12 @@ class OscPanel(QWidget):
         self.combo_wave.currentIndexChanged.connect(self.on_wave_change)
         layout.addWidget(self.combo_wave)
 
+        # Interpolation Selector (quality vs CPU)
+        self.combo_interp = QComboBox()
+        self.combo_interp.addItems(INTERPOLATIONS)
+        self.combo_interp.currentIndexChanged.connect(self.on_interp_change)
+        layout.addWidget(self.combo_interp)
+
         # Knobs Row
         knobs_layout = QHBoxLayout()
                 
@@ -39,11 +46,34 @@ class OscPanel(QWidget):
         # DETUNE Knob (-1.0 .. +1.0)
         self.knob_detune = self.create_knob("Fine", -1.0, 1.0, 0.0, knobs_layout)
         self.knob_detune.valueChanged.connect(self.on_detune_change)
+
+        # POSITION Knob (0 .. 1), morphs through multi-frame tables
+        self.knob_position = self.create_knob("Position", 0.0, 1.0, 0.0, knobs_layout)
+        self.knob_position.valueChanged.connect(self.on_position_change)
         
         layout.addLayout(knobs_layout)
+
+        # Unison Row
+        unison_layout = QHBoxLayout()
+
+        # VOICES Knob (1 .. 16, rounded)
+        self.knob_unison = self.create_knob("Voices", 1.0, 16.0, 1.0, unison_layout)
+        self.knob_unison.valueChanged.connect(self.on_unison_change)
+
+        # UNISON DETUNE Knob (0 .. 100 cents)
+        self.knob_uni_detune = self.create_knob("Spread ct", 0.0, 100.0, 20.0, unison_layout)
+        self.knob_uni_detune.valueChanged.connect(self.on_uni_detune_change)
+
+        # STEREO SPREAD Knob (0 .. 1)
+        self.knob_spread = self.create_knob("Width", 0.0, 1.0, 0.5, unison_layout)
+        self.knob_spread.valueChanged.connect(self.on_spread_change)
+
+        layout.addLayout(unison_layout)
         
         # Initial Apply
         self.on_wave_change(0)
+        self.on_uni_detune_change(self.knob_uni_detune.value)
+        self.on_spread_change(self.knob_spread.value)
 
     def create_knob(self, label, min_v, max_v, default, parent_layout):
             container = QWidget()
@@ -77,12 +107,25 @@ class OscPanel(QWidget):
         else:
             return (ssynth_cpp.Params.OSC3_TYPE, ssynth_cpp.Params.OSC3_MIX, ssynth_cpp.Params.OSC3_PITCH, ssynth_cpp.Params.OSC3_DETUNE)
 
+    def get_unison_param_ids(self):
+        # (voices, detune, spread)
+        import ssynth_cpp
+        P = ssynth_cpp.Params.__members__
+        n = self.osc_id
+        return (P[f"OSC{n}_UNISON"], P[f"OSC{n}_UNI_DETUNE"], P[f"OSC{n}_UNI_SPREAD"])
+
     def on_wave_change(self, idx):
         if not self.engine: return
         wave_id = self.combo_wave.currentData()
         p_type, _, _, _ = self.get_param_ids()
+        self.engine.prepare_tables([int(wave_id)])
         self.engine.set_param(p_type, float(wave_id))
 
+    def on_interp_change(self, idx):
+        if not self.engine: return
+        import ssynth_cpp
+        self.engine.set_param(ssynth_cpp.Params.__members__[f"OSC{self.osc_id}_INTERP"], float(idx))
+
     def on_mix_change(self, val):
         if not self.engine: return
         _, p_mix, _, _ = self.get_param_ids()
@@ -98,17 +141,47 @@ class OscPanel(QWidget):
         _, _, _, p_detune = self.get_param_ids()
         self.engine.set_param(p_detune, val)
 
+    def on_position_change(self, val):
+        if not self.engine: return
+        import ssynth_cpp
+        self.engine.set_param(ssynth_cpp.Params.__members__[f"OSC{self.osc_id}_POS"], val)
+
+    def on_unison_change(self, val):
+        if not self.engine: return
+        p_unison, _, _ = self.get_unison_param_ids()
+        self.engine.set_param(p_unison, float(round(val)))
+
+    def on_uni_detune_change(self, val):
+        if not self.engine: return
+        _, p_detune, _ = self.get_unison_param_ids()
+        self.engine.set_param(p_detune, val)
+
+    def on_spread_change(self, val):
+        if not self.engine: return
+        _, _, p_spread = self.get_unison_param_ids()
+        self.engine.set_param(p_spread, val)
+
     # For presets
     def get_state(self):
         return {
             "wave_index": self.combo_wave.currentIndex(),
             "mix": self.knob_mix.value,
             "pitch": self.knob_pitch.value,
-            "detune": self.knob_detune.value
+            "detune": self.knob_detune.value,
+            "unison": int(round(self.knob_unison.value)),
+            "unison_detune": self.knob_uni_detune.value,
+            "spread": self.knob_spread.value,
+            "interpolation": self.combo_interp.currentIndex(),
+            "position": self.knob_position.value
         }
 
-    def set_state(self, state):
+    # emit=False only updates widgets (engine got the values through set_params already)
+    def set_state(self, state, emit=True):
         if not state: return
+        widgets = (self.combo_wave, self.combo_interp, self.knob_mix, self.knob_pitch, self.knob_detune,
+                   self.knob_position, self.knob_unison, self.knob_uni_detune, self.knob_spread)
+        if not emit:
+            for w in widgets: w.blockSignals(True)
         
         if "wave_index" in state:
             idx = int(state["wave_index"])
@@ -117,4 +190,15 @@ class OscPanel(QWidget):
         
         if "mix" in state: self.knob_mix.set_value(state["mix"])
         if "pitch" in state: self.knob_pitch.set_value(state["pitch"])
-        if "detune" in state: self.knob_detune.set_value(state["detune"])
\ No newline at end of file
+        if "detune" in state: self.knob_detune.set_value(state["detune"])
+        if "position" in state: self.knob_position.set_value(state["position"])
+        if "unison" in state: self.knob_unison.set_value(state["unison"])
+        if "unison_detune" in state: self.knob_uni_detune.set_value(state["unison_detune"])
+        if "spread" in state: self.knob_spread.set_value(state["spread"])
+        if "interpolation" in state:
+            idx = int(state["interpolation"])
+            if 0 <= idx < self.combo_interp.count():
+                self.combo_interp.setCurrentIndex(idx)
+
+        if not emit:
+            for w in widgets: w.blockSignals(False)
\ No newline at end of file
@@ -0,0 +1,172 @@
+import time
+from PyQt6.QtCore import QObject, QTimer, Qt
+
+from frontend.utils.profiler import trace_scope
+
+# Central refresh scheduler for the visualizers. One precise master timer drives every registered
+# widget at its own rate, so their updates land in the same event loop pass and Qt merges the
+# repaints. Hidden, minimized or covered widgets are paused, and each widget's rate follows its
+# measured frame cost, so all of them together stay within GUI_CPU_BUDGET of one core and the
+# audio thread keeps the CPU on small machines
+
+TICK_HZ = 120
+IDLE_TICK_MS = 100          # Polling while everything is paused (waits for the window to come back)
+GUI_CPU_BUDGET = 0.25       # Share of one core all visualizers may use together
+MIN_FPS = 10
+ADAPT_INTERVAL = 1.0        # Seconds between rate adjustments
+STATS_ALPHA = 0.1           # Smoothing of frame time / drift averages
+
+def is_shown(widget):
+    window = widget.window()
+    if not widget.isVisible() or window.isMinimized():
+        return False
+
+    # Not exposed: fully covered by other windows (where the platform reports it)
+    handle = window.windowHandle()
+    if handle is not None and not handle.isExposed():
+        return False
+    return not widget.visibleRegion().isEmpty()
+
+class RefreshClient:
+    def __init__(self, name, widget, callback, fps, adaptive=True, on_pause=None, on_resume=None):
+        self.name = name
+        self.widget = widget
+        self.callback = callback
+        self.target_fps = fps
+        self.fps = float(fps)       # After adaptation
+        self.adaptive = adaptive
+        self.on_pause = on_pause
+        self.on_resume = on_resume
+
+        self.paused = False
+        self.next_due = 0.0
+
+        # Stats: update (callback) and paint cost, lateness against the schedule, skipped frames
+        self.update_ms = 0.0
+        self.paint_ms = 0.0
+        self.worst_ms = 0.0
+        self.drift_ms = 0.0
+        self.dropped = 0
+        self.frames = 0
+
+    @property
+    def frame_ms(self):
+        return self.update_ms + self.paint_ms
+
+    def paint_done(self, seconds):
+        ms = seconds * 1000.0
+        self.paint_ms += STATS_ALPHA * (ms - self.paint_ms)
+        self.worst_ms = max(self.worst_ms, self.update_ms + ms)
+
+class RefreshScheduler(QObject):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.clients = []
+        self.gui_ms_per_s = 0.0     # Time spent in updates and paints, per second
+
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self.tick)
+        self.last_adapt = time.perf_counter()
+        self.busy = 0.0             # Since last_adapt
+
+    def add(self, name, widget, callback, fps, paint="paintGL", adaptive=True, on_pause=None, on_resume=None):
+        client = RefreshClient(name, widget, callback, fps, adaptive, on_pause, on_resume)
+        self.clients.append(client)
+
+        # Paint cost is measured by wrapping the widget's paint method on the instance
+        if paint:
+            method = getattr(widget, paint)
+            def timed_paint(*args):
+                start = time.perf_counter()
+                method(*args)
+                elapsed = time.perf_counter() - start
+                client.paint_done(elapsed)
+                self.busy += elapsed
+            setattr(widget, paint, timed_paint)
+        return client
+
+    def start(self):
+        now = time.perf_counter()
+        for c in self.clients:
+            c.next_due = now
+        self.timer.start(1000 // TICK_HZ)
+
+    def stop(self):
+        self.timer.stop()
+
+    def tick(self):
+        with trace_scope("refresh.tick"):
+            now = time.perf_counter()
+            any_active = False
+
+            for c in self.clients:
+                if not is_shown(c.widget):
+                    if not c.paused:
+                        c.paused = True
+                        if c.on_pause: c.on_pause()
+                    continue
+
+                any_active = True
+                if c.paused:
+                    c.paused = False
+                    c.next_due = now
+                    if c.on_resume: c.on_resume()
+
+                # Half a tick early is on time, the master timer has a coarse grid
+                if now < c.next_due - 0.5 / TICK_HZ:
+                    continue
+
+                period = 1.0 / c.fps
+                late = max(0.0, now - c.next_due)
+                c.drift_ms += STATS_ALPHA * (late * 1000.0 - c.drift_ms)
+
+                # Whole periods that passed without a frame (event loop stalled or frames too slow)
+                missed = int(late / period)
+                c.dropped += missed
+                c.next_due += (missed + 1) * period
+
+                start = time.perf_counter()
+                c.callback()
+                elapsed = time.perf_counter() - start
+                c.update_ms += STATS_ALPHA * (elapsed * 1000.0 - c.update_ms)
+                c.worst_ms = max(c.worst_ms, elapsed * 1000.0)
+                c.frames += 1
+                self.busy += elapsed
+
+            # Nothing to show: slow polling until a widget is visible again
+            interval = 1000 // TICK_HZ if any_active else IDLE_TICK_MS
+            if self.timer.interval() != interval:
+                self.timer.setInterval(interval)
+
+            if now - self.last_adapt >= ADAPT_INTERVAL:
+                self.adapt(now)
+
+    def adapt(self, now):
+        span = now - self.last_adapt
+        self.gui_ms_per_s = 1000.0 * self.busy / span
+        self.busy = 0.0
+        self.last_adapt = now
+
+        active = [c for c in self.clients if not c.paused and c.adaptive]
+        share = GUI_CPU_BUDGET / max(1, len(active))
+
+        for c in active:
+            fps = float(c.target_fps)
+
+            # Highest rate whose cost fits into the client's share of the budget
+            if c.frame_ms > 0.0:
+                fps = min(fps, share * 1000.0 / c.frame_ms)
+
+            # Frames starting late by half a period: the event loop is saturated, back off
+            if c.drift_ms > 500.0 / c.fps:
+                fps = min(fps, c.fps * 0.75)
+
+            # Down at once, up gradually so the rate doesn't oscillate
+            c.fps = max(MIN_FPS, min(fps, c.fps * 1.25))
+
+        for c in self.clients:
+            c.worst_ms = 0.0
+
+    def stats(self):
+        return self.gui_ms_per_s, list(self.clients)
@@ -1,12 +1,16 @@
 import numpy as np
 from PyQt6.QtOpenGLWidgets import QOpenGLWidget
-from PyQt6.QtCore import QTimer
 from OpenGL.GL import *
 from PyQt6.QtGui import QPainter, QColor, QFont
 
+from frontend.utils.profiler import traced
+
 HISTORY_LENGTH = 200     
 FPS = 60               
 
+FFT_SIZE = 2048
+FFT_OVERLAP = 0.75      # hop = FFT_SIZE / 4
+
 def create_magma_lut():
     x = np.linspace(0, 1, 256)
     colors = np.zeros((256, 4), dtype=np.uint8)
@@ -40,12 +44,18 @@ class SpectrogramWidget(QOpenGLWidget):
         self.texture_id = None
         self.history_index = 0
         
-        self.log_indices = None 
+        self.log_i0 = None 
+        self.log_i1 = None 
+        self.log_frac = None 
         self.n_bins_src = 0
 
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_spectrogram)
-        self.timer.start(1000 // FPS) 
+        # FFT runs in the engine analyzer thread, we only collect ready frames
+        if self.engine:
+            self.engine.configure_analyzer(FFT_SIZE, overlap=FFT_OVERLAP)
+            self.engine.start_analyzer()
+
+        # update_spectrogram is driven at FPS by the window's RefreshScheduler,
+        # which also pauses the analysis while the widget can't be seen
 
     def initializeGL(self):
         glClearColor(0.05, 0.05, 0.05, 1.0)
@@ -67,16 +77,28 @@ class SpectrogramWidget(QOpenGLWidget):
         glMatrixMode(GL_MODELVIEW)
         glLoadIdentity()
 
+    def pause_analysis(self):
+        if self.engine:
+            self.engine.stop_analyzer()
+
+    def resume_analysis(self):
+        if self.engine:
+            self.engine.get_spectrum_frames()     # Drop frames queued before the pause
+            self.engine.start_analyzer()
+
+    @traced("spectrogram.update")
     def update_spectrogram(self):
         if not self.engine:
             return
 
-        # Get raw magnitudes from engine
-        raw_magnitudes = np.array(self.engine.get_spectrum(), dtype=np.float32)
-        if raw_magnitudes.size == 0:
+        # All frames produced since the last tick (frames x bins)
+        frames = self.engine.get_spectrum_frames()
+        if frames.shape[0] == 0:
             return
 
-        n_src = raw_magnitudes.size
+        # Older frames would be overwritten anyway
+        frames = frames[-HISTORY_LENGTH:]
+        n_src = frames.shape[1]
         
         # Init buffers
         if self.spectrum_history is None or self.n_bins_src != n_src:
@@ -85,22 +107,30 @@ class SpectrogramWidget(QOpenGLWidget):
             self.n_bins_dst = n_src 
             
             self.spectrum_history = np.zeros((HISTORY_LENGTH, self.n_bins_dst, 4), dtype=np.uint8)
+            self.history_index = 0
             
-            # Precalculate for log stretching
-            self.log_indices = np.geomspace(1, n_src - 1, num=self.n_bins_dst)
+            # Precalculate for log stretching (same as np.interp, but for a batch of frames)
+            log_indices = np.geomspace(1, n_src - 1, num=self.n_bins_dst)
+            self.log_i0 = np.minimum(np.floor(log_indices).astype(np.int64), n_src - 2)
+            self.log_i1 = self.log_i0 + 1
+            self.log_frac = (log_indices - self.log_i0).astype(np.float32)
 
         # Resampling by log. This step allows to stretch low fq and shrink high
-        log_spectrum = np.interp(self.log_indices, np.arange(n_src), raw_magnitudes)
+        log_spectrum = frames[:, self.log_i0] + self.log_frac * (frames[:, self.log_i1] - frames[:, self.log_i0])
 
         # LUT painting
         indices = (log_spectrum * 255).astype(np.uint8)
         colored_spectrum = MAGMA_LUT[indices]
 
-        self.spectrum_history[self.history_index, :] = colored_spectrum
-        self.history_index = (self.history_index + 1) % HISTORY_LENGTH
+        # Write rows into history with wrap
+        n = colored_spectrum.shape[0]
+        rows = (self.history_index + np.arange(n)) % HISTORY_LENGTH
+        self.spectrum_history[rows] = colored_spectrum
+        self.history_index = (self.history_index + n) % HISTORY_LENGTH
         
         self.update()
 
+    @traced("spectrogram.paint")
     def paintGL(self):
         glClear(GL_COLOR_BUFFER_BIT)
         if self.spectrum_history is None: return 
@@ -143,8 +173,11 @@ class SpectrogramWidget(QOpenGLWidget):
         bottom_padding = 5 
         draw_h = h - top_padding - bottom_padding
         
-        min_freq = 21.5 
-        max_freq = 22050.0
+        # Displayed bins run from 1 to Nyquist of the engine rate
+        sample_rate = self.engine.sample_rate if self.engine else 44100
+        fft_size = self.engine.fft_size if self.engine else FFT_SIZE
+        min_freq = sample_rate / fft_size
+        max_freq = sample_rate / 2.0
         
         log_min = np.log10(min_freq)
         log_max = np.log10(max_freq)
@@ -1,123 +1,138 @@
-import numpy as np 
-from PyQt6.QtWidgets import QMainWindow
+import ctypes
+import numpy as np
 from PyQt6.QtOpenGLWidgets import QOpenGLWidget
-from PyQt6.QtCore import QTimer
 from OpenGL.GL import *
-
-# This module is not working really well so it needs to be refactored or even deleted, TODO
-
-class GLWidget(QOpenGLWidget):
-    def __init__(self, data, sample_rate):
-        super().__init__()
-        self.data = data
-        self.sample_rate = sample_rate
-        self.offset = 0.0
-        self.speed = 0.000025    # less - slower
-        self.total_length = len(data)
-        self.total_frames_shown = 0
-
-        if len(data.shape) > 1:
-            self.data = data[:,0]   # choose left channel if sound is stereo
-
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
-        self.timer.start(16)    # ~60 fps
+from OpenGL.GL import shaders
+
+from frontend.utils.profiler import traced
+
+FPS = 120
+NUM_POINTS = 1024
+
+# Same shader draws grid and wave, only the color/scale uniforms change
+VERTEX_SHADER = """
+#version 120
+attribute vec2 a_pos;
+uniform float u_scale;
+void main() {
+    gl_Position = vec4(a_pos.x, a_pos.y * u_scale, 0.0, 1.0);
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 120
+uniform vec4 u_color;
+void main() {
+    gl_FragColor = u_color;
+}
+"""
+
+# Layers with lightning imitation (back to front): color, line width, smoothing
+GLOW_LAYERS = [
+    ((0.76, 0.89, 1.0, 0.75), 16.0, False),
+    ((0.5, 0.7, 1.0, 0.3), 12.0, False),
+    ((0.6, 0.8, 1.0, 0.6), 3.0, False),
+    ((1.0, 1.0, 1.0, 1.0), 1.5, True),      # main
+]
+
+def create_grid(nx=11, ny=9):
+    lines = []
+    for x in np.linspace(-1, 1, nx):
+        lines += [(x, -1.0), (x, 1.0)]
+    for y in np.linspace(-1, 1, ny):
+        lines += [(-1.0, y), (1.0, y)]
+    return np.array(lines, dtype=np.float32)
+
+class OscilloscopeWidget(QOpenGLWidget):
+    """
+    Live oscilloscope fed from the engine RingBuffer.
+    Trigger sync is done in C++ (Engine.get_scope), so python only uploads
+    one float32 buffer per frame and issues a few draw calls
+    """
+    def __init__(self, engine, parent=None, num_points=NUM_POINTS):
+        super().__init__(parent)
+        self.engine = engine
+        self.num_points = num_points
+
+        # x is fixed, only y column gets updated
+        self.vertices = np.zeros((num_points, 2), dtype=np.float32)
+        self.vertices[:, 0] = np.linspace(-1, 1, num_points)
+        self.grid = create_grid()
+
+        self.scale = 0.8    # smoothed amplitude normalization
+        self.program = None
+
+        # update_frame is driven at FPS by the window's RefreshScheduler
 
     def initializeGL(self):
         glClearColor(0.15, 0.15, 0.15, 1.0)
-        glEnable(GL_LINE_SMOOTH)
         glEnable(GL_BLEND)
         glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-        glLineWidth(1.0)
+
+        self.program = shaders.compileProgram(
+            shaders.compileShader(VERTEX_SHADER, GL_VERTEX_SHADER),
+            shaders.compileShader(FRAGMENT_SHADER, GL_FRAGMENT_SHADER),
+        )
+        self.a_pos = glGetAttribLocation(self.program, "a_pos")
+        self.u_scale = glGetUniformLocation(self.program, "u_scale")
+        self.u_color = glGetUniformLocation(self.program, "u_color")
+
+        self.wave_vbo, self.grid_vbo = glGenBuffers(2)
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.wave_vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.vertices.nbytes, self.vertices, GL_DYNAMIC_DRAW)
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.grid_vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.grid.nbytes, self.grid, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
 
     def resizeGL(self, w, h):
         glViewport(0, 0, w, h)
 
-    def paintGL(self):
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-
-        # setka
-        glColor3f(0.2, 0.2, 0.2)
-        glBegin(GL_LINES)
-        for x in np.linspace(-1, 1, 11):
-            glVertex2f(x, -1)
-            glVertex2f(x, 1)
-        for y in np.linspace(-1, 1, 9):
-            glVertex2f(-1, y)
-            glVertex2f(1, y)
-        glEnd()
-
-        # wave itself
-        N = 1024
-
-        # using the interpolation for anti-aliasing effect
-        ind = (np.arange(N) + self.offset) % len(self.data)
-        i0 = np.floor(ind).astype(int)
-        i1 = (i0 + 1) % len(self.data)
-        frac = ind - i0
-        segment = self.data[i0] * (1 - frac) + self.data[i1] * frac
-
-        # normalize the amplitude
-        loc_amp = np.max(np.abs(self.data))
-        if loc_amp > 0:
-            segment = segment / loc_amp
-
-        glDisable(GL_LINE_SMOOTH)
-        # Layers with lightning imitation
-        # layer one
-        glColor4f(0.76, 0.89, 1.0, 0.75)
-        glLineWidth(16.0)
-        glBegin(GL_LINE_STRIP)
-        for i, y in enumerate(segment):
-            x = (i / N) * 2 - 1     # normalize x in [-1,1]
-            glVertex2f(x, y * 0.8)
-        glEnd()
-
-        # layer two
-        glColor4f(0.5, 0.7, 1.0, 0.3) 
-        glLineWidth(12.0) 
-        glBegin(GL_LINE_STRIP)
-        for i, y in enumerate(segment):
-            x = (i / N) * 2 - 1
-            glVertex2f(x, y * 0.8)
-        glEnd()
-
-        #layer 3 
-        glColor4f(0.6, 0.8, 1.0, 0.6) 
-        glLineWidth(3.0) 
-        glBegin(GL_LINE_STRIP)
-        for i, y in enumerate(segment):
-            x = (i / N) * 2 - 1
-            glVertex2f(x, y * 0.8)
-        glEnd()
-
-        glEnable(GL_LINE_SMOOTH)
-
-        # layer 4 - main 
-        glColor4f(1.0, 1.0, 1.0, 1.0)
-        glLineWidth(1.5) 
-        glBegin(GL_LINE_STRIP)
-        for i, y in enumerate(segment):
-            x = (i / N) * 2 - 1
-            glVertex2f(x, y * 0.8)
-        glEnd()
-
+    @traced("scope.update")
     def update_frame(self):
-        frame_shift = self.speed * self.total_length
+        if not self.engine:
+            return
+
+        samples = self.engine.get_scope(self.num_points)
+        self.vertices[:, 1] = samples
 
-        if self.offset + frame_shift >= self.total_length:
-            self.timer.stop()
-            self.offset = self.total_length - 1
-        
-        else: 
-            self.offset += frame_shift
+        # Normalize the amplitude, smoothed so the picture doesn't jump
+        peak = float(np.max(np.abs(samples)))
+        if peak > 1e-4:
+            self.scale += 0.2 * (0.8 / peak - self.scale)
 
         self.update()
 
-class MainWindow(QMainWindow):
-    def __init__(self, data, sample_rate):
-        super().__init__()
-        self.setWindowTitle("Waveform Visualizer")
-        self.setGeometry(300, 200, 800, 400)
-        self.gl_widget = GLWidget(data, sample_rate)
-        self.setCentralWidget(self.gl_widget)
\ No newline at end of file
+    @traced("scope.paint")
+    def paintGL(self):
+        glClear(GL_COLOR_BUFFER_BIT)
+        if self.program is None: return
+
+        glUseProgram(self.program)
+        glEnableVertexAttribArray(self.a_pos)
+
+        # Grid
+        glBindBuffer(GL_ARRAY_BUFFER, self.grid_vbo)
+        glVertexAttribPointer(self.a_pos, 2, GL_FLOAT, GL_FALSE, 0, ctypes.c_void_p(0))
+        glUniform1f(self.u_scale, 1.0)
+        glUniform4f(self.u_color, 0.2, 0.2, 0.2, 1.0)
+        glLineWidth(1.0)
+        glDrawArrays(GL_LINES, 0, len(self.grid))
+
+        # Wave itself: single upload, then every glow layer reuses the same buffer
+        glBindBuffer(GL_ARRAY_BUFFER, self.wave_vbo)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, self.vertices.nbytes, self.vertices)
+        glVertexAttribPointer(self.a_pos, 2, GL_FLOAT, GL_FALSE, 0, ctypes.c_void_p(0))
+        glUniform1f(self.u_scale, self.scale)
+
+        for color, width, smooth in GLOW_LAYERS:
+            if smooth: glEnable(GL_LINE_SMOOTH)
+            else: glDisable(GL_LINE_SMOOTH)
+            glUniform4f(self.u_color, *color)
+            glLineWidth(width)
+            glDrawArrays(GL_LINE_STRIP, 0, self.num_points)
+
+        glDisableVertexAttribArray(self.a_pos)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glUseProgram(0)
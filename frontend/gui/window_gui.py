@@ -6,17 +6,31 @@ from frontend.gui.visual.spectrogram.spectrogram_widget import SpectrogramWidget
 from frontend.gui.osc_panel import OscPanel
 from frontend.gui.adsr import AdsrPanel 
 from frontend.gui.visual.spectrogram.spectrogram_frame import SpectrogramFrame
+from frontend.gui.visual.visualizer import OscilloscopeWidget
+from frontend.gui.visual import visualizer
+from frontend.gui.visual.spectrogram import spectrogram_widget
+from frontend.gui.refresh import RefreshScheduler
+from frontend.gui.frame_overlay import FrameOverlay
+from control.presets import load_preset, preset_to_params, PITCH_KEYS, PITCH_DEFAULTS
+from control.automation import Recording, automation_path
 
 import json
+import ssynth_cpp
 import os
 from pathlib import Path
 
+PRESET_CROSSFADE_MS = 10.0
+RECORD_KEY = Qt.Key.Key_F9
+OVERLAY_KEY = Qt.Key.Key_F3
+
 class MainWindow(QMainWindow):
-    def __init__(self, engine, wavetables, parent=None):
+    def __init__(self, engine, wavetables, parent=None, sample_rate=44100):
         super().__init__(parent)
         self.engine = engine
+        self.sample_rate = sample_rate
         self.wavetables = wavetables
         self.active_keys = {}       # Needed to avoid stucking notes
+        self.recording = None       # Last finished automation recording
 
         self.setWindowTitle("SSYNTH")
         self.setFixedSize(1280, 720) 
@@ -78,7 +92,7 @@ class MainWindow(QMainWindow):
         # Spectrogram block
         vis_container = QWidget()
         vis_container.setFixedHeight(270)
-        vis_layout = QVBoxLayout(vis_container)
+        vis_layout = QHBoxLayout(vis_container)
         vis_layout.setContentsMargins(0,0,0,0)
         
         raw_spectrogram = SpectrogramWidget(engine, parent=self)
@@ -86,6 +100,13 @@ class MainWindow(QMainWindow):
         self.spectrogram_frame = SpectrogramFrame(raw_spectrogram, parent=self)
         
         vis_layout.addWidget(self.spectrogram_frame)
+
+        # Oscilloscope (same glass frame as spectrogram)
+        scope = OscilloscopeWidget(engine, parent=self)
+        self.scope_frame = SpectrogramFrame(scope, parent=self)
+        self.scope_frame.setFixedWidth(360)
+
+        vis_layout.addWidget(self.scope_frame)
         main_layout.addWidget(vis_container)
 
         # Controllers block
@@ -118,6 +139,16 @@ class MainWindow(QMainWindow):
         main_layout.addLayout(controls_layout)
         main_layout.addStretch()
 
+        # Visualizers share one refresh scheduler (pauses them when hidden, adapts their rates)
+        self.refresh = RefreshScheduler(self)
+        self.refresh.add("spectrogram", raw_spectrogram, raw_spectrogram.update_spectrogram, spectrogram_widget.FPS,
+                         on_pause=raw_spectrogram.pause_analysis, on_resume=raw_spectrogram.resume_analysis)
+        self.refresh.add("scope", scope, scope.update_frame, visualizer.FPS)
+
+        self.frame_overlay = FrameOverlay(self.refresh, parent=self)
+        self.frame_overlay.move(24, 24)
+        self.refresh.start()
+
         # Keys processing
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
         self.mousePressEvent = lambda e: self.setFocus()
@@ -144,7 +175,8 @@ class MainWindow(QMainWindow):
             "osc1": self.osc1.get_state(),
             "osc2": self.osc2.get_state(),
             "osc3": self.osc3.get_state(),
-            "adsr": self.adsr.get_state()
+            "adsr": self.adsr.get_state(),
+            "pitch": self.get_pitch_state()
         }
 
         file_path, _ = QFileDialog.getSaveFileName(
@@ -171,6 +203,11 @@ class MainWindow(QMainWindow):
                 with open(file_path, 'w') as f:
                     json.dump(state, f, indent=4)
                 print(f"[System] Preset saved: {file_path}")
+
+                # Performance recorded with F9 goes next to the preset
+                if self.recording is not None and len(self.recording):
+                    self.recording.save(automation_path(file_path))
+                    print(f"[System] Automation saved: {automation_path(file_path)}")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Could not save preset:\n{e}")
 
@@ -184,24 +221,64 @@ class MainWindow(QMainWindow):
 
         if file_path:
             try:
-                with open(file_path, 'r') as f:
-                    state = json.load(f)
-                
-                if "osc1" in state: self.osc1.set_state(state["osc1"])
-                if "osc2" in state: self.osc2.set_state(state["osc2"])
-                if "osc3" in state: self.osc3.set_state(state["osc3"])
-                if "adsr" in state: self.adsr.set_state(state["adsr"])
-                
+                state = load_preset(file_path)
+                self.apply_preset(state)
                 print(f"[System] Preset loaded: {file_path}")
                 
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Could not load preset:\n{e}")
     
+    def get_pitch_state(self):
+        # Glide and bend range have no widgets, the engine holds them (set over OSC or by presets)
+        pitch = {}
+        for key, name in PITCH_KEYS.items():
+            v = self.engine.get_param(ssynth_cpp.Params.__members__[name])
+            pitch[key] = int(v) if key == "glide_mode" else round(float(v), 6)
+        return pitch
+
+    def apply_preset(self, state):
+        # Presets without a "pitch" section don't keep the previous patch's glide / bend range
+        if "pitch" not in state:
+            state = dict(state, pitch=PITCH_DEFAULTS)
+
+        # Whole patch goes to the engine in one atomic swap
+        params = preset_to_params(state, list(self.wavetables.values()))
+        self.engine.set_params(dict(params), crossfade_ms=PRESET_CROSSFADE_MS)
+
+        # Widgets follow silently, repainted once
+        self.setUpdatesEnabled(False)
+        try:
+            if "osc1" in state: self.osc1.set_state(state["osc1"], emit=False)
+            if "osc2" in state: self.osc2.set_state(state["osc2"], emit=False)
+            if "osc3" in state: self.osc3.set_state(state["osc3"], emit=False)
+            if "adsr" in state: self.adsr.set_state(state["adsr"], emit=False)
+        finally:
+            self.setUpdatesEnabled(True)
+    
+    # Automation recording
+
+    def toggle_recording(self):
+        if self.engine.is_recording:
+            self.engine.stop_recording()
+            self.recording = Recording.from_engine(self.engine, self.sample_rate)
+            self.setWindowTitle("SSYNTH")
+            print(f"[System] Recorded {len(self.recording)} events")
+        else:
+            self.engine.start_recording()
+            self.setWindowTitle("SSYNTH  [REC]")
+
     # Key events
                 
     def keyPressEvent(self, event: QKeyEvent):
         if event.isAutoRepeat(): return
         key = event.key()
+
+        if key == RECORD_KEY:
+            self.toggle_recording()
+            return
+        if key == OVERLAY_KEY:
+            self.frame_overlay.toggle()
+            return
         key_map = {
             Qt.Key.Key_Z: 60, Qt.Key.Key_S: 61, Qt.Key.Key_X: 62, Qt.Key.Key_D: 63,
             Qt.Key.Key_C: 64, Qt.Key.Key_V: 65, Qt.Key.Key_G: 66, Qt.Key.Key_B: 67,
@@ -1,5 +1,92 @@
 import os
-import inspect
+import re
+import sys
+import time
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+# Logging never blocks the caller: records go into a bounded queue and are written
+# by a listener thread. Each message is rate limited on its call site, level and text
+# (unquoted numbers masked), so a warning fired every audio block costs a dict lookup, not a
+# terminal write, and doesn't silence unrelated messages from the same site.
+# Counts still pending when a window ends are reported by a sweeper thread and at shutdown
+
+QUEUE_SIZE = 1024
+RATE_LIMIT = 5              # messages per call site and text ...
+RATE_WINDOW = 1.0           # ... per this many seconds
+ENGINE_POLL_INTERVAL = 0.1
+
+_NUMBERS = re.compile(r"('[^']*'|\"[^\"]*\")|\d+")
+
+def template(msg):
+    # "Underrun 12 frames" and "Underrun 40 frames" share a limit, other texts (and quoted
+    # names: 'pad1' and 'pad2') don't
+    return _NUMBERS.sub(lambda m: m.group(1) or "#", msg)
+
+class RateLimiter:
+    def __init__(self, limit=RATE_LIMIT, window=RATE_WINDOW):
+        self.limit = limit
+        self.window = window
+        self._sites = {}    # key -> [window_start, count, suppressed, last suppressed]
+        self._lock = threading.Lock()
+
+    def check(self, key, last=None):
+        """
+        Returns None if the message must be dropped (last is kept for expire()),
+        otherwise the number of messages suppressed since the last one that passed
+        """
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get(key)
+
+            if site is None or now - site[0] >= self.window:
+                suppressed = site[2] if site else 0
+                self._sites[key] = [now, 1, 0, None]
+                return suppressed
+
+            if site[1] < self.limit:
+                site[1] += 1
+                return 0
+
+            site[2] += 1
+            site[3] = last
+            return None
+
+    def expire(self, force=False):
+        """
+        Forgets windows that ended (all of them with force) and returns [(suppressed, last)]
+        for the ones still holding suppressed messages
+        """
+        now = time.monotonic()
+        pending = []
+        with self._lock:
+            ended = [key for key, site in self._sites.items() if force or now - site[0] >= self.window]
+            for key in ended:
+                site = self._sites.pop(key)
+                if site[2]:
+                    pending.append((site[2], site[3]))
+        return pending
+
+class DropQueueHandler(QueueHandler):
+    # Full queue drops the record instead of blocking (or printing a traceback)
+    def __init__(self, q):
+        super().__init__(q)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class ColorFormatter(logging.Formatter):
+    def format(self, record):
+        color, tag = getattr(record, "style", (Log.RESET, record.levelname))
+        loc = getattr(record, "loc", record.name)
+        return f"{color}[ {tag} ]{Log.RESET} {loc} - {record.getMessage()}"
 
 class Log:
     RESET = "\033[0m"
@@ -9,29 +96,133 @@ class Log:
     BLUE  = "\033[34m"
     GRAY  = "\033[90m"
 
+    _logger = None
+    _limiter = RateLimiter()
+    _handler = None
+    _listener = None
+    _sweeping = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def setup(level=logging.DEBUG, stream=None):
+        with Log._lock:
+            if Log._logger is not None:
+                return Log._logger
+
+            output = logging.StreamHandler(stream or sys.stdout)
+            output.setFormatter(ColorFormatter())
+
+            Log._handler = DropQueueHandler(queue.Queue(QUEUE_SIZE))
+            Log._listener = QueueListener(Log._handler.queue, output)
+            Log._listener.start()
+            atexit.register(Log.shutdown)
+
+            Log._sweeping = threading.Event()
+            threading.Thread(target=Log._sweep, args=(Log._sweeping,), name="log-sweep", daemon=True).start()
+
+            logger = logging.getLogger("ssynth")
+            logger.setLevel(level)
+            logger.propagate = False
+            logger.addHandler(Log._handler)
+            Log._logger = logger
+            return logger
+
+    @staticmethod
+    def shutdown():
+        # Reports pending suppressed counts, then flushes what is still queued
+        if Log._sweeping is not None:
+            Log._sweeping.set()
+            Log._sweeping = None
+        if Log._listener is not None:
+            Log.report_suppressed(force=True)
+            Log._listener.stop()
+            Log._listener = None
+
+    @staticmethod
+    def _sweep(stop):
+        while not stop.wait(RATE_WINDOW):
+            Log.report_suppressed()
+
+    @staticmethod
+    def report_suppressed(force=False):
+        # Windows that ended with messages dropped, nothing passed since to carry the count
+        for suppressed, (level, style, msg, site) in Log._limiter.expire(force):
+            Log._logger.log(level, f"{msg} (last of {suppressed} similar messages suppressed)",
+                            extra={"style": style, "loc": Log._location(site)})
+
+    @staticmethod
+    def dropped():
+        return Log._handler.dropped if Log._handler else 0
+
     @staticmethod
     def _caller():
-        frame = inspect.stack()[2]
-        filename = os.path.basename(frame.filename)
-        line = frame.lineno
-        return f"{filename}:{line}"
+        # sys._getframe instead of inspect.stack(): no source file reads on the hot path
+        frame = sys._getframe(3)
+        return frame.f_code, frame.f_lineno
+
+    @staticmethod
+    def _location(site):
+        if isinstance(site, str):
+            return site
+        code, line = site
+        return f"{os.path.basename(code.co_filename)}:{line}"
+
+    @staticmethod
+    def _log(level, style, msg, loc=None):
+        logger = Log._logger or Log.setup()
+        if not logger.isEnabledFor(level):
+            return
+
+        # Rate limit per call site and message before any LogRecord is built
+        site = loc or Log._caller()
+        suppressed = Log._limiter.check((site, level, template(msg)), (level, style, msg, site))
+        if suppressed is None:
+            return
+
+        if suppressed:
+            msg = f"{msg} ({suppressed} similar messages suppressed)"
+
+        logger.log(level, msg, extra={"style": style, "loc": Log._location(site)})
 
     @staticmethod
     def ok(msg):
-        loc = Log._caller()
-        print(f"{Log.GREEN}[ SUCCESS ]{Log.RESET} {loc} - {msg}")
+        Log._log(logging.INFO, (Log.GREEN, "SUCCESS"), msg)
 
     @staticmethod
     def warn(msg):
-        loc = Log._caller()
-        print(f"{Log.YELLOW}[ WARNING ]{Log.RESET} {loc} - {msg}")
+        Log._log(logging.WARNING, (Log.YELLOW, "WARNING"), msg)
 
     @staticmethod
     def err(msg):
-        loc = Log._caller()
-        print(f"{Log.RED}[ ERROR ]{Log.RESET} {loc} - {msg}")
+        Log._log(logging.ERROR, (Log.RED, "ERROR"), msg)
 
     @staticmethod
     def dbg(msg):
-        loc = Log._caller()
-        print(f"{Log.GRAY}[ DEBUG ]{Log.RESET} {loc} - {msg} {Log.RESET}")
\ No newline at end of file
+        Log._log(logging.DEBUG, (Log.GRAY, "DEBUG"), msg)
+
+ENGINE_LEVELS = {
+    0: (logging.DEBUG, (Log.GRAY, "DEBUG")),
+    1: (logging.INFO, (Log.BLUE, "INFO")),
+    2: (logging.WARNING, (Log.YELLOW, "WARNING")),
+    3: (logging.ERROR, (Log.RED, "ERROR")),
+}
+
+def start_engine_log(module, interval=ENGINE_POLL_INTERVAL):
+    """
+    Background thread forwarding the engine's lock-free log queue (module.drain_log)
+    into the Python log. Returns a threading.Event that stops it
+    """
+    stop = threading.Event()
+
+    def drain():
+        for level, text in module.drain_log():
+            py_level, style = ENGINE_LEVELS.get(level, ENGINE_LEVELS[3])
+            Log._log(py_level, style, text, loc="engine")
+
+    def loop():
+        while not stop.wait(interval):
+            drain()
+        drain()
+
+    threading.Thread(target=loop, name="engine-log", daemon=True).start()
+    return stop
@@ -0,0 +1,65 @@
+import time
+import functools
+from contextlib import contextmanager
+
+# Startup timing report (main.py --profile-startup)
+class StartupProfiler:
+    def __init__(self, enabled=False, t0=None):
+        self.enabled = enabled
+        self.t0 = t0 if t0 is not None else time.perf_counter()
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    def mark(self, name, start):
+        # Stage that started before the profiler existed (e.g. module imports)
+        self.stages.append((name, time.perf_counter() - start))
+
+    def report(self):
+        if not self.enabled:
+            return
+
+        total = time.perf_counter() - self.t0
+        print("[Startup] Timing report:")
+        for name, dt in self.stages:
+            share = 100.0 * dt / total if total > 0 else 0.0
+            print(f"  {name:<16} {dt * 1000.0:8.1f} ms  ({share:4.1f}%)")
+        print(f"  {'total':<16} {total * 1000.0:8.1f} ms")
+
+# Stage tracing shared with the engine: Python scopes land in the same capture as the C++
+# TRACE_SCOPE stages, Engine.dump_trace writes both into one Chrome trace (main.py --trace)
+_trace = None   # ssynth_cpp once bound
+
+def bind_trace(module, thread_name="gui"):
+    global _trace
+    _trace = module
+    module.trace_thread_name(thread_name)
+
+@contextmanager
+def trace_scope(name):
+    trace = _trace
+    if trace is None or not trace.trace_recording():
+        yield
+        return
+
+    start = trace.trace_now()
+    try:
+        yield
+    finally:
+        trace.trace_record(name, start, trace.trace_now())
+
+def traced(name):
+    # Decorator form of trace_scope (GUI timers, paints)
+    def wrap(func):
+        @functools.wraps(func)
+        def inner(*args, **kwargs):
+            with trace_scope(name):
+                return func(*args, **kwargs)
+        return inner
+    return wrap
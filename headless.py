@@ -0,0 +1,182 @@
+import sys
+import argparse
+import asyncio
+import signal
+import time
+from pathlib import Path
+
+current_dir = Path(__file__).resolve().parent
+build_dir = current_dir / "build"
+
+if str(build_dir) not in sys.path:
+    sys.path.insert(0, str(build_dir))
+
+try:
+    import ssynth_cpp
+    print("[Core] Engine module imported successfully")
+except ImportError as e:
+    print(f"[Fatal] Could not import ssynth_cpp: {e}")
+    sys.exit(1)
+
+from control.server import CommandQueue, serve, PARAM
+from control.sinks import NullSink, FileSink, DeviceSink
+from control.presets import load_preset, preset_to_params, TYPE_PARAM_IDS
+from control.automation import Recording, write_wav
+from control.shm_tap import DEFAULT_NAME as TAP_NAME
+from frontend.utils.logger import start_engine_log
+
+# Headless engine host: no Qt, controlled over local OSC/UDP
+
+SAMPLE_RATE = 44100
+BLOCK_SIZE = 512
+SAMPLE_FORMATS = ("float32", "int16", "int32")     # What Engine.process writes
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="SSYNTH headless engine")
+    parser.add_argument("--host", default="127.0.0.1", help="Control address (localhost by default)")
+    parser.add_argument("--port", type=int, default=9000, help="Control UDP port")
+    parser.add_argument("--sink", choices=["device", "file", "null"], default="device")
+    parser.add_argument("--out", default="render.wav", help="Output path for file sink")
+    parser.add_argument("--preset", help="JSON preset to load on start")
+    parser.add_argument("--sample-rate", type=int, default=SAMPLE_RATE, help="Output (device / file) rate")
+    parser.add_argument("--engine-rate", type=int,
+                        help="Render at this rate and resample to --sample-rate (default: same rate)")
+    parser.add_argument("--block-size", type=int, default=BLOCK_SIZE)
+    parser.add_argument("--sample-format", choices=SAMPLE_FORMATS, default="float32",
+                        help="Device sample format, the engine converts (and dithers int16) itself")
+    parser.add_argument("--duration", type=float, help="Stop after N seconds of audio (file/null sinks)")
+    parser.add_argument("--offline", action="store_true", help="Don't pace file/null sinks to realtime")
+    parser.add_argument("--interp", choices=["linear", "cubic", "optimal"], default="linear",
+                        help="Oscillator interpolation (presets may override per oscillator)")
+    parser.add_argument("--presets-dir", default=str(current_dir / "user"),
+                        help="Directory /preset paths are resolved in (nothing outside it is read)")
+    parser.add_argument("--recordings-dir", default=str(current_dir / "user" / "recordings"),
+                        help="Directory /record_stop paths are resolved in (nothing outside it is written)")
+    parser.add_argument("--record", help="Record all note/param events of the session to this file")
+    parser.add_argument("--replay", help="Render a recorded automation file to --out and exit (no server)")
+    parser.add_argument("--trace", metavar="PATH", help="Capture engine stages, written as Chrome trace JSON on exit")
+    parser.add_argument("--tap", nargs="?", const=TAP_NAME, metavar="NAME",
+                        help="Publish output to shared memory for local readers (control/shm_tap.py)")
+    return parser.parse_args(argv)
+
+def load_tables(engine):
+    tables_dir = current_dir / "tables"
+    wavetable_ids = []
+
+    required_tables = ["sine", "saw", "square", "triangle"]
+    print(f"[Core] Loading wavetables from: {tables_dir}")
+
+    for name in required_tables:
+        path = tables_dir / f"{name}.wvt"
+        tid = engine.load_wavetable(name, str(path)) if path.exists() else -1
+        if tid >= 0:
+            wavetable_ids.append(tid)
+            print(f"  [+] Loaded {name} -> ID {tid}")
+        else:
+            print(f"  [!] Missing table: {path}")
+    return wavetable_ids
+
+def create_sink(args, engine, queue):
+    if args.sink == "device":
+        return DeviceSink(engine, queue, args.sample_rate, args.block_size, args.sample_format)
+
+    kwargs = dict(sample_rate=args.sample_rate, block_size=args.block_size,
+                  realtime=not args.offline, duration=args.duration)
+    if args.sink == "file":
+        return FileSink(engine, queue, args.out, **kwargs)
+    return NullSink(engine, queue, **kwargs)
+
+def write_trace(args, engine):
+    engine.stop_trace()
+    if engine.dump_trace(args.trace):
+        print(f"[System] Trace written to {args.trace} ({engine.trace_dropped} events dropped)")
+
+def replay(args):
+    engine = ssynth_cpp.Engine(args.engine_rate or args.sample_rate)
+    load_tables(engine)
+
+    if args.trace:
+        engine.start_trace()
+
+    recording = Recording.load(args.replay)
+    if recording.sample_rate != engine.sample_rate:
+        print(f"[System] Recording is {recording.sample_rate} Hz, rendering at {engine.sample_rate} Hz")
+
+    start = time.perf_counter()
+    audio = recording.render(engine, block_size=args.block_size, dtype="<i2")
+    elapsed = time.perf_counter() - start
+
+    write_wav(args.out, audio, engine.sample_rate)
+    if args.trace:
+        write_trace(args, engine)
+    seconds = len(audio) / engine.sample_rate
+    print(f"[System] Rendered {len(recording)} events, {seconds:.1f} s of audio in {elapsed:.2f} s -> {args.out}")
+
+async def run(args):
+    engine_log = start_engine_log(ssynth_cpp)
+    engine = ssynth_cpp.Engine(args.engine_rate or args.sample_rate, args.sample_rate)
+    wavetable_ids = load_tables(engine)
+    queue = CommandQueue()
+
+    # Same defaults as the GUI: first table on OSC1 at full mix
+    if wavetable_ids:
+        engine.prepare_tables(wavetable_ids[:1])
+        engine.set_param(ssynth_cpp.Params.OSC1_TYPE, float(wavetable_ids[0]))
+        engine.set_param(ssynth_cpp.Params.OSC1_MIX, 1.0)
+    engine.set_interpolation(ssynth_cpp.Interp.__members__[args.interp.upper()])
+
+    preset = args.preset or current_dir / "user" / "default.json"
+    if Path(preset).exists():
+        params = preset_to_params(load_preset(preset), wavetable_ids)
+        engine.prepare_tables([int(v) for p, v in params if int(p) in TYPE_PARAM_IDS])
+        queue.push([(PARAM, p, v) for p, v in params])
+        print(f"[System] Preset loaded: {preset}")
+
+    if args.record:
+        engine.start_recording()
+    if args.trace:
+        engine.start_trace()
+    if args.tap and engine.open_tap(args.tap):
+        print(f"[System] Shared memory tap: {args.tap}")
+
+    sink = create_sink(args, engine, queue)
+    sink.start()
+    print(f"[System] Rendering to {args.sink} sink")
+
+    loop = asyncio.get_running_loop()
+    stop_event = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            pass
+
+    # Finite renders stop the server once the sink is done
+    loop.run_in_executor(None, lambda: (sink.finished.wait(), loop.call_soon_threadsafe(stop_event.set)))
+
+    try:
+        await serve(queue, wavetable_ids, args.host, args.port, stop_event, engine, engine.sample_rate,
+                    args.presets_dir, args.recordings_dir)
+    finally:
+        sink.stop()
+        if args.record:
+            engine.stop_recording()
+            recording = Recording.from_engine(engine, engine.sample_rate)
+            recording.save(args.record)
+            print(f"[System] Saved {len(recording)} automation events to {args.record}")
+        if args.trace:
+            write_trace(args, engine)
+        if args.tap:
+            engine.close_tap()
+        engine_log.set()
+        print("[System] Stopped")
+
+def main():
+    args = parse_args()
+    if args.replay:
+        replay(args)
+    else:
+        asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,22 @@
+import time
+_T_START = time.perf_counter()
+
 import sys
 import os
+import argparse
+import importlib.util
 from pathlib import Path
-import sounddevice as sd
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import QDir
-import PyQt6
 
-# QTPlugins search and paths
-dirname = os.path.dirname(PyQt6.__file__)
-plugin_path = os.path.join(dirname, 'Qt6', 'plugins')
-os.environ['QT_PLUGIN_PATH'] = plugin_path
-print(f"[System] QT_PLUGIN_PATH set to: {plugin_path}")
+from frontend.utils.profiler import StartupProfiler, bind_trace, trace_scope
+from frontend.utils.logger import Log, start_engine_log
+
+# QTPlugins search and paths (without importing PyQt6 itself yet)
+_qt_spec = importlib.util.find_spec("PyQt6")
+if _qt_spec and _qt_spec.submodule_search_locations:
+    dirname = list(_qt_spec.submodule_search_locations)[0]
+    plugin_path = os.path.join(dirname, 'Qt6', 'plugins')
+    os.environ['QT_PLUGIN_PATH'] = plugin_path
+    print(f"[System] QT_PLUGIN_PATH set to: {plugin_path}")
 
 current_dir = Path(__file__).resolve().parent
 build_dir = current_dir / "build"
@@ -25,68 +31,144 @@ except ImportError as e:
     print(f"[Fatal] Could not import ssynth_cpp: {e}")
     sys.exit(1)
 
-# --- 
+# ---
 
-SAMPLE_RATE = 44100
+SAMPLE_RATE = 44100         # When the device doesn't report its rate
 BLOCK_SIZE = 512
+SAMPLE_FORMATS = ("float32", "int16", "int32")     # What Engine.process writes
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="SSYNTH")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print import / table load / window construction timings")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Capture engine and GUI stages, written as Chrome trace JSON on exit")
+    parser.add_argument("--tap", nargs="?", const="ssynth_tap", metavar="NAME",
+                        help="Publish output to shared memory for local readers (control/shm_tap.py)")
+    parser.add_argument("--sample-rate", type=int, help="Device rate (default: the device's own rate)")
+    parser.add_argument("--engine-rate", type=int,
+                        help="Render at this rate and resample to the device rate (default: same rate)")
+    parser.add_argument("--sample-format", choices=SAMPLE_FORMATS, default="float32",
+                        help="Device sample format, the engine converts (and dithers int16) itself")
+    # Everything unknown goes to Qt
+    return parser.parse_known_args(argv[1:])
 
-QDir.addSearchPath("gui", str(current_dir / "frontend" ))
+def device_sample_rate():
+    try:
+        import sounddevice as sd
+        return int(sd.query_devices(kind="output")["default_samplerate"])
+    except Exception as e:
+        print(f"[System] No output device rate ({e}), using {SAMPLE_RATE} Hz")
+        return SAMPLE_RATE
 
 def main():
-    engine = ssynth_cpp.Engine(SAMPLE_RATE)
-    
+    args, qt_args = parse_args(sys.argv)
+    profiler = StartupProfiler(enabled=args.profile_startup, t0=_T_START)
+    profiler.mark("import core", _T_START)
+
+    # Heavy GUI modules are imported only now
+    with profiler.stage("import qt"):
+        from PyQt6.QtWidgets import QApplication
+        from PyQt6.QtCore import QDir, QTimer
+
+    # Engine messages (also from the audio thread) are queued in C++ and printed from here
+    engine_log = start_engine_log(ssynth_cpp)
+
+    with profiler.stage("audio device"):
+        sample_rate = args.sample_rate or device_sample_rate()
+    engine_rate = args.engine_rate or sample_rate
+    print(f"[System] Engine {engine_rate} Hz, device {sample_rate} Hz")
+
+    # Measured FFT plans are cached here, so only the first start pays for them
+    ssynth_cpp.Engine.set_fft_wisdom_file(str(build_dir / "fftw_wisdom.dat"))
+    engine = ssynth_cpp.Engine(engine_rate, sample_rate)
+
+    if args.trace:
+        engine.start_trace()
+        bind_trace(ssynth_cpp)
+    if args.tap and engine.open_tap(args.tap):
+        print(f"[System] Shared memory tap: {args.tap}")
+
     tables_dir = current_dir / "tables"
-    wavetables = {} 
-    
+    wavetables = {}
+
     required_tables = ["sine", "saw", "square", "triangle"]
+    optional_tables = ["morph"]     # Multi-frame, generated by tools/wavemanager.py (large, not shipped)
     print(f"[Core] Loading wavetables from: {tables_dir}")
 
-    for name in required_tables:
-        path = tables_dir / f"{name}.wvt"
-        if path.exists():
-            tid = engine.load_wavetable(name, str(path))
-            wavetables[name.capitalize()] = tid
-            print(f"  [+] Loaded {name} -> ID {tid}")
-        else:
-            print(f"  [!] Missing table: {path}")
+    with profiler.stage("tables"):
+        for name in required_tables + optional_tables:
+            path = tables_dir / f"{name}.wvt"
+            if path.exists():
+                tid = engine.load_wavetable(name, str(path))
+                wavetables[name.capitalize()] = tid
+                print(f"  [+] Loaded {name} -> ID {tid}")
+            elif name in required_tables:
+                print(f"  [!] Missing table: {path}")
 
     try:
-        app = QApplication(sys.argv)
+        with profiler.stage("qt app"):
+            app = QApplication([sys.argv[0]] + qt_args)
+            QDir.addSearchPath("gui", str(current_dir / "frontend" ))
     except Exception as e:
         print(f"[Fatal] Failed to init Qt Application: {e}")
         print("Tip: Try running 'pip install --force-reinstall PyQt6'")
         sys.exit(1)
-    
-    from frontend.gui.window_gui import MainWindow
-    window = MainWindow(engine, wavetables)
-    window.show()
+
+    with profiler.stage("import gui"):
+        from frontend.gui.window_gui import MainWindow
+
+    with profiler.stage("window"):
+        window = MainWindow(engine, wavetables, sample_rate=engine_rate)
+        window.show()
 
     # Audio callback
     def audio_callback(outdata, frames, time, status):
         if status:
-            print(f"[Audio Status] {status}", file=sys.stderr)
-        engine.process(outdata)
+            # Queued and rate limited, never blocks the callback
+            Log.warn(f"Audio status: {status}")
+        with trace_scope("audio_callback"):
+            engine.process(outdata)
 
     try:
-        stream = sd.OutputStream(
-            channels=2, 
-            samplerate=SAMPLE_RATE, 
-            blocksize=BLOCK_SIZE, 
-            callback=audio_callback
-        )
-        stream.start()
+        with profiler.stage("audio"):
+            import sounddevice as sd
+
+            stream = sd.OutputStream(
+                channels=2,
+                samplerate=sample_rate,
+                blocksize=BLOCK_SIZE,
+                dtype=args.sample_format,
+                callback=audio_callback
+            )
+            stream.start()
         print("[System] Audio Started. Application Running...")
-        
+
+        # Report once the first events (and paints) are processed
+        first_frame_start = time.perf_counter()
+        def on_first_frame():
+            profiler.mark("first frame", first_frame_start)
+            profiler.report()
+        QTimer.singleShot(0, on_first_frame)
+
         # Start of QT Events cycle
         exit_code = app.exec()
-        
+
         stream.stop()
         stream.close()
+        engine.stop_analyzer()
+        if args.tap:
+            engine.close_tap()
+        if args.trace:
+            engine.stop_trace()
+            if engine.dump_trace(args.trace):
+                print(f"[System] Trace written to {args.trace} ({engine.trace_dropped} events dropped)")
+        engine_log.set()
         sys.exit(exit_code)
-        
+
     except Exception as e:
         print(f"[Fatal] Audio Error: {e}")
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
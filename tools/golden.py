@@ -0,0 +1,198 @@
+import sys
+import json
+import argparse
+import time
+from pathlib import Path
+import numpy as np
+
+# Golden-render regression check for engine optimizations.
+# Renders a fixed matrix of presets x notes x block sizes through ssynth_cpp.Engine,
+# then compares against outputs stored from a known-good build:
+#   python3 tools/golden.py update            # on the reference build
+#   python3 tools/golden.py check             # after the change, exit code 1 on mismatch
+# Failing cases get a diff spectrum CSV in the report directory
+
+root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(root))
+sys.path.insert(0, str(root / "build"))
+
+import ssynth_cpp
+from control.presets import WAVEFORMS, preset_to_params
+
+SAMPLE_RATE = 44100
+DURATION = 0.75             # seconds per case
+NOTE_OFF_AT = 0.5           # seconds, rest is release tail
+DEFAULT_DIR = root / "build" / "golden"
+
+MIN_SNR_DB = 90.0
+MAX_ABS_ERROR = 1e-4
+SPECTRUM_SIZE = 4096
+
+PRESETS = {
+    "sine": {
+        "osc1": {"wave_index": 0, "mix": 1.0},
+        "adsr": {"attack": 0.005, "decay": 0.1, "sustain": 0.8, "release": 0.1},
+    },
+    "saw_lead": {
+        "osc1": {"wave_index": 1, "mix": 1.0},
+        "osc2": {"wave_index": 1, "mix": 0.6, "pitch": 12.0, "detune": 0.07},
+        "adsr": {"attack": 0.01, "decay": 0.2, "sustain": 0.6, "release": 0.15},
+    },
+    "three_osc": {
+        "osc1": {"wave_index": 2, "mix": 0.8},
+        "osc2": {"wave_index": 3, "mix": 0.7, "pitch": -12.0},
+        "osc3": {"wave_index": 1, "mix": 0.4, "pitch": 7.0, "detune": -0.1},
+        "adsr": {"attack": 0.002, "decay": 0.05, "sustain": 0.3, "release": 0.2},
+    },
+    "supersaw": {
+        "osc1": {"wave_index": 1, "mix": 1.0, "unison": 7, "unison_detune": 30.0, "spread": 1.0},
+        "adsr": {"attack": 0.05, "decay": 0.3, "sustain": 0.7, "release": 0.2},
+    },
+}
+NOTES = (36, 69, 96)
+BLOCK_SIZES = (32, 512, 4096)
+
+def make_engine():
+    engine = ssynth_cpp.Engine(SAMPLE_RATE)
+    ids = [engine.load_wavetable(name.lower(), str(root / "tables" / f"{name.lower()}.wvt")) for name in WAVEFORMS]
+    return engine, ids
+
+def cases():
+    for preset in PRESETS:
+        for note in NOTES:
+            for block in BLOCK_SIZES:
+                yield f"{preset}-n{note}-b{block}", preset, note, block
+
+def render_case(preset, note, block_size):
+    """
+    Renders one case through the realtime path (Engine.process)
+    Returns (float32 frames x 2, seconds spent in process)
+    """
+    engine, ids = make_engine()
+    engine.set_param(ssynth_cpp.Params.MASTER_VOL, 0.8)
+    for p, v in preset_to_params(PRESETS[preset], ids):
+        engine.set_param(p, v)
+
+    num_frames = int(DURATION * SAMPLE_RATE)
+    note_off = int(NOTE_OFF_AT * SAMPLE_RATE)
+    out = np.zeros((num_frames, 2), dtype=np.float32)
+    block = np.zeros((block_size, 2), dtype=np.float32)
+
+    engine.note_on(note, 0.9)
+    elapsed = 0.0
+    pos = 0
+    while pos < num_frames:
+        if pos <= note_off < pos + block_size:
+            engine.note_off(note)
+
+        start = time.perf_counter()
+        engine.process(block)
+        elapsed += time.perf_counter() - start
+
+        n = min(block_size, num_frames - pos)
+        out[pos:pos + n] = block[:n]
+        pos += n
+    return out, elapsed
+
+def compare(out, ref):
+    err = out.astype(np.float64) - ref
+    noise = np.sum(err ** 2)
+    signal = np.sum(ref.astype(np.float64) ** 2)
+    snr = np.inf if noise == 0 else 10.0 * np.log10(max(signal, 1e-30) / noise)
+    return snr, float(np.max(np.abs(err)))
+
+def diff_spectrum(out, ref):
+    # Averaged magnitude spectra (left channel) of reference, output and their difference
+    def spectrum(x):
+        n = len(x) // SPECTRUM_SIZE * SPECTRUM_SIZE
+        frames = x[:n].reshape(-1, SPECTRUM_SIZE) * np.hanning(SPECTRUM_SIZE)
+        return np.abs(np.fft.rfft(frames, axis=1)).mean(axis=0) * (4.0 / SPECTRUM_SIZE)
+
+    to_db = lambda m: 20.0 * np.log10(m + 1e-12)
+    freqs = np.fft.rfftfreq(SPECTRUM_SIZE, 1.0 / SAMPLE_RATE)
+    ref_s, out_s = spectrum(ref[:, 0]), spectrum(out[:, 0])
+    diff_s = spectrum(out[:, 0].astype(np.float64) - ref[:, 0])
+    return freqs, to_db(ref_s), to_db(out_s), to_db(diff_s)
+
+def cmd_update(args):
+    out_dir = Path(args.dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    arrays, manifest = {}, {"sample_rate": SAMPLE_RATE, "cases": {}}
+    for name, preset, note, block in cases():
+        audio, elapsed = render_case(preset, note, block)
+        arrays[name] = audio
+        manifest["cases"][name] = {"render_time": elapsed, "peak": float(np.abs(audio).max())}
+        print(f"  {name:<28} {elapsed * 1000:8.2f} ms")
+
+    np.savez_compressed(out_dir / "golden.npz", **arrays)
+    with open(out_dir / "manifest.json", "w") as f:
+        json.dump(manifest, f, indent=4)
+    print(f"Stored {len(arrays)} golden renders in {out_dir}")
+
+def cmd_check(args):
+    golden_dir = Path(args.dir)
+    report_dir = Path(args.report) if args.report else golden_dir / "report"
+    with open(golden_dir / "manifest.json") as f:
+        manifest = json.load(f)
+    golden = np.load(golden_dir / "golden.npz")
+
+    failed, total_ref, total_now = [], 0.0, 0.0
+    print(f"  {'case':<28} {'SNR dB':>8} {'max err':>10} {'ms':>8} {'speedup':>8}")
+
+    for name, preset, note, block in cases():
+        if name not in golden:
+            print(f"  {name:<28} missing in golden set (run update)")
+            failed.append(name)
+            continue
+
+        ref = golden[name]
+        audio, elapsed = render_case(preset, note, block)
+        snr, max_err = compare(audio, ref)
+        ref_time = manifest["cases"][name]["render_time"]
+        total_ref += ref_time
+        total_now += elapsed
+
+        ok = snr >= args.min_snr and max_err <= args.max_error
+        mark = "" if ok else "  FAIL"
+        print(f"  {name:<28} {snr:8.1f} {max_err:10.2e} {elapsed * 1000:8.2f} {ref_time / elapsed:7.2f}x{mark}")
+
+        if not ok:
+            failed.append(name)
+            report_dir.mkdir(parents=True, exist_ok=True)
+            freqs, ref_db, out_db, diff_db = diff_spectrum(audio, ref)
+            path = report_dir / f"{name}.csv"
+            np.savetxt(path, np.column_stack([freqs, ref_db, out_db, diff_db]), delimiter=",",
+                       header="freq_hz,golden_db,output_db,diff_db", comments="", fmt="%.3f")
+            worst = np.argsort(diff_db)[-3:][::-1]
+            bins = ", ".join(f"{freqs[i]:.0f} Hz ({diff_db[i]:.1f} dB)" for i in worst)
+            print(f"      diff spectrum -> {path}; strongest error at {bins}")
+
+    print(f"Total render time {total_now * 1000:.1f} ms (golden {total_ref * 1000:.1f} ms, "
+          f"{total_ref / max(total_now, 1e-9):.2f}x)")
+    if failed:
+        print(f"{len(failed)} case(s) failed")
+        return 1
+    print("All cases match")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Golden-render regression check")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("update", help="Render and store golden outputs (known-good build)")
+    p.add_argument("--dir", default=str(DEFAULT_DIR))
+    p.set_defaults(func=cmd_update)
+
+    p = sub.add_parser("check", help="Compare current build against golden outputs")
+    p.add_argument("--dir", default=str(DEFAULT_DIR))
+    p.add_argument("--report", help="Where diff spectra of failures go (default: <dir>/report)")
+    p.add_argument("--min-snr", type=float, default=MIN_SNR_DB)
+    p.add_argument("--max-error", type=float, default=MAX_ABS_ERROR)
+    p.set_defaults(func=cmd_check)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args) or 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import sys
+import os
+from PyQt6.QtGui import QImage, QPainter, QGuiApplication
+from PyQt6.QtCore import Qt
+
+# Packs knob sprite frames (frame_0.png .. frame_N.png) into a single atlas image,
+# so GUI decodes one file on startup instead of N separate PNGs.
+# Layout must match frontend/gui/knob.py: KnobCache (columns, frame count)
+
+TOTAL_FRAMES = 181
+COLUMNS = 16
+FRAME_SIZE = 128    # Knobs are drawn at 48px, 128 leaves enough room for HiDPI
+
+def build_atlas(src_dir, dst_path, total=TOTAL_FRAMES, columns=COLUMNS, frame_size=FRAME_SIZE):
+    rows = (total + columns - 1) // columns
+    atlas = QImage(columns * frame_size, rows * frame_size, QImage.Format.Format_ARGB32_Premultiplied)
+    atlas.fill(Qt.GlobalColor.transparent)
+
+    painter = QPainter(atlas)
+    painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+
+    for i in range(total):
+        frame = QImage(os.path.join(src_dir, f"frame_{i}.png"))
+        if frame.isNull():
+            print(f"Error: frame_{i}.png not found in {src_dir}")
+            painter.end()
+            return False
+
+        frame = frame.scaled(frame_size, frame_size,
+                             Qt.AspectRatioMode.KeepAspectRatio,
+                             Qt.TransformationMode.SmoothTransformation)
+        x = (i % columns) * frame_size
+        y = (i // columns) * frame_size
+        painter.drawImage(x, y, frame)
+
+    painter.end()
+    atlas.save(dst_path)
+    print(f"Saved {dst_path}: {total} frames, {columns}x{rows} grid of {frame_size}px")
+    return True
+
+if __name__ == "__main__":
+    app = QGuiApplication(sys.argv)
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    knob_dir = os.path.join(root, "frontend", "assets", "knob")
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else FRAME_SIZE
+
+    ok = build_atlas(knob_dir, os.path.join(knob_dir, "atlas.png"), frame_size=size)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,91 @@
+import sys
+import argparse
+import time
+from pathlib import Path
+
+# Preset bank maintenance: import / export JSON presets, render thumbnails, search
+#   python3 tools/presetbank.py import bank.db user/
+#   python3 tools/presetbank.py thumbnails bank.db
+#   python3 tools/presetbank.py search bank.db --text pad --page 3
+
+root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(root))
+sys.path.insert(0, str(root / "build"))
+
+import ssynth_cpp
+from control.preset_bank import PresetBank, render_thumbnail
+from control.presets import WAVEFORMS
+
+SAMPLE_RATE = 44100
+
+def make_engine():
+    engine = ssynth_cpp.Engine(SAMPLE_RATE)
+    ids = [engine.load_wavetable(name.lower(), str(root / "tables" / f"{name.lower()}.wvt")) for name in WAVEFORMS]
+    return engine, ids
+
+def cmd_import(args):
+    with PresetBank(args.bank) as bank:
+        n = bank.import_json(args.paths, tags=args.tag or [])
+    print(f"Imported {n} presets into {args.bank}")
+
+def cmd_export(args):
+    with PresetBank(args.bank, readonly=True) as bank:
+        n = bank.export_json(args.out_dir)
+    print(f"Exported {n} presets to {args.out_dir}")
+
+def cmd_thumbnails(args):
+    _, wavetable_ids = make_engine()
+    factory = lambda: make_engine()[0]
+
+    with PresetBank(args.bank) as bank:
+        ids = bank.ids_without_thumbnail() if not args.all else [r["id"] for r in bank.search(limit=-1)]
+        start = time.perf_counter()
+        for i, preset_id in enumerate(ids):
+            thumb = render_thumbnail(factory, bank.get_params(preset_id), wavetable_ids)
+            bank.set_thumbnail(preset_id, thumb)
+            if i % 100 == 99: bank.commit()
+        bank.commit()
+    print(f"Rendered {len(ids)} thumbnails in {time.perf_counter() - start:.2f} s")
+
+def cmd_search(args):
+    with PresetBank(args.bank, readonly=True) as bank:
+        start = time.perf_counter()
+        total = bank.count(args.text, args.tag, args.waveform)
+        page = bank.search(args.text, args.tag, args.waveform, offset=args.page * args.limit, limit=args.limit)
+        dt = (time.perf_counter() - start) * 1000.0
+
+    for p in page:
+        print(f"  {p['id']:>7}  {p['name']:<32} {p['waveform'] or '-':<9} {','.join(p['tags'])}")
+    print(f"Page {args.page} ({len(page)} of {total}) in {dt:.2f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SSYNTH preset bank tool")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import", help="Import JSON presets (files or directories)")
+    p.add_argument("bank")
+    p.add_argument("paths", nargs="+")
+    p.add_argument("--tag", action="append", help="Tag to add to every imported preset")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("export", help="Export bank to JSON presets")
+    p.add_argument("bank")
+    p.add_argument("out_dir")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("thumbnails", help="Render spectrum thumbnails offline")
+    p.add_argument("bank")
+    p.add_argument("--all", action="store_true", help="Re-render existing thumbnails too")
+    p.set_defaults(func=cmd_thumbnails)
+
+    p = sub.add_parser("search", help="Show one page of results")
+    p.add_argument("bank")
+    p.add_argument("--text")
+    p.add_argument("--tag")
+    p.add_argument("--waveform", choices=WAVEFORMS)
+    p.add_argument("--page", type=int, default=0)
+    p.add_argument("--limit", type=int, default=20)
+    p.set_defaults(func=cmd_search)
+
+    args = parser.parse_args()
+    args.func(args)
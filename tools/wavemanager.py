@@ -16,6 +16,8 @@ class WaveManager:
         Generates a set of tables (MIP-chain) with additive synthesis, naturalizing by applying sigma-approximation
         harmonics_weights: A function that takes a harmonic number (k) and returns the amplitude
         """
+        # MIP level m keeps table_size / 2^(m+1) harmonics whatever sample_rate is, the engine picks
+        # levels by table step per sample, so one file serves every sample rate
         mips_data = []
         base_freq = self.sample_rate / self.table_size
         nyquist = self.sample_rate / 2.0
@@ -84,24 +86,78 @@ class WaveManager:
             mips_data.append(table)
         return mips_data
 
+    # Harmonic amplitudes (index k-1 = harmonic k) of the basic shapes, for morphing tables
+    def shape_harmonics(self, shape):
+        k = np.arange(1, self.table_size // 2 + 1, dtype=np.float64)
+        odd = (k % 2) == 1
+        if shape == "sine":
+            return (k == 1).astype(np.float64)
+        if shape == "saw":
+            return 1.0 / k
+        if shape == "square":
+            return np.where(odd, 1.0 / k, 0.0)
+        if shape == "triangle":
+            sign = np.where(((k - 1) // 2) % 2 == 0, 1.0, -1.0)
+            return np.where(odd, sign / (k * k), 0.0)
+        raise ValueError(f"Unknown shape: {shape}")
+
+    def generate_morph(self, shapes=("sine", "triangle", "square", "saw"), num_frames=256):
+        """
+        Multi-frame table: num_frames waveforms per MIP level, harmonics crossfading through `shapes`
+        Returns one (num_frames x table_size) array per MIP level
+        """
+        print(f"Generating Morph {' -> '.join(shapes)} ({num_frames} frames, Size: {self.table_size})...")
+        spectra = np.array([self.shape_harmonics(s) for s in shapes])
+
+        # Harmonic amplitudes of every frame, linear between neighbouring shapes
+        pos = np.linspace(0.0, len(shapes) - 1, num_frames)
+        i0 = np.minimum(pos.astype(int), len(shapes) - 2)
+        frac = (pos - i0)[:, None]
+        frames = spectra[i0] + frac * (spectra[i0 + 1] - spectra[i0])
+
+        mips_data = []
+        k = np.arange(1, self.table_size // 2 + 1)
+        for mip_level in range(self.num_mips):
+            # Same band limit and sigma approximation as _generate_additive, done in one inverse FFT
+            max_harmonic = (self.table_size // 2) >> mip_level
+            sigma = np.ones(len(k))
+            x = np.pi * k[1:] / (max_harmonic + 1)
+            sigma[1:] = np.sin(x) / x
+            weights = np.where(k <= max_harmonic, frames * sigma, 0.0)
+
+            spectrum = np.zeros((num_frames, self.table_size // 2 + 1), dtype=np.complex128)
+            spectrum[:, 1:] = -0.5j * self.table_size * weights
+            tables = np.fft.irfft(spectrum, n=self.table_size, axis=1)
+
+            peak = np.max(np.abs(tables), axis=1, keepdims=True)
+            tables = np.where(peak > 1e-9, tables / np.maximum(peak, 1e-9), tables)
+            mips_data.append(tables.astype(np.float32))
+
+        return mips_data
+
     def save_wvt(self, filename, mips_data):
         """
         Saves as binary to .wvt
-        Header: Magic(4b), NumMips(4b), TableSize(4b)
-        Body: Float32 array
+        Header: Magic(4b), NumMips(4b), TableSize(4b) [, NumFrames(4b) for WVT2]
+        Body: Float32 array, MIP levels in order, frames of a level back to back
+        Single-frame levels (1D arrays) are written as WVT1, (frames x size) levels as WVT2
         """
+        num_frames = mips_data[0].shape[0] if np.ndim(mips_data[0]) == 2 else 0
         with open(filename, 'wb') as f:
             # 1. Header
-            f.write(b'WVT1') # Magic
+            f.write(b'WVT2' if num_frames else b'WVT1') # Magic
             f.write(struct.pack('<i', len(mips_data))) # Num Mips (int32 little endian)
             f.write(struct.pack('<i', self.table_size)) # Table Size (int32)
+            if num_frames:
+                f.write(struct.pack('<i', num_frames)) # Frames per MIP (int32)
             
             # 2. Data
             # Glue all the tables to single array
-            flat_data = np.concatenate(mips_data).astype(np.float32)
+            flat_data = np.concatenate([np.ravel(m) for m in mips_data]).astype(np.float32)
             f.write(flat_data.tobytes())
             
-        print(f"Saved {filename}: {len(mips_data)} tables of size {self.table_size}")
+        frames = f" x {num_frames} frames" if num_frames else ""
+        print(f"Saved {filename}: {len(mips_data)} tables{frames} of size {self.table_size}")
 
     def load_wvt(self, filename):
         """
@@ -113,20 +169,23 @@ class WaveManager:
 
         with open(filename, 'rb') as f:
             magic = f.read(4)
-            if magic != b'WVT1':
+            if magic not in (b'WVT1', b'WVT2'):
                 print("Error: Invalid file format")
                 return None
             
             num_mips = struct.unpack('<i', f.read(4))[0]
             table_size = struct.unpack('<i', f.read(4))[0]
+            num_frames = struct.unpack('<i', f.read(4))[0] if magic == b'WVT2' else 1
             
-            print(f"Loading {filename} | Mips: {num_mips} | Size: {table_size}")
+            print(f"Loading {filename} | Mips: {num_mips} | Size: {table_size} | Frames: {num_frames}")
             
-            total_samples = num_mips * table_size
+            total_samples = num_mips * num_frames * table_size
             raw_bytes = f.read(total_samples * 4) 
             data = np.frombuffer(raw_bytes, dtype=np.float32)
             
             mips_restored = np.split(data, num_mips)
+            if magic == b'WVT2':
+                mips_restored = [m.reshape(num_frames, table_size) for m in mips_restored]
             return mips_restored
 
 if __name__ == "__main__":
@@ -142,6 +201,9 @@ if __name__ == "__main__":
     manager.save_wvt("triangle.wvt", tri_data)
     manager.save_wvt("sine.wvt", sine_data)
 
+    # Multi-frame table for OSCn_POS morphing
+    manager.save_wvt("morph.wvt", manager.generate_morph())
+
     loaded = manager.load_wvt("saw.wvt")
     if loaded is not None:
         print(f"Debug: First sample of loaded saw: {loaded[0][0]}")
\ No newline at end of file